@@ -45,6 +45,7 @@ MIDDLEWARE = [
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
+    'store.middleware.AnonymousCartMiddleware',  # Saves the cookie cart of anonymous visitors
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
 
@@ -90,6 +91,26 @@ else:
         }
     }
 
+# Cache configuration
+# Uses Redis when REDIS_URL is set so that all workers share one cache,
+# otherwise falls back to a per-process in-memory cache
+REDIS_URL = config('REDIS_URL', default='')
+
+if REDIS_URL:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': REDIS_URL,
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            'LOCATION': 'online-bookstore',
+        }
+    }
+
 # Password validation
 AUTH_PASSWORD_VALIDATORS = [
     {
@@ -142,6 +163,11 @@ EMAIL_HOST_PASSWORD = config('EMAIL_HOST_PASSWORD', default='')
 if DEBUG:
     EMAIL_BACKEND = 'django.core.mail.backends.console.EmailBackend'
 
+# Generated eBook placeholder PDFs are cached on the local disk of the
+# process that sends emails (see store.pdf_cache)
+PDF_CACHE_DIR = config('PDF_CACHE_DIR', default=str(BASE_DIR / 'cache' / 'pdfs'))
+PDF_CACHE_MAX_BYTES = config('PDF_CACHE_MAX_BYTES', default=256 * 1024 * 1024, cast=int)
+
 # Session configuration
 SESSION_COOKIE_AGE = 86400  # 24 hours
 
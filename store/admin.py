@@ -6,14 +6,70 @@ books, orders, and other bookstore data.
 """
 
 from django.contrib import admin
+from django.core.exceptions import PermissionDenied
+from django.db import transaction
+from django.http import Http404
+from django.utils import timezone
 from django.utils.html import format_html
-from django.urls import reverse
+from django.urls import path, reverse
 from django.utils.safestring import mark_safe
-from .models import Book, CartItem, Order, OrderItem, UserProfile
+from .autocomplete import publish_book_change
+from .caching import bump_catalog_version
+from .exports import ExportError, available_formats, export_response
+from .models import (
+    Book, CartItem, Category, Order, OrderItem, OutboxEmail, Review, StockReservation,
+    UserProfile,
+)
+
+
+class ExportMixin:
+    """
+    Adds streaming CSV/JSONL/Parquet downloads of the whole table to a
+    model admin's change list.
+    """
+
+    export_dataset = None
+    change_list_template = 'admin/store/export_change_list.html'
+
+    def get_urls(self):
+        """Add the export download URL"""
+        info = self.opts.app_label, self.opts.model_name
+        return [
+            path(
+                'export/<str:file_format>/',
+                self.admin_site.admin_view(self.export_view),
+                name='%s_%s_export' % info,
+            ),
+        ] + super().get_urls()
+
+    def export_view(self, request, file_format):
+        """Stream the export as a file download"""
+        if not self.has_view_permission(request):
+            raise PermissionDenied
+        try:
+            return export_response(self.export_dataset, file_format)
+        except ExportError as e:
+            raise Http404(str(e))
+
+    def changelist_view(self, request, extra_context=None):
+        """Offer the export formats on the change list"""
+        extra_context = {**(extra_context or {}), 'export_formats': available_formats()}
+        return super().changelist_view(request, extra_context=extra_context)
+
+
+@admin.register(Category)
+class CategoryAdmin(admin.ModelAdmin):
+    """
+    Admin configuration for Category model.
+    """
+
+    list_display = ['name', 'slug']
+    search_fields = ['name']
+    prepopulated_fields = {'slug': ('name',)}
 
 
 @admin.register(Book)
-class BookAdmin(admin.ModelAdmin):
+class BookAdmin(ExportMixin, admin.ModelAdmin):
     """
     Admin configuration for Book model.
 
@@ -21,13 +77,15 @@ class BookAdmin(admin.ModelAdmin):
     search, filtering, and bulk actions.
     """
 
+    export_dataset = 'books'
+
     list_display = [
-        'title', 'author', 'price', 'stock_quantity',
+        'title', 'author', 'category', 'price', 'stock_quantity',
         'is_featured', 'created_at', 'cover_image_preview'
     ]
 
     list_filter = [
-        'is_featured', 'created_at', 'stock_quantity'
+        'category', 'is_featured', 'created_at', 'stock_quantity'
     ]
 
     search_fields = [
@@ -39,12 +97,13 @@ class BookAdmin(admin.ModelAdmin):
     ]
 
     readonly_fields = [
-        'created_at', 'updated_at', 'cover_image_preview'
+        'created_at', 'updated_at', 'cover_image_preview',
+        'rating_count', 'rating_average'
     ]
 
     fieldsets = (
         ('Book Information', {
-            'fields': ('title', 'author', 'isbn', 'description')
+            'fields': ('title', 'author', 'isbn', 'category', 'description')
         }),
         ('Pricing and Inventory', {
             'fields': ('price', 'stock_quantity', 'is_featured')
@@ -52,6 +111,10 @@ class BookAdmin(admin.ModelAdmin):
         ('Media Files', {
             'fields': ('cover_image', 'cover_image_preview', 'placeholder_pdf')
         }),
+        ('Ratings', {
+            'fields': ('rating_count', 'rating_average'),
+            'classes': ('collapse',)
+        }),
         ('Timestamps', {
             'fields': ('created_at', 'updated_at'),
             'classes': ('collapse',)
@@ -72,9 +135,27 @@ class BookAdmin(admin.ModelAdmin):
 
     cover_image_preview.short_description = "Cover Preview"
 
+    def set_featured(self, queryset, featured):
+        """
+        Set is_featured on the selected books in one UPDATE.
+
+        update() bypasses the Book signals, so this refreshes the cached
+        shelves and the autocomplete index the same way they would.
+        """
+        book_ids = list(queryset.values_list('id', flat=True))
+        updated = Book.objects.filter(id__in=book_ids).update(is_featured=featured)
+
+        def publish():
+            for book_id in book_ids:
+                publish_book_change(book_id)
+            bump_catalog_version()
+
+        transaction.on_commit(publish)
+        return updated
+
     def mark_as_featured(self, request, queryset):
         """Mark selected books as featured"""
-        updated = queryset.update(is_featured=True)
+        updated = self.set_featured(queryset, True)
         self.message_user(
             request,
             f'{updated} books were successfully marked as featured.'
@@ -84,7 +165,7 @@ class BookAdmin(admin.ModelAdmin):
 
     def mark_as_not_featured(self, request, queryset):
         """Remove featured status from selected books"""
-        updated = queryset.update(is_featured=False)
+        updated = self.set_featured(queryset, False)
         self.message_user(
             request,
             f'{updated} books were successfully unmarked as featured.'
@@ -120,13 +201,15 @@ class OrderItemInline(admin.TabularInline):
 
 
 @admin.register(Order)
-class OrderAdmin(admin.ModelAdmin):
+class OrderAdmin(ExportMixin, admin.ModelAdmin):
     """
     Admin configuration for Order model.
 
     Provides comprehensive order management with inline order items.
     """
 
+    export_dataset = 'orders'
+
     list_display = [
         'order_number', 'user', 'total_amount', 'status',
         'created_at', 'email_sent', 'order_items_count'
@@ -195,26 +278,16 @@ class OrderAdmin(admin.ModelAdmin):
     mark_as_shipped.short_description = "Mark selected orders as shipped"
 
     def resend_confirmation_email(self, request, queryset):
-        """Resend confirmation email for selected orders"""
-        from .views import send_order_confirmation_email
-
-        count = 0
-        for order in queryset:
-            try:
-                send_order_confirmation_email(order)
-                count += 1
-            except Exception as e:
-                self.message_user(
-                    request,
-                    f'Error sending email for order {order.order_number}: {str(e)}',
-                    level='ERROR'
-                )
-
-        if count > 0:
-            self.message_user(
-                request,
-                f'Successfully resent confirmation emails for {count} orders.'
-            )
+        """Queue confirmation emails for selected orders"""
+        queued = OutboxEmail.objects.bulk_create(
+            OutboxEmail(kind='order_confirmation', order=order)
+            for order in queryset.only('id')
+        )
+        self.message_user(
+            request,
+            f'Queued confirmation emails for {len(queued)} orders; '
+            f'the deliver_emails worker will send them.'
+        )
 
     resend_confirmation_email.short_description = "Resend confirmation emails"
 
@@ -239,6 +312,78 @@ class CartItemAdmin(admin.ModelAdmin):
     total_price.short_description = "Total Price"
 
 
+@admin.register(StockReservation)
+class StockReservationAdmin(admin.ModelAdmin):
+    """
+    Admin configuration for StockReservation model.
+
+    Read-only view of the copies held by carts; holds are managed by
+    the cart and the sweep_reservations command.
+    """
+
+    list_display = ['user', 'book', 'quantity', 'expires_at']
+    list_filter = ['expires_at']
+    search_fields = ['user__username', 'book__title']
+    list_select_related = ['user', 'book']
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def has_delete_permission(self, request, obj=None):
+        return False
+
+
+@admin.register(OutboxEmail)
+class OutboxEmailAdmin(admin.ModelAdmin):
+    """
+    Admin configuration for OutboxEmail model.
+
+    Shows queued transactional emails and lets staff retry failed ones.
+    """
+
+    list_display = ['order', 'kind', 'status', 'attempts', 'next_attempt_at', 'sent_at']
+    list_filter = ['status', 'kind', 'created_at']
+    search_fields = ['order__user__username', 'order__user__email', 'last_error']
+    list_select_related = ['order__user']
+    readonly_fields = [
+        'kind', 'order', 'status', 'attempts', 'next_attempt_at',
+        'last_error', 'created_at', 'sent_at'
+    ]
+
+    actions = ['retry_emails']
+
+    def has_add_permission(self, request):
+        return False
+
+    def retry_emails(self, request, queryset):
+        """Send selected unsent emails again on the worker's next run"""
+        updated = queryset.exclude(status='sent').update(
+            status='pending', attempts=0, next_attempt_at=timezone.now()
+        )
+        self.message_user(request, f'{updated} emails will be retried.')
+
+    retry_emails.short_description = "Retry selected emails"
+
+
+@admin.register(Review)
+class ReviewAdmin(admin.ModelAdmin):
+    """
+    Admin configuration for Review model.
+
+    Saving or deleting reviews here keeps book rating aggregates in
+    sync through the Review signal handlers.
+    """
+
+    list_display = ['book', 'user', 'rating', 'created_at']
+    list_filter = ['rating', 'created_at']
+    search_fields = ['user__username', 'book__title', 'comment']
+    readonly_fields = ['created_at', 'updated_at']
+    raw_id_fields = ['book', 'user']
+
+
 @admin.register(UserProfile)
 class UserProfileAdmin(admin.ModelAdmin):
     """
@@ -282,13 +427,15 @@ class UserProfileAdmin(admin.ModelAdmin):
 
 # Register OrderItem separately if needed for direct access
 @admin.register(OrderItem)
-class OrderItemAdmin(admin.ModelAdmin):
+class OrderItemAdmin(ExportMixin, admin.ModelAdmin):
     """
     Admin configuration for OrderItem model.
 
     Provides interface to view individual order items.
     """
 
+    export_dataset = 'order_items'
+
     list_display = ['order', 'book', 'quantity', 'price', 'total_price']
     list_filter = ['order__status', 'order__created_at']
     search_fields = ['order__user__username', 'book__title', 'book__author']
@@ -0,0 +1,212 @@
+"""
+JSON API for the book catalog and the shopping cart.
+
+The catalog endpoints are read-only and used by the mobile app and
+partner feeds. Responses are built from
+lean ``values()`` projections instead of model instances, and carry
+ETag and Last-Modified headers so that polling clients get a 304
+before any book data is loaded:
+
+- the list endpoint's validators come from the catalog version and
+  last-change time kept in the cache, so a 304 usually costs no query;
+- the detail endpoint's validators come from the book's ``updated_at``
+  (one primary key lookup) plus the catalog version.
+
+Checkout only bumps the catalog version when a book sells out, so the
+``stock_quantity`` a client revalidates can lag sales until then; it is
+informational, and checkout re-checks stock.
+
+The cart endpoint applies a batch of quantity changes in a constant
+number of queries (see store.cart.apply_cart_changes) and returns the
+updated cart, so cart edits don't need a full page round trip.
+"""
+
+import hashlib
+import json
+from datetime import datetime, timezone as dt_timezone
+from decimal import Decimal
+
+from django.db.models import F, Max
+from django.http import Http404, JsonResponse
+from django.urls import reverse
+from django.utils.decorators import method_decorator
+from django.views import View
+from django.views.decorators.http import condition
+
+from .caching import get_catalog_modified, get_catalog_version, set_catalog_modified
+from .cart import apply_cart_changes, get_cart_lines
+from .models import Book
+from .pagination import KeysetPaginator
+from .views import CatalogQueryMixin
+
+
+DEFAULT_PAGE_SIZE = 20
+MAX_PAGE_SIZE = 100
+
+LIST_FIELDS = (
+    'id', 'title', 'author', 'isbn', 'price', 'stock_quantity',
+    'is_featured', 'rating_average', 'rating_count', 'created_at', 'updated_at',
+)
+DETAIL_FIELDS = LIST_FIELDS + ('description',)
+
+
+def catalog_last_modified(request, *args, **kwargs):
+    """Last-Modified for catalog listings"""
+    timestamp = get_catalog_modified()
+    if timestamp is None:
+        latest = Book.objects.aggregate(latest=Max('updated_at'))['latest']
+        timestamp = latest.timestamp() if latest else 0
+        set_catalog_modified(timestamp)
+    return datetime.fromtimestamp(timestamp, tz=dt_timezone.utc)
+
+
+def catalog_etag(request, *args, **kwargs):
+    """ETag for a catalog listing: catalog version plus query string"""
+    params = sorted(request.GET.lists())
+    digest = hashlib.md5(f'{get_catalog_version()}|{params!r}'.encode()).hexdigest()
+    return digest
+
+
+def book_stamp(request, pk):
+    """
+    Return the book's ``updated_at``, or None if it does not exist.
+
+    Both validator functions need it, so it is looked up once per
+    request.
+    """
+    if not hasattr(request, '_book_stamp'):
+        request._book_stamp = Book.objects.filter(pk=pk).values_list(
+            'updated_at', flat=True
+        ).first()
+    return request._book_stamp
+
+
+def book_etag(request, pk):
+    """ETag for a book: its last update plus the catalog version"""
+    updated_at = book_stamp(request, pk)
+    if updated_at is None:
+        return None
+    return f'{pk}-{updated_at.timestamp():.6f}-{get_catalog_version()}'
+
+
+def book_last_modified(request, pk):
+    """Last-Modified for a book"""
+    return book_stamp(request, pk)
+
+
+def serialize_book(row):
+    """Finish a values() row for the JSON response"""
+    row['price'] = str(row['price'])
+    row['url'] = reverse('api_book_detail', args=[row['id']])
+    row.pop('search_rank', None)
+    return row
+
+
+@method_decorator(condition(etag_func=catalog_etag, last_modified_func=catalog_last_modified), name='get')
+class BookListAPIView(CatalogQueryMixin, View):
+    """
+    GET /api/books/
+
+    Accepts the same ``query``, ``category``, ``price`` and ``sort_by``
+    parameters as the catalog page, plus ``page_size`` and the opaque
+    ``cursor`` returned as ``next``.
+    """
+
+    def get(self, request):
+        try:
+            page_size = min(int(request.GET.get('page_size', DEFAULT_PAGE_SIZE)), MAX_PAGE_SIZE)
+        except ValueError:
+            page_size = DEFAULT_PAGE_SIZE
+        page_size = max(page_size, 1)
+
+        queryset = self.get_catalog_queryset()
+        fields = LIST_FIELDS
+        if self.get_sort_by() == 'relevance':
+            fields += ('search_rank',)
+        queryset = queryset.values(*fields, category_slug=F('category__slug'))
+
+        paginator = KeysetPaginator(queryset, page_size, self.get_ordering())
+        page = paginator.get_page(request.GET.get('cursor'))
+        next_cursor = paginator.next_cursor(page)
+
+        params = request.GET.copy()
+        params.pop('cursor', None)
+        next_url = None
+        if next_cursor:
+            params['cursor'] = next_cursor
+            next_url = f"{request.path}?{params.urlencode()}"
+
+        return JsonResponse({
+            'results': [serialize_book(row) for row in page],
+            'next': next_url,
+        })
+
+
+@method_decorator(condition(etag_func=book_etag, last_modified_func=book_last_modified), name='get')
+class BookDetailAPIView(View):
+    """
+    GET /api/books/<id>/
+    """
+
+    def get(self, request, pk):
+        row = Book.objects.filter(pk=pk).values(
+            *DETAIL_FIELDS, category_slug=F('category__slug')
+        ).first()
+        if row is None:
+            raise Http404('Book not found')
+        return JsonResponse(serialize_book(row))
+
+
+def serialize_cart(lines):
+    """JSON body describing the cart's lines and total"""
+    items = [
+        {
+            'book_id': line.book_id,
+            'title': line.book.title,
+            'price': str(line.book.price),
+            'quantity': line.quantity,
+            'stock_quantity': line.book.stock_quantity,
+            'line_total': str(line.total_price),
+        }
+        for line in lines
+    ]
+    return {
+        'items': items,
+        'count': len(items),
+        'total': str(sum((line.total_price for line in lines), Decimal('0.00'))),
+    }
+
+
+class CartAPIView(View):
+    """
+    GET /api/cart/
+
+    Returns the cart. POST a batch of changes to update it::
+
+        {"items": [{"book_id": 12, "quantity": 2}, {"book_id": 7, "quantity": 0}]}
+
+    A quantity of 0 removes the line. Either every change is applied
+    and the updated cart is returned, or none is and the response is a
+    400 with an ``errors`` list.
+    """
+
+    def get(self, request):
+        return JsonResponse(serialize_cart(get_cart_lines(request)))
+
+    def post(self, request):
+        try:
+            payload = json.loads(request.body)
+            changes = {
+                int(item['book_id']): int(item['quantity'])
+                for item in payload['items']
+            }
+        except (ValueError, TypeError, KeyError):
+            return JsonResponse(
+                {'errors': [{'book_id': None, 'error': 'Expected {"items": [{"book_id", "quantity"}, ...]}.'}]},
+                status=400
+            )
+
+        errors = apply_cart_changes(request, changes)
+        if errors:
+            return JsonResponse({'errors': errors}, status=400)
+        return JsonResponse(serialize_cart(get_cart_lines(request)))
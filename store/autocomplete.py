@@ -0,0 +1,332 @@
+"""
+In-memory token indexes for autocomplete and fuzzy search.
+
+Every worker process keeps a trie over the normalized title and author
+tokens of all books, so autocomplete lookups never touch the database.
+Alongside the trie it keeps a trigram inverted index over the same
+token vocabulary, used for typo-tolerant matching. Book changes bump a
+version stamp in the shared cache together with a short change log,
+which lets other workers replay just the changed books instead of
+reloading the whole catalog.
+"""
+
+import heapq
+import threading
+import time
+from collections import Counter, defaultdict
+
+from django.core.cache import cache
+
+from .caching import bump_version, get_version
+from .models import Book
+from .search import normalize_terms
+
+
+VERSION_CACHE_KEY = 'autocomplete:version'
+CHANGE_CACHE_KEY = 'autocomplete:change:{}'
+CHANGE_LOG_TIMEOUT = 60 * 60  # 1 hour
+MAX_REPLAY = 500
+VERSION_CHECK_INTERVAL = 1.0  # seconds
+RESULT_LIMIT = 10
+
+# Minimum trigram similarity for a fuzzy token match (same scale as pg_trgm)
+FUZZY_THRESHOLD = 0.25
+FUZZY_MIN_TERM_LENGTH = 3
+FUZZY_LIMIT = 200
+
+BOOK_FIELDS = ('id', 'title', 'author', 'price', 'stock_quantity', 'is_featured')
+
+
+def trigrams(token):
+    """Return the pg_trgm-style padded trigrams of a token"""
+    padded = f'  {token} '
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class TrieNode:
+    """A single node of the prefix trie"""
+
+    __slots__ = ('children', 'title_ids', 'author_ids', 'cached')
+
+    def __init__(self):
+        self.children = {}
+        # Books with a title/author token ending exactly at this node
+        self.title_ids = set()
+        self.author_ids = set()
+        # Lazily computed (title_ids, author_ids, top_results) for the subtree
+        self.cached = None
+
+
+class PrefixIndex:
+    """
+    Per-process prefix trie over book title and author tokens.
+
+    Results for a single-term prefix are ranked once and cached on the
+    trie node, so repeated keystrokes cost a dictionary walk. Changing
+    a book only clears the cached results along its own token paths.
+    """
+
+    def __init__(self):
+        self.root = TrieNode()
+        self.books = {}
+        self.tokens = {}
+        self.gram_tokens = defaultdict(set)
+        self.version = None
+        self.checked_at = 0.0
+        self.lock = threading.RLock()
+
+    # Index maintenance
+
+    def clear(self):
+        """Drop every book from the index"""
+        self.root = TrieNode()
+        self.books = {}
+        self.tokens = {}
+        self.gram_tokens = defaultdict(set)
+
+    def add(self, data):
+        """Add or replace a book from a values() row"""
+        book_id = data['id']
+        self.remove(book_id)
+
+        title_tokens = set(normalize_terms(data['title']))
+        author_tokens = set(normalize_terms(data['author']))
+
+        self.books[book_id] = {
+            'result': {
+                'id': book_id,
+                'title': data['title'],
+                'author': data['author'],
+                'price': str(data['price']),
+            },
+            # In-stock and featured books first, then shorter titles
+            'rank': (
+                data['stock_quantity'] <= 0,
+                not data['is_featured'],
+                len(data['title']),
+                data['title'].lower(),
+                book_id,
+            ),
+        }
+        self.tokens[book_id] = (title_tokens, author_tokens)
+
+        for token in title_tokens | author_tokens:
+            node = self._node_for(token, create=True)
+            if not node.title_ids and not node.author_ids:
+                # First book using this token: add it to the trigram index
+                for gram in trigrams(token):
+                    self.gram_tokens[gram].add(token)
+            if token in title_tokens:
+                node.title_ids.add(book_id)
+            if token in author_tokens:
+                node.author_ids.add(book_id)
+
+    def remove(self, book_id):
+        """Remove a book if it is indexed"""
+        if book_id not in self.books:
+            return
+
+        title_tokens, author_tokens = self.tokens.pop(book_id)
+        del self.books[book_id]
+
+        for token in title_tokens | author_tokens:
+            node = self._node_for(token, create=True)
+            node.title_ids.discard(book_id)
+            node.author_ids.discard(book_id)
+            if not node.title_ids and not node.author_ids:
+                # Last book using this token: drop it from the trigram index
+                for gram in trigrams(token):
+                    self.gram_tokens[gram].discard(token)
+
+    def _node_for(self, token, create=False):
+        """
+        Walk to the node for a token.
+
+        When creating, cached results along the path are invalidated
+        because the caller is about to change the subtree.
+        """
+        node = self.root
+        if create:
+            node.cached = None
+        for char in token:
+            child = node.children.get(char)
+            if child is None:
+                if not create:
+                    return None
+                child = node.children[char] = TrieNode()
+            node = child
+            if create:
+                node.cached = None
+        return node
+
+    # Lookups
+
+    def _subtree(self, node):
+        """Return (title_ids, author_ids, top_results) for a node"""
+        if node.cached is None:
+            title_ids = set()
+            author_ids = set()
+            stack = [node]
+            while stack:
+                current = stack.pop()
+                title_ids |= current.title_ids
+                author_ids |= current.author_ids
+                stack.extend(current.children.values())
+
+            candidates = title_ids | author_ids
+            top = heapq.nsmallest(
+                RESULT_LIMIT,
+                candidates,
+                key=lambda book_id: (book_id not in title_ids, self.books[book_id]['rank'])
+            )
+            node.cached = (title_ids, author_ids, [self.books[i]['result'] for i in top])
+        return node.cached
+
+    def lookup(self, query, limit=RESULT_LIMIT):
+        """Return up to ``limit`` ranked matches for a query"""
+        self.ensure_fresh()
+        terms = normalize_terms(query)
+        if not terms:
+            return []
+
+        with self.lock:
+            subtrees = []
+            for term in terms:
+                node = self._node_for(term)
+                if node is None:
+                    return []
+                subtrees.append(self._subtree(node))
+
+            if len(subtrees) == 1:
+                return subtrees[0][2][:limit]
+
+            # Every term must prefix-match a title or author token
+            candidates = set.intersection(*(title | author for title, author, _ in subtrees))
+            top = heapq.nsmallest(
+                limit,
+                candidates,
+                key=lambda book_id: (
+                    -sum(book_id in title for title, _, _ in subtrees),
+                    self.books[book_id]['rank'],
+                )
+            )
+            return [self.books[book_id]['result'] for book_id in top]
+
+    def fuzzy_matches(self, query, limit=FUZZY_LIMIT):
+        """
+        Return up to ``limit`` ``(book_id, similarity)`` pairs for a query.
+
+        Each query term is matched against the token vocabulary by
+        trigram Jaccard similarity, so the work depends on the number of
+        distinct words in the catalog rather than the number of books.
+        A book's score is the average of its best match per term.
+        """
+        self.ensure_fresh()
+        terms = [
+            term for term in normalize_terms(query)
+            if len(term) >= FUZZY_MIN_TERM_LENGTH
+        ]
+        if not terms:
+            return []
+
+        scores = defaultdict(float)
+        with self.lock:
+            for term in terms:
+                grams = trigrams(term)
+                shared = Counter()
+                for gram in grams:
+                    shared.update(self.gram_tokens.get(gram, ()))
+
+                best = {}
+                for token, common in shared.items():
+                    similarity = common / (len(grams) + len(trigrams(token)) - common)
+                    if similarity < FUZZY_THRESHOLD:
+                        continue
+                    node = self._node_for(token)
+                    for book_id in node.title_ids | node.author_ids:
+                        if similarity > best.get(book_id, 0):
+                            best[book_id] = similarity
+
+                for book_id, similarity in best.items():
+                    scores[book_id] += similarity / len(terms)
+
+        return heapq.nlargest(limit, scores.items(), key=lambda item: (item[1], -item[0]))
+
+    def fuzzy_lookup(self, query, limit=RESULT_LIMIT):
+        """Autocomplete-style results for a possibly misspelled query"""
+        matches = self.fuzzy_matches(query, limit)
+        return [self.books[book_id]['result'] for book_id, _ in matches if book_id in self.books]
+
+    # Cross-worker synchronisation
+
+    def rebuild(self):
+        """Reload the whole index from the database"""
+        with self.lock:
+            self.clear()
+            for data in Book.objects.values(*BOOK_FIELDS).iterator(chunk_size=2000):
+                self.add(data)
+
+    def apply_changes(self, book_ids):
+        """Reload a set of changed books from the database"""
+        with self.lock:
+            rows = Book.objects.filter(id__in=book_ids).values(*BOOK_FIELDS)
+            found = set()
+            for data in rows:
+                self.add(data)
+                found.add(data['id'])
+            for book_id in set(book_ids) - found:
+                self.remove(book_id)
+
+    def ensure_fresh(self):
+        """Catch up with the shared version stamp if it has moved"""
+        now = time.monotonic()
+        if self.version is not None and now - self.checked_at < VERSION_CHECK_INTERVAL:
+            return
+
+        with self.lock:
+            self.checked_at = now
+            shared_version = get_shared_version()
+            if shared_version == self.version:
+                return
+
+            if self.version is not None and 0 < shared_version - self.version <= MAX_REPLAY:
+                keys = [
+                    CHANGE_CACHE_KEY.format(version)
+                    for version in range(self.version + 1, shared_version + 1)
+                ]
+                changes = cache.get_many(keys)
+                if len(changes) == len(keys):
+                    self.apply_changes(set(changes.values()))
+                    self.version = shared_version
+                    return
+
+            self.rebuild()
+            self.version = shared_version
+
+
+def get_shared_version():
+    """Return the autocomplete version stamp shared by all workers"""
+    return get_version(VERSION_CACHE_KEY)
+
+
+def publish_book_change(book_id):
+    """Record a changed book so every worker's index picks it up"""
+    version = bump_version(VERSION_CACHE_KEY)
+    cache.set(CHANGE_CACHE_KEY.format(version), book_id, CHANGE_LOG_TIMEOUT)
+
+    # Make this worker notice its own change on the next lookup
+    prefix_index.checked_at = 0.0
+
+
+def publish_full_reload():
+    """
+    Make every worker reload its whole index.
+
+    Used after bulk changes that bypass model signals: bumping the
+    version without a change log entry forces a full rebuild.
+    """
+    bump_version(VERSION_CACHE_KEY)
+    prefix_index.checked_at = 0.0
+
+
+prefix_index = PrefixIndex()
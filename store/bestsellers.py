@@ -0,0 +1,205 @@
+"""
+Incrementally maintained sales counters for the bestseller shelves.
+
+Checkout adds each sold book to its BookSales counters and to the
+BookSalesDay bucket for today, in the same transaction as the order.
+Once a day the rolling 7- and 30-day windows are recomputed from the
+day buckets, which also drops expired sales out of the windows, so
+bestseller shelves never aggregate OrderItem.
+"""
+
+from collections import defaultdict
+from datetime import timedelta
+
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import F, OuterRef, Q, Subquery, Sum
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from .models import BookSales, BookSalesDay, OrderItem
+from .reservations import per_book
+
+
+# Window name -> BookSales counter field
+WINDOWS = {
+    '7d': 'quantity_7d',
+    '30d': 'quantity_30d',
+    'all': 'quantity_total',
+}
+
+# Window name -> shelf heading, e.g. "Bestsellers This Week"
+WINDOW_LABELS = {
+    '7d': 'This Week',
+    '30d': 'This Month',
+    'all': 'of All Time',
+}
+
+KEEP_DAYS = 30
+ROLLED_ON_KEY = 'bestsellers:rolled_on'
+ROLL_LOCK_TIMEOUT = 60 * 5
+
+
+def record_sales(items, day=None):
+    """
+    Add sold copies to the counters.
+
+    ``items`` is an iterable of ``(book_id, quantity)`` pairs. Call this
+    inside the transaction that creates the order. Missing counter rows
+    are created first, then each table gets one UPDATE, so the number of
+    queries does not depend on the number of books.
+    """
+    day = day or timezone.localdate()
+    quantities = defaultdict(int)
+    for book_id, quantity in items:
+        quantities[book_id] += quantity
+    if not quantities:
+        return
+
+    # Checkout holds the books' row locks (in id order), so concurrent
+    # orders of the same books reach these rows one at a time
+    book_ids = sorted(quantities)
+    BookSalesDay.objects.bulk_create(
+        [BookSalesDay(book_id=book_id, day=day) for book_id in book_ids],
+        ignore_conflicts=True,
+    )
+    BookSales.objects.bulk_create(
+        [BookSales(book_id=book_id) for book_id in book_ids],
+        ignore_conflicts=True,
+    )
+
+    sold = per_book(quantities)
+    BookSalesDay.objects.filter(book_id__in=book_ids, day=day).update(
+        quantity=F('quantity') + sold
+    )
+    BookSales.objects.filter(book_id__in=book_ids).update(
+        quantity_7d=F('quantity_7d') + sold,
+        quantity_30d=F('quantity_30d') + sold,
+        quantity_total=F('quantity_total') + sold,
+    )
+
+
+def window_total(today, days):
+    """Subquery summing a book's day buckets over the last ``days`` days"""
+    return Coalesce(
+        Subquery(
+            BookSalesDay.objects.filter(
+                book_id=OuterRef('book_id'),
+                day__gt=today - timedelta(days=days)
+            ).values('book_id').annotate(total=Sum('quantity')).values('total')
+        ),
+        0
+    )
+
+
+def roll_windows(today=None):
+    """
+    Recompute the 7- and 30-day counters from the day buckets.
+
+    Only books with a non-zero window can change, so the update stays
+    proportional to the number of recently sold books.
+    """
+    today = today or timezone.localdate()
+    with transaction.atomic():
+        BookSalesDay.objects.filter(day__lte=today - timedelta(days=KEEP_DAYS)).delete()
+        BookSales.objects.filter(
+            Q(quantity_7d__gt=0) | Q(quantity_30d__gt=0)
+        ).update(
+            quantity_7d=window_total(today, 7),
+            quantity_30d=window_total(today, 30),
+        )
+
+
+def ensure_windows_current():
+    """Roll the windows once per day (one worker at a time)"""
+    today = timezone.localdate().isoformat()
+    if cache.get(ROLLED_ON_KEY) == today:
+        return
+
+    lock_key = f'{ROLLED_ON_KEY}:lock'
+    if not cache.add(lock_key, True, ROLL_LOCK_TIMEOUT):
+        return
+    try:
+        roll_windows()
+        cache.set(ROLLED_ON_KEY, today, 60 * 60 * 48)
+    finally:
+        cache.delete(lock_key)
+
+
+def top_books(window='7d', limit=10):
+    """Return the best selling in-stock books for a window"""
+    field = WINDOWS[window]
+    rows = BookSales.objects.filter(
+        **{f'{field}__gt': 0},
+        book__stock_quantity__gt=0
+    ).select_related('book').order_by(f'-{field}', 'book')[:limit]
+    return [row.book for row in rows]
+
+
+def backfill_sales(chunk_size=5000, stdout=None):
+    """
+    Rebuild all sales counters from existing OrderItem rows.
+
+    Order items are read in primary key chunks so memory only grows
+    with the number of distinct books. Cancelled orders are ignored.
+    Run it while checkout is quiet: sales recorded during the backfill
+    are overwritten. Returns a dict of statistics about the run.
+    """
+    today = timezone.localdate()
+    totals = defaultdict(int)
+    days = defaultdict(int)
+
+    items = OrderItem.objects.exclude(order__status='cancelled').order_by('id')
+    last_id = 0
+    read = 0
+    while True:
+        chunk = list(
+            items.filter(id__gt=last_id).values_list(
+                'id', 'book_id', 'quantity', 'order__created_at'
+            )[:chunk_size]
+        )
+        if not chunk:
+            break
+
+        for item_id, book_id, quantity, created_at in chunk:
+            totals[book_id] += quantity
+            day = timezone.localdate(created_at)
+            if day > today - timedelta(days=KEEP_DAYS):
+                days[(book_id, day)] += quantity
+
+        last_id = chunk[-1][0]
+        read += len(chunk)
+        if stdout:
+            stdout.write(f'  ...{read} order items read')
+
+    windows = defaultdict(lambda: [0, 0])
+    for (book_id, day), quantity in days.items():
+        if day > today - timedelta(days=7):
+            windows[book_id][0] += quantity
+        windows[book_id][1] += quantity
+
+    with transaction.atomic():
+        BookSalesDay.objects.all().delete()
+        BookSales.objects.all().delete()
+        BookSalesDay.objects.bulk_create(
+            (
+                BookSalesDay(book_id=book_id, day=day, quantity=quantity)
+                for (book_id, day), quantity in days.items()
+            ),
+            batch_size=1000,
+        )
+        BookSales.objects.bulk_create(
+            (
+                BookSales(
+                    book_id=book_id,
+                    quantity_7d=windows.get(book_id, (0, 0))[0],
+                    quantity_30d=windows.get(book_id, (0, 0))[1],
+                    quantity_total=total,
+                )
+                for book_id, total in totals.items()
+            ),
+            batch_size=1000,
+        )
+
+    cache.set(ROLLED_ON_KEY, today.isoformat(), 60 * 60 * 48)
+    return {'order_items': read, 'books': len(totals), 'day_buckets': len(days)}
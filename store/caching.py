@@ -0,0 +1,126 @@
+"""
+Shared cache helpers for the store app.
+
+Cached catalog data is invalidated with version stamps rather than by
+deleting keys: every cache key embeds the current version, and Book
+writes bump the version so stale entries are simply never read again
+and age out through their timeout.
+
+Expensive entries are regenerated by a single worker at a time: the
+first worker to miss takes a short-lived lock, and the others serve the
+previous version of the entry (or wait briefly) instead of all running
+the same queries at once.
+"""
+
+import time
+
+from django.core.cache import cache
+
+
+CATALOG_VERSION_KEY = 'catalog:version'
+CATALOG_MODIFIED_KEY = 'catalog:modified'
+
+# Stampede protection for get_or_build()
+BUILD_LOCK_TIMEOUT = 30  # seconds; a crashed builder never blocks for longer
+BUILD_WAIT = 2.0  # seconds a worker waits for another worker's build
+BUILD_POLL_INTERVAL = 0.05
+STALE_TIMEOUT = 60 * 60 * 24  # keep the previous value around for a day
+
+
+def initial_version():
+    """
+    Seed value for a version stamp.
+
+    Seeding from the clock means an evicted stamp never comes back with
+    a value some worker already holds.
+    """
+    return int(time.time() * 1000)
+
+
+def get_version(key):
+    """Return the version stamp stored under ``key``"""
+    cache.add(key, initial_version(), timeout=None)
+    return cache.get(key) or initial_version()
+
+
+def bump_version(key):
+    """Increment the version stamp stored under ``key``"""
+    cache.add(key, initial_version(), timeout=None)
+    try:
+        return cache.incr(key)
+    except ValueError:
+        # The stamp was evicted between add() and incr()
+        version = initial_version()
+        cache.set(key, version, timeout=None)
+        return version
+
+
+def get_catalog_version():
+    """Return the version stamp for cached catalog data"""
+    return get_version(CATALOG_VERSION_KEY)
+
+
+def bump_catalog_version():
+    """Invalidate all cached catalog data"""
+    cache.set(CATALOG_MODIFIED_KEY, time.time(), timeout=None)
+    return bump_version(CATALOG_VERSION_KEY)
+
+
+def get_catalog_modified():
+    """
+    Return the Unix time of the last catalog change, or None if unknown
+    (the stamp is only recorded by bump_catalog_version).
+    """
+    return cache.get(CATALOG_MODIFIED_KEY)
+
+
+def set_catalog_modified(timestamp):
+    """Seed the last-change time unless another worker already has"""
+    cache.add(CATALOG_MODIFIED_KEY, timestamp, timeout=None)
+
+
+def catalog_cache_key(*parts):
+    """Build a cache key that is tied to the current catalog version"""
+    return ':'.join(['catalog', str(get_catalog_version()), *map(str, parts)])
+
+
+def get_or_build(name, build, timeout):
+    """
+    Return the cached catalog entry ``name``, building it on a miss.
+
+    The entry is stored under a versioned key (see catalog_cache_key)
+    and, as a fallback, under an unversioned "stale" key. Only the
+    worker holding the build lock calls ``build``; the rest return the
+    stale value if there is one, otherwise wait up to BUILD_WAIT for the
+    fresh value before giving up and building it themselves.
+    """
+    key = catalog_cache_key(name)
+    value = cache.get(key)
+    if value is not None:
+        return value
+
+    stale_key = f'catalog:stale:{name}'
+    lock_key = f'{key}:lock'
+
+    if cache.add(lock_key, True, BUILD_LOCK_TIMEOUT):
+        try:
+            value = build()
+            cache.set(key, value, timeout)
+            cache.set(stale_key, value, STALE_TIMEOUT)
+        finally:
+            cache.delete(lock_key)
+        return value
+
+    stale = cache.get(stale_key)
+    if stale is not None:
+        return stale
+
+    deadline = time.monotonic() + BUILD_WAIT
+    while time.monotonic() < deadline:
+        time.sleep(BUILD_POLL_INTERVAL)
+        value = cache.get(key)
+        if value is not None:
+            return value
+
+    # The builder is slow or died; don't keep the request waiting
+    return build()
@@ -0,0 +1,367 @@
+"""
+Shopping cart helpers.
+
+The navigation bar shows how many items are in the user's cart on every
+page. That count is kept in a per-user cache entry, so rendering the
+badge costs no query once the entry is warm. Cart writes delete the
+entry once they commit (see store.signals) and the next read recounts.
+
+Visitors who are not logged in get an AnonymousCart kept in a signed
+cookie, so anonymous browsing and cart changes never write to the
+database. When the visitor logs in, the cookie cart is merged into
+their CartItem rows with a single bulk upsert.
+
+Adding a book to a logged-in user's cart increments the line with a
+single INSERT ... ON CONFLICT DO UPDATE that checks stock in the same
+statement (see add_cart_quantity()), so two tabs adding the same book
+at once can't lose an update or oversell. Logged-in carts also hold
+their copies for a while (see store.reservations): the hold is set in
+the same transaction, with a fixed number of statements, and a cart
+change that can't be held is rolled back.
+
+Quantity changes to several lines are applied as one batch by
+apply_cart_changes(): one query checks stock for every book, and one
+upsert (plus one delete for removed lines) writes them, however many
+lines change.
+"""
+
+import json
+
+from django.conf import settings
+from django.core import signing
+from django.core.cache import cache
+from django.db import connection, transaction
+from django.db.models import OuterRef, Subquery
+from django.utils import timezone
+
+from .models import Book, CartItem, StockReservation
+from .reservations import (
+    InsufficientStock, available_for_user, set_holds, with_available_stock,
+)
+
+
+CART_COUNT_TIMEOUT = 60 * 60 * 24  # 1 day
+
+ANONYMOUS_CART_COOKIE = 'cart'
+ANONYMOUS_CART_SALT = 'store.cart'
+ANONYMOUS_CART_MAX_AGE = 60 * 60 * 24 * 30  # 30 days
+MAX_ANONYMOUS_CART_ITEMS = 50  # keeps the cookie well under 4 KB
+MAX_CART_CHANGES = 100  # per apply_cart_changes() call
+
+
+def cart_count_key(user_id):
+    return f'cart:count:{user_id}'
+
+
+def get_cart_count(user_id):
+    """Return the number of items in a user's cart"""
+    key = cart_count_key(user_id)
+    count = cache.get(key)
+    if count is None:
+        count = CartItem.objects.filter(user_id=user_id).count()
+        cache.set(key, count, CART_COUNT_TIMEOUT)
+    return count
+
+
+def invalidate_cart_count(user_id):
+    """Forget a user's cached cart count"""
+    cache.delete(cart_count_key(user_id))
+
+
+def add_cart_quantity(user_id, book_id, quantity):
+    """
+    Atomically add ``quantity`` copies of a book to a user's cart.
+
+    Inserts the line or increments the existing one in one statement,
+    and only if the book has enough stock for the resulting quantity,
+    then extends the user's stock hold to the new quantity. Returns the
+    line's new quantity, or None if the book does not exist or the
+    stock check or hold failed (nothing is written then).
+
+    Runs as raw SQL because the ORM's upsert can't express
+    ``quantity = quantity + n``; the syntax is shared by PostgreSQL and
+    SQLite (3.35+ for RETURNING).
+    """
+    try:
+        with transaction.atomic():
+            row = upsert_cart_line(user_id, book_id, quantity)
+            if row is not None and set_holds(user_id, {book_id: row[0]}):
+                raise InsufficientStock
+    except InsufficientStock:
+        return None
+
+    if row is not None and row[0] == quantity:
+        # A new line; raw SQL bypasses the CartItem signals
+        transaction.on_commit(lambda: invalidate_cart_count(user_id))
+
+    return row[0] if row else None
+
+
+def upsert_cart_line(user_id, book_id, quantity):
+    """Run add_cart_quantity()'s upsert; returns the RETURNING row"""
+    qn = connection.ops.quote_name
+    cart_table = qn(CartItem._meta.db_table)
+    book_table = qn(Book._meta.db_table)
+
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"""
+            INSERT INTO {cart_table} (user_id, book_id, quantity, created_at)
+            SELECT %s, id, %s, %s FROM {book_table}
+            WHERE id = %s AND stock_quantity >= %s
+            ON CONFLICT (user_id, book_id) DO UPDATE
+            SET quantity = {cart_table}.quantity + excluded.quantity
+            WHERE {cart_table}.quantity + excluded.quantity <= (
+                SELECT stock_quantity FROM {book_table} WHERE id = excluded.book_id
+            )
+            RETURNING quantity
+            """,
+            [user_id, quantity, connection.ops.adapt_datetimefield_value(timezone.now()),
+             book_id, quantity]
+        )
+        return cursor.fetchone()
+
+
+class AnonymousCartLine:
+    """A cookie cart entry shaped like CartItem for the cart template"""
+
+    def __init__(self, book, quantity):
+        self.id = book.pk
+        self.book = book
+        self.book_id = book.pk
+        self.quantity = quantity
+
+    @property
+    def total_price(self):
+        return self.book.price * self.quantity
+
+
+class AnonymousCart:
+    """
+    Cart of a visitor who is not logged in, stored in a signed cookie.
+
+    Maps book ids to quantities. Changes are written back to the cookie
+    by AnonymousCartMiddleware.
+    """
+
+    def __init__(self, request):
+        self.quantities = {}
+        self.modified = False
+        try:
+            data = json.loads(request.get_signed_cookie(
+                ANONYMOUS_CART_COOKIE, default='{}',
+                salt=ANONYMOUS_CART_SALT, max_age=ANONYMOUS_CART_MAX_AGE
+            ))
+            for book_id, quantity in list(data.items())[:MAX_ANONYMOUS_CART_ITEMS]:
+                if int(quantity) > 0:
+                    self.quantities[int(book_id)] = int(quantity)
+        except (signing.BadSignature, ValueError, TypeError, AttributeError):
+            # Tampered with or malformed: start with an empty cart
+            self.quantities = {}
+            self.modified = True
+
+    def __len__(self):
+        return len(self.quantities)
+
+    def __bool__(self):
+        return bool(self.quantities)
+
+    def quantity(self, book_id):
+        return self.quantities.get(book_id, 0)
+
+    def set(self, book_id, quantity):
+        """Set a book's quantity; returns False if the cart is full"""
+        if quantity <= 0:
+            self.remove(book_id)
+            return True
+        if book_id not in self.quantities and len(self.quantities) >= MAX_ANONYMOUS_CART_ITEMS:
+            return False
+        self.quantities[book_id] = quantity
+        self.modified = True
+        return True
+
+    def remove(self, book_id):
+        if self.quantities.pop(book_id, None) is not None:
+            self.modified = True
+
+    def clear(self):
+        if self.quantities:
+            self.quantities = {}
+            self.modified = True
+
+    def lines(self):
+        """Return the cart's books as CartItem-like lines (one query)"""
+        books = Book.objects.in_bulk(list(self.quantities))
+        return [
+            AnonymousCartLine(books[book_id], quantity)
+            for book_id, quantity in self.quantities.items()
+            if book_id in books
+        ]
+
+    def save(self, response):
+        """Write the cart back to its cookie if it changed"""
+        if not self.modified:
+            return
+        if self.quantities:
+            response.set_signed_cookie(
+                ANONYMOUS_CART_COOKIE,
+                json.dumps({str(book_id): quantity for book_id, quantity in self.quantities.items()}),
+                salt=ANONYMOUS_CART_SALT,
+                max_age=ANONYMOUS_CART_MAX_AGE,
+                secure=settings.SESSION_COOKIE_SECURE,
+                httponly=True,
+                samesite='Lax',
+            )
+        else:
+            response.delete_cookie(ANONYMOUS_CART_COOKIE, samesite='Lax')
+
+
+def get_anonymous_cart(request):
+    """Return the request's cookie cart, loading it once per request"""
+    if not hasattr(request, '_anonymous_cart'):
+        request._anonymous_cart = AnonymousCart(request)
+    return request._anonymous_cart
+
+
+def merge_anonymous_cart(user, cart):
+    """
+    Move a cookie cart into the user's CartItem rows.
+
+    Quantities are added to any the user already has, capped at the
+    copies the user can hold, and the merged lines are held. One query
+    reads availability and current quantities and one bulk upsert
+    writes the result.
+    """
+    if not cart:
+        return
+
+    rows = with_available_stock(Book.objects.filter(id__in=list(cart.quantities))).annotate(
+        in_cart=Subquery(
+            CartItem.objects.filter(user=user, book=OuterRef('pk')).values('quantity')[:1]
+        ),
+        held=Subquery(
+            StockReservation.objects.filter(user=user, book=OuterRef('pk')).values('quantity')[:1]
+        ),
+    ).values_list('id', 'available_quantity', 'in_cart', 'held')
+
+    items = [
+        CartItem(
+            user=user,
+            book_id=book_id,
+            quantity=min((in_cart or 0) + cart.quantity(book_id), available + (held or 0)),
+        )
+        for book_id, available, in_cart, held in rows
+    ]
+    items = [item for item in items if item.quantity > 0]
+    if items:
+        with transaction.atomic():
+            CartItem.objects.bulk_create(
+                items,
+                update_conflicts=True,
+                unique_fields=['user', 'book'],
+                update_fields=['quantity'],
+            )
+            # Best effort: a book taken meanwhile is caught at checkout
+            set_holds(user.pk, {item.book_id: item.quantity for item in items})
+            # bulk_create bypasses the CartItem signals
+            transaction.on_commit(lambda: invalidate_cart_count(user.pk))
+
+    cart.clear()
+
+
+def get_cart_lines(request):
+    """Return the request's cart lines: CartItem rows or cookie cart lines"""
+    if request.user.is_authenticated:
+        return list(CartItem.objects.filter(user=request.user).select_related('book'))
+    return get_anonymous_cart(request).lines()
+
+
+def apply_cart_changes(request, changes):
+    """
+    Set the quantities of several cart lines at once.
+
+    ``changes`` maps book ids to new quantities; 0 removes the line.
+    Stock is checked for all books with one query (for logged-in users,
+    net of other carts' holds). If any change is invalid nothing is
+    applied, and a list of ``{'book_id', 'error'}`` dicts is returned;
+    an empty list means every change was applied.
+    """
+    if not changes:
+        return []
+    if len(changes) > MAX_CART_CHANGES:
+        return [{'book_id': None, 'error': f'At most {MAX_CART_CHANGES} changes per request.'}]
+
+    if request.user.is_authenticated:
+        stock = available_for_user(request.user.pk, changes)
+    else:
+        stock = dict(Book.objects.filter(id__in=list(changes)).values_list('id', 'stock_quantity'))
+    errors = []
+    for book_id, quantity in changes.items():
+        if quantity < 0:
+            errors.append({'book_id': book_id, 'error': 'Quantity cannot be negative.'})
+        elif quantity == 0:
+            continue
+        elif book_id not in stock:
+            errors.append({'book_id': book_id, 'error': 'Book not found.'})
+        elif quantity > stock[book_id]:
+            errors.append({
+                'book_id': book_id,
+                'error': f'Only {stock[book_id]} copies available.',
+            })
+
+    if not request.user.is_authenticated:
+        cart = get_anonymous_cart(request)
+        kept = {book_id for book_id in cart.quantities if changes.get(book_id, 1) > 0}
+        kept.update(book_id for book_id, quantity in changes.items() if quantity > 0)
+        if len(kept) > MAX_ANONYMOUS_CART_ITEMS:
+            errors.append({'book_id': None, 'error': 'Your cart is full. Please log in to add more books.'})
+
+    if errors:
+        return errors
+
+    if request.user.is_authenticated:
+        short = update_cart_items(request.user, changes)
+        return [
+            {'book_id': book_id, 'error': 'Not enough copies available.'}
+            for book_id in short
+        ]
+
+    for book_id, quantity in changes.items():
+        cart.set(book_id, quantity)
+    return []
+
+
+def update_cart_items(user, changes):
+    """
+    Write validated quantity changes with one upsert and one delete.
+
+    The user's holds follow the new quantities. If another cart took the
+    stock since validation nothing is written, and the ids of the books
+    that are short are returned.
+    """
+    items = [
+        CartItem(user=user, book_id=book_id, quantity=quantity)
+        for book_id, quantity in changes.items() if quantity > 0
+    ]
+    removed = [book_id for book_id, quantity in changes.items() if quantity == 0]
+
+    short = []
+    try:
+        with transaction.atomic():
+            short = set_holds(user.pk, changes)
+            if short:
+                raise InsufficientStock
+            if items:
+                CartItem.objects.bulk_create(
+                    items,
+                    update_conflicts=True,
+                    unique_fields=['user', 'book'],
+                    update_fields=['quantity'],
+                )
+            if removed:
+                CartItem.objects.filter(user=user, book_id__in=removed).delete()
+            # bulk_create bypasses the CartItem signals
+            transaction.on_commit(lambda: invalidate_cart_count(user.pk))
+    except InsufficientStock:
+        pass
+    return short
@@ -0,0 +1,210 @@
+"""
+Bulk catalog import for supplier feeds.
+
+Records are streamed from CSV or JSON Lines files one at a time, so
+memory use does not depend on the size of the feed. They are upserted
+by ISBN in batches, each batch in its own transaction, and a checkpoint
+file records how far the import got so an interrupted run can resume.
+
+Bulk writes bypass Book signals, so after an import the derived data
+(search index, autocomplete, facet counts, catalog caches) has to be
+refreshed with refresh_derived_data().
+"""
+
+import csv
+import json
+import os
+from decimal import Decimal, InvalidOperation
+
+from django.db import transaction
+from django.utils.text import slugify
+
+from .autocomplete import publish_full_reload
+from .caching import bump_catalog_version
+from .facets import rebuild_facets
+from .models import Book, Category
+from .search import get_search_backend
+
+
+# Columns written on every upsert (never created_at or the rating aggregates)
+UPSERT_FIELDS = [
+    'title', 'author', 'description', 'price', 'stock_quantity',
+    'category', 'is_featured', 'updated_at',
+]
+
+ISBN_LENGTHS = (10, 13)
+
+# Book.price is DecimalField(max_digits=10, decimal_places=2)
+MAX_PRICE = Decimal('99999999.99')
+MAX_STOCK_QUANTITY = 2147483647  # PositiveIntegerField on every backend
+
+
+class RecordError(ValueError):
+    """A feed record that cannot be imported"""
+
+
+def detect_format(path):
+    """Guess the feed format from the file extension"""
+    extension = os.path.splitext(path)[1].lower()
+    if extension in ('.jsonl', '.ndjson'):
+        return 'jsonl'
+    return 'csv'
+
+
+def read_records(path, file_format):
+    """
+    Yield feed records as dicts, one at a time.
+
+    A JSONL line that is not a JSON object is yielded as a RecordError
+    instead, so one bad line is rejected like any other invalid record
+    (see parse_record) rather than ending the import.
+    """
+    with open(path, newline='', encoding='utf-8') as handle:
+        if file_format == 'jsonl':
+            for line in handle:
+                line = line.strip()
+                if line:
+                    yield decode_json_record(line)
+        else:
+            yield from csv.DictReader(handle)
+
+
+def decode_json_record(line):
+    """Decode a JSONL line, returning a RecordError if it is not an object"""
+    try:
+        record = json.loads(line)
+    except ValueError as e:
+        return RecordError(f'invalid JSON: {e}')
+    if not isinstance(record, dict):
+        return RecordError(f'expected a JSON object, got {type(record).__name__}')
+    return record
+
+
+class CategoryResolver:
+    """Map category names or slugs from the feed to ids, creating missing ones"""
+
+    def __init__(self):
+        self.ids = {}
+        for category_id, name, slug in Category.objects.values_list('id', 'name', 'slug'):
+            self.ids[slug] = category_id
+            self.ids[slugify(name)] = category_id
+
+    def resolve(self, value):
+        if not value:
+            return None
+        value = str(value)
+        slug = slugify(value)
+        if slug not in self.ids:
+            category, _ = Category.objects.get_or_create(
+                slug=slug, defaults={'name': value.strip()[:100]}
+            )
+            self.ids[slug] = category.id
+        return self.ids[slug]
+
+
+def parse_record(record, categories):
+    """Validate a feed record and turn it into an unsaved Book"""
+    if isinstance(record, RecordError):
+        raise record
+
+    isbn = ''.join(ch for ch in str(record.get('isbn') or '') if ch.isalnum())
+    if len(isbn) not in ISBN_LENGTHS:
+        raise RecordError(f'invalid ISBN {record.get("isbn")!r}')
+
+    title = str(record.get('title') or '').strip()
+    author = str(record.get('author') or '').strip()
+    if not title or not author:
+        raise RecordError(f'{isbn}: title and author are required')
+
+    try:
+        price = Decimal(str(record.get('price'))).quantize(Decimal('0.01'))
+    except (InvalidOperation, TypeError):
+        raise RecordError(f'{isbn}: invalid price {record.get("price")!r}')
+    if not price.is_finite():
+        raise RecordError(f'{isbn}: invalid price {record.get("price")!r}')
+    if price < Decimal('0.01'):
+        raise RecordError(f'{isbn}: price must be positive')
+    if price > MAX_PRICE:
+        raise RecordError(f'{isbn}: price {price} is too large')
+
+    try:
+        stock_quantity = int(record.get('stock_quantity') or 0)
+    except (TypeError, ValueError, OverflowError):
+        raise RecordError(f'{isbn}: invalid stock quantity {record.get("stock_quantity")!r}')
+    if stock_quantity > MAX_STOCK_QUANTITY:
+        raise RecordError(f'{isbn}: stock quantity {stock_quantity} is too large')
+
+    featured = record.get('is_featured')
+    if isinstance(featured, str):
+        featured = featured.strip().lower() in ('1', 'true', 'yes', 'y')
+
+    return Book(
+        isbn=isbn,
+        title=title[:200],
+        author=author[:100],
+        description=str(record.get('description') or '').strip(),
+        price=price,
+        stock_quantity=max(stock_quantity, 0),
+        category_id=categories.resolve(record.get('category')),
+        is_featured=bool(featured),
+    )
+
+
+def upsert_books(books):
+    """Insert or update a batch of books by ISBN in one transaction"""
+    # A feed may repeat an ISBN; the last record wins
+    unique = list({book.isbn: book for book in books}.values())
+    with transaction.atomic():
+        Book.objects.bulk_create(
+            unique,
+            update_conflicts=True,
+            unique_fields=['isbn'],
+            update_fields=UPSERT_FIELDS,
+        )
+    return len(unique)
+
+
+class Checkpoint:
+    """
+    Progress marker for a resumable import.
+
+    Stores the number of feed records already committed, together with
+    the feed's size and modification time so a checkpoint is never
+    applied to a different file.
+    """
+
+    def __init__(self, path, feed_path):
+        self.path = path
+        stat = os.stat(feed_path)
+        self.feed = {'path': os.path.abspath(feed_path), 'size': stat.st_size, 'mtime': stat.st_mtime}
+
+    def load(self):
+        """Return the number of records to skip (0 without a valid checkpoint)"""
+        try:
+            with open(self.path, encoding='utf-8') as handle:
+                data = json.load(handle)
+        except (OSError, ValueError):
+            return 0
+        if data.get('feed') != self.feed:
+            return 0
+        return int(data.get('records', 0))
+
+    def save(self, records):
+        """Atomically record that ``records`` records are committed"""
+        temporary = f'{self.path}.tmp'
+        with open(temporary, 'w', encoding='utf-8') as handle:
+            json.dump({'feed': self.feed, 'records': records}, handle)
+        os.replace(temporary, self.path)
+
+    def clear(self):
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+
+def refresh_derived_data():
+    """Rebuild data that Book signals normally keep in sync"""
+    with transaction.atomic():
+        get_search_backend().rebuild()
+    rebuild_facets()
+    publish_full_reload()
+    bump_catalog_version()
@@ -0,0 +1,144 @@
+"""
+Set-based checkout.
+
+An order is placed with a fixed number of queries however many lines
+the cart has: the books are locked in id order, their stock is
+decremented by one conditional UPDATE per batch of books
+(``stock_quantity = stock_quantity - n WHERE stock_quantity >= n``,
+net of other carts' holds), and the order items are written with one
+bulk_create. If any line is short the UPDATE touches fewer rows than
+expected and the whole order is rolled back.
+
+The stock UPDATE bypasses the Book signals, so sell_stock() moves books
+that sold out into their out-of-stock facet cell, republishes them to
+the autocomplete index and bumps the catalog version itself. Listings
+only show whether a book is in stock, so an order that sells no book
+out leaves the catalog caches alone. The search index does not depend
+on stock and needs no refresh.
+"""
+
+from collections import Counter
+
+from django.db import transaction
+from django.db.models import F, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+from .autocomplete import publish_book_change
+from .bestsellers import record_sales
+from .caching import bump_catalog_version
+from .emails import queue_order_confirmation
+from .facets import adjust_facet, facet_key
+from .models import Book, CartItem, OrderItem, ReservedStock, StockReservation
+from .reservations import available_for_user, per_book, release_holds
+
+
+STOCK_BATCH_SIZE = 500  # books per conditional UPDATE
+
+
+class OutOfStock(Exception):
+    """Raised when a cart line can't be filled; carries the book ids"""
+
+    def __init__(self, book_ids):
+        super().__init__(f'Not enough stock for books {book_ids}')
+        self.book_ids = book_ids
+
+
+def sell_stock(user_id, quantities):
+    """
+    Take ``quantities`` (``{book_id: copies}``) out of stock.
+
+    Copies held by other users' carts can't be sold; the user's own
+    holds can. Call inside a transaction: raises OutOfStock (leaving
+    the caller to roll back) if any book is short.
+    """
+    book_ids = sorted(quantities)
+
+    # Lock in id order so concurrent checkouts can't deadlock
+    list(Book.objects.select_for_update().filter(id__in=book_ids).order_by('id').values_list('id'))
+
+    reserved = Subquery(ReservedStock.objects.filter(book=OuterRef('pk')).values('quantity')[:1])
+    held = Subquery(
+        StockReservation.objects.filter(user_id=user_id, book=OuterRef('pk')).values('quantity')[:1]
+    )
+    for start in range(0, len(book_ids), STOCK_BATCH_SIZE):
+        batch = {book_id: quantities[book_id] for book_id in book_ids[start:start + STOCK_BATCH_SIZE]}
+        sold = per_book(batch, field='id')
+        updated = Book.objects.filter(
+            id__in=list(batch),
+            stock_quantity__gte=sold + Coalesce(reserved, 0) - Coalesce(held, 0),
+        ).update(stock_quantity=F('stock_quantity') - sold)
+        if updated != len(batch):
+            raise OutOfStock(list(batch))
+
+    # Every book was in stock; only those now at zero change facet cell
+    sold_out = list(
+        Book.objects.filter(id__in=book_ids, stock_quantity__lte=0).values_list(
+            'id', 'category_id', 'price'
+        )
+    )
+    moves = Counter()
+    for _, category_id, price in sold_out:
+        moves[facet_key(category_id, price, stock_quantity=1)] -= 1
+        moves[facet_key(category_id, price, stock_quantity=0)] += 1
+    for key, delta in sorted(moves.items(), key=lambda item: repr(item[0])):
+        adjust_facet(key, delta)
+
+    if not sold_out:
+        return
+
+    def publish():
+        for book_id, _, _ in sold_out:
+            publish_book_change(book_id)
+        bump_catalog_version()
+
+    transaction.on_commit(publish)
+
+
+def place_order(order, cart_items):
+    """
+    Save ``order`` with the given cart lines and empty the cart.
+
+    ``order`` is an unsaved Order with its user and shipping details
+    set. Stock, order items, sales counters, the cart and its holds and
+    the confirmation email's outbox row are all written in one
+    transaction; raises OutOfStock, with nothing
+    written, if a line is short. Returns the saved order.
+    """
+    cart_items = list(cart_items)
+    quantities = Counter()
+    for item in cart_items:
+        quantities[item.book_id] += item.quantity
+
+    try:
+        with transaction.atomic():
+            sell_stock(order.user_id, quantities)
+
+            order.total_amount = sum(item.total_price for item in cart_items)
+            order.save()
+            OrderItem.objects.bulk_create([
+                OrderItem(
+                    order=order,
+                    book_id=item.book_id,
+                    quantity=item.quantity,
+                    price=item.book.price,
+                )
+                for item in cart_items
+            ])
+
+            # Count the sale towards the bestseller shelves
+            record_sales(quantities.items())
+
+            # Clear cart and release its holds
+            CartItem.objects.filter(id__in=[item.id for item in cart_items]).delete()
+            release_holds(order.user_id, list(quantities))
+
+            # Sent by the deliver_emails worker once the order commits
+            queue_order_confirmation(order)
+    except OutOfStock:
+        available = available_for_user(order.user_id, quantities)
+        raise OutOfStock([
+            book_id for book_id, quantity in quantities.items()
+            if available.get(book_id, 0) < quantity
+        ])
+
+    return order
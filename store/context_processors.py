@@ -5,7 +5,9 @@ This module contains context processors that add data to all templates
 automatically, such as cart item count and user-specific information.
 """
 
-from .models import CartItem
+from functools import cache
+
+from .cart import get_anonymous_cart, get_cart_count
 
 
 def cart_item_count(request):
@@ -14,7 +16,10 @@ def cart_item_count(request):
 
     This context processor adds the number of items in the user's cart
     to every template context, allowing the cart badge to be displayed
-    in the navigation bar.
+    in the navigation bar. The count is a callable that templates
+    resolve on first use, so pages that don't show the badge never look
+    it up. It comes from a per-user cache entry, or from the cookie cart
+    for anonymous visitors (see store.cart).
 
     Args:
         request: The HTTP request object
@@ -23,17 +28,17 @@ def cart_item_count(request):
         dict: Context dictionary with cart_item_count
     """
 
-    if request.user.is_authenticated:
-        try:
-            # Get total quantity of items in cart
-            cart_count = CartItem.objects.filter(user=request.user).count()
-            return {'cart_item_count': cart_count}
-        except:
-            # If there's any error, return 0
-            return {'cart_item_count': 0}
-    else:
-        # For anonymous users, cart count is 0
-        return {'cart_item_count': 0}
+    if not request.user.is_authenticated:
+        # Anonymous visitors' carts live in a cookie
+        return {'cart_item_count': lambda: len(get_anonymous_cart(request))}
+
+    user_id = request.user.pk
+
+    @cache
+    def count():
+        return get_cart_count(user_id)
+
+    return {'cart_item_count': count}
 
 
 def store_info(request):
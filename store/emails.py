@@ -0,0 +1,172 @@
+"""
+Transactional email outbox.
+
+Views never talk to the mail server. They call queue_order_confirmation()
+inside the transaction that places the order, which only inserts an
+OutboxEmail row. The deliver_emails command claims due rows in batches
+with ``SELECT ... FOR UPDATE SKIP LOCKED`` (so several workers can run
+side by side), renders and sends them over one reused SMTP connection,
+and records the outcome. Failed sends are retried with exponential
+backoff until MAX_ATTEMPTS, then left as ``failed`` for the admin.
+"""
+
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.db import transaction
+from django.db.models import F
+from django.template.loader import render_to_string
+from django.utils import timezone
+
+from .models import Order, OutboxEmail
+from .pdf_cache import placeholder_pdf_bytes
+
+
+DELIVERY_BATCH_SIZE = 50
+MAX_ATTEMPTS = 6
+RETRY_BASE_DELAY = timedelta(minutes=1)  # doubled after every failure
+RETRY_MAX_DELAY = timedelta(hours=2)
+
+
+def queue_order_confirmation(order):
+    """Queue an order's confirmation email; call inside its transaction"""
+    return OutboxEmail.objects.create(kind='order_confirmation', order=order)
+
+
+def retry_delay(attempts):
+    """Backoff before the next attempt after ``attempts`` failures"""
+    return min(RETRY_BASE_DELAY * 2 ** (attempts - 1), RETRY_MAX_DELAY)
+
+
+def build_order_confirmation_email(order):
+    """
+    Build an order confirmation email with eBook attachments.
+
+    Attaches the PDF file of each purchased book, or a generated
+    placeholder PDF if the book has none.
+    """
+    subject = f'Order Confirmation - {order.order_number}'
+    items = list(order.items.select_related('book'))
+
+    html_message = render_to_string('store/email/order_confirmation.html', {
+        'order': order,
+        'user': order.user,
+        'items': items,
+    })
+
+    email = EmailMessage(
+        subject=subject,
+        body=html_message,
+        from_email=settings.EMAIL_HOST_USER,
+        to=[order.user.email],
+    )
+    email.content_subtype = 'html'
+
+    for order_item in items:
+        book = order_item.book
+
+        # If book has a placeholder PDF, attach it
+        if book.placeholder_pdf:
+            try:
+                email.attach_file(book.placeholder_pdf.path)
+            except OSError:
+                # If PDF file doesn't exist, create a placeholder
+                create_placeholder_pdf(email, book, order_item.quantity)
+        else:
+            create_placeholder_pdf(email, book, order_item.quantity)
+
+    return email
+
+
+def create_placeholder_pdf(email, book, quantity):
+    """
+    Attach a placeholder PDF file for eBook delivery.
+
+    The PDF is rendered once per book version and quantity and then
+    served from the PDF cache (see store.pdf_cache).
+    """
+    email.attach(
+        f"{book.title.replace(' ', '_')}_ebook.pdf",
+        placeholder_pdf_bytes(book, quantity),
+        'application/pdf'
+    )
+
+
+BUILDERS = {
+    'order_confirmation': build_order_confirmation_email,
+}
+
+
+def deliver_batch(connection, batch_size=DELIVERY_BATCH_SIZE, max_attempts=MAX_ATTEMPTS):
+    """
+    Claim and send one batch of due emails over ``connection``.
+
+    The claimed rows stay locked until the batch's outcome is written,
+    so concurrent workers skip them instead of sending them twice.
+    Returns ``(sent, failed)`` counts; ``(0, 0)`` means nothing was due.
+    """
+    now = timezone.now()
+    sent_ids = []
+    failures = []
+
+    with transaction.atomic():
+        batch = list(
+            OutboxEmail.objects.select_for_update(skip_locked=True, of=('self',)).filter(
+                status='pending', next_attempt_at__lte=now
+            ).select_related('order__user').order_by('next_attempt_at', 'id')[:batch_size]
+        )
+
+        for outbox_email in batch:
+            try:
+                message = BUILDERS[outbox_email.kind](outbox_email.order)
+                # Opens the connection once; later sends reuse it
+                connection.open()
+                connection.send_messages([message])
+            except Exception as e:
+                failures.append((outbox_email, f'{type(e).__name__}: {e}'))
+                # Start the next send on a fresh connection
+                connection.close()
+            else:
+                sent_ids.append(outbox_email.pk)
+
+        sent_at = timezone.now()
+        if sent_ids:
+            OutboxEmail.objects.filter(pk__in=sent_ids).update(
+                status='sent', sent_at=sent_at, last_error='', attempts=F('attempts') + 1
+            )
+            Order.objects.filter(pk__in=[
+                outbox_email.order_id for outbox_email in batch
+                if outbox_email.pk in sent_ids and outbox_email.kind == 'order_confirmation'
+            ]).update(email_sent=True)
+
+        for outbox_email, error in failures:
+            outbox_email.attempts += 1
+            outbox_email.last_error = error
+            if outbox_email.attempts >= max_attempts:
+                outbox_email.status = 'failed'
+            else:
+                outbox_email.next_attempt_at = sent_at + retry_delay(outbox_email.attempts)
+            outbox_email.save(update_fields=['attempts', 'last_error', 'status', 'next_attempt_at'])
+
+    return len(sent_ids), len(failures)
+
+
+def deliver_pending(batch_size=DELIVERY_BATCH_SIZE, max_attempts=MAX_ATTEMPTS):
+    """
+    Send every email that is due, batch by batch, over one connection.
+
+    Returns ``(sent, failed)`` totals.
+    """
+    totals = [0, 0]
+    connection = get_connection()
+    try:
+        while True:
+            sent, failed = deliver_batch(connection, batch_size, max_attempts)
+            totals[0] += sent
+            totals[1] += failed
+            if sent + failed < batch_size:
+                break
+    finally:
+        connection.close()
+    return tuple(totals)
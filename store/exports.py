@@ -0,0 +1,211 @@
+"""
+Streaming exports of the catalog and order tables.
+
+Rows are read with ``values_list().iterator(chunk_size=...)``, which
+uses a server-side cursor on PostgreSQL, and encoded chunk by chunk as
+CSV, JSON Lines or Parquet. Memory use stays flat however large the
+table is, so the same generators back the export_data management
+command and the admin download (a StreamingHttpResponse).
+
+Parquet needs pyarrow, which is optional; the other formats have no
+extra dependencies.
+"""
+
+import csv
+import io
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import StreamingHttpResponse
+from django.utils import timezone
+
+from .models import Book, Order, OrderItem
+
+
+DEFAULT_CHUNK_SIZE = 2000
+
+DATASETS = {
+    'books': Book,
+    'orders': Order,
+    'order_items': OrderItem,
+}
+
+CONTENT_TYPES = {
+    'csv': 'text/csv',
+    'jsonl': 'application/x-ndjson',
+    'parquet': 'application/vnd.apache.parquet',
+}
+
+FORMATS = tuple(CONTENT_TYPES)
+
+
+class ExportError(ValueError):
+    """Unknown dataset or format, or a missing optional dependency"""
+
+
+def export_fields(model):
+    """Column names of an export: every concrete field, foreign keys as ids"""
+    return [field.attname for field in model._meta.concrete_fields]
+
+
+def export_rows(model, chunk_size=DEFAULT_CHUNK_SIZE):
+    """Yield the table's rows as tuples in primary key order"""
+    return model.objects.order_by('pk').values_list(
+        *export_fields(model)
+    ).iterator(chunk_size=chunk_size)
+
+
+def batched(rows, size):
+    """Group an iterator of rows into lists of at most ``size``"""
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def stream_csv(model, chunk_size=DEFAULT_CHUNK_SIZE):
+    """Yield the table as CSV, one encoded chunk of rows at a time"""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(export_fields(model))
+    for batch in batched(export_rows(model, chunk_size), chunk_size):
+        writer.writerows(batch)
+        yield buffer.getvalue().encode()
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue().encode()
+
+
+def stream_jsonl(model, chunk_size=DEFAULT_CHUNK_SIZE):
+    """Yield the table as JSON Lines, one encoded chunk of rows at a time"""
+    fields = export_fields(model)
+    encoder = DjangoJSONEncoder()
+    for batch in batched(export_rows(model, chunk_size), chunk_size):
+        yield ''.join(
+            encoder.encode(dict(zip(fields, row))) + '\n' for row in batch
+        ).encode()
+
+
+class ChunkSink(io.RawIOBase):
+    """Write-only file that hands the bytes written to it back in chunks"""
+
+    def __init__(self):
+        self.chunks = []
+        self.position = 0
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self.chunks.append(bytes(data))
+        self.position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self.position
+
+    def drain(self):
+        data = b''.join(self.chunks)
+        self.chunks = []
+        return data
+
+
+def parquet_schema(model):
+    """Build a pyarrow schema matching the model's export columns"""
+    import pyarrow as pa
+
+    types = {
+        'AutoField': pa.int64(),
+        'BigAutoField': pa.int64(),
+        'BigIntegerField': pa.int64(),
+        'IntegerField': pa.int64(),
+        'PositiveIntegerField': pa.int64(),
+        'PositiveSmallIntegerField': pa.int64(),
+        'SmallIntegerField': pa.int64(),
+        'BooleanField': pa.bool_(),
+        'FloatField': pa.float64(),
+        'DateField': pa.date32(),
+        'DateTimeField': pa.timestamp('us', tz='UTC'),
+    }
+    columns = []
+    for field in model._meta.concrete_fields:
+        target = field.target_field if field.is_relation else field
+        internal_type = target.get_internal_type()
+        if internal_type == 'DecimalField':
+            arrow_type = pa.decimal128(target.max_digits, target.decimal_places)
+        else:
+            arrow_type = types.get(internal_type, pa.string())
+        columns.append(pa.field(field.attname, arrow_type))
+    return pa.schema(columns)
+
+
+def stream_parquet(model, chunk_size=DEFAULT_CHUNK_SIZE):
+    """Yield the table as Parquet, one row group per chunk of rows"""
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    schema = parquet_schema(model)
+    fields = export_fields(model)
+    sink = ChunkSink()
+    writer = pq.ParquetWriter(sink, schema)
+    for batch in batched(export_rows(model, chunk_size), chunk_size):
+        columns = list(zip(*batch))
+        writer.write_table(pa.Table.from_arrays(
+            [pa.array(columns[i], type=schema.field(name).type) for i, name in enumerate(fields)],
+            schema=schema,
+        ))
+        yield sink.drain()
+    writer.close()
+    yield sink.drain()
+
+
+STREAMS = {
+    'csv': stream_csv,
+    'jsonl': stream_jsonl,
+    'parquet': stream_parquet,
+}
+
+
+def check_format(file_format):
+    """Raise ExportError if a format is unknown or its dependency is missing"""
+    if file_format not in STREAMS:
+        raise ExportError(f'Unknown format {file_format!r}')
+    if file_format == 'parquet':
+        try:
+            import pyarrow  # noqa: F401
+        except ImportError as e:
+            raise ExportError(f'pyarrow is required for Parquet exports ({e}).')
+
+
+def available_formats():
+    """Formats that can be exported with the installed packages"""
+    formats = []
+    for file_format in FORMATS:
+        try:
+            check_format(file_format)
+        except ExportError:
+            continue
+        formats.append(file_format)
+    return formats
+
+
+def stream_export(dataset, file_format, chunk_size=DEFAULT_CHUNK_SIZE):
+    """Return a generator of encoded chunks for a dataset export"""
+    if dataset not in DATASETS:
+        raise ExportError(f'Unknown dataset {dataset!r}')
+    # Checked up front: the stream itself only runs once iterated
+    check_format(file_format)
+    return STREAMS[file_format](DATASETS[dataset], chunk_size)
+
+
+def export_response(dataset, file_format):
+    """Stream a dataset export as a file download"""
+    stream = stream_export(dataset, file_format)
+    filename = f'{dataset}-{timezone.now():%Y%m%d-%H%M%S}.{file_format}'
+    response = StreamingHttpResponse(stream, content_type=CONTENT_TYPES[file_format])
+    response['Content-Disposition'] = f'attachment; filename="{filename}"'
+    return response
@@ -0,0 +1,167 @@
+"""
+Materialized facet counts for the book catalog.
+
+Every book falls into exactly one (category, price band, stock status)
+cell of the BookFacetCount table. Book writes move the book between
+cells with F() updates, and listings read the per-category, per-price
+band and per-stock-status counts by summing the handful of cells.
+"""
+
+from collections import defaultdict
+from decimal import Decimal
+
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, Q
+
+from .caching import get_or_build
+from .models import Book, BookFacetCount, Category
+
+
+PRICE_BANDS = [
+    # (key, label, lower bound inclusive, upper bound exclusive)
+    ('under-20', 'Under $20', None, Decimal('20')),
+    ('20-35', '$20 - $35', Decimal('20'), Decimal('35')),
+    ('35-50', '$35 - $50', Decimal('35'), Decimal('50')),
+    ('50-plus', '$50 and up', Decimal('50'), None),
+]
+
+FACET_CACHE_TIMEOUT = 60 * 10  # 10 minutes
+
+
+def price_band_for(price):
+    """Return the price band key for a price"""
+    for key, _, low, high in PRICE_BANDS:
+        if (low is None or price >= low) and (high is None or price < high):
+            return key
+    return PRICE_BANDS[-1][0]
+
+
+def price_band_filter(key):
+    """Return a Q object selecting books in a price band, or None"""
+    for band_key, _, low, high in PRICE_BANDS:
+        if band_key == key:
+            condition = Q()
+            if low is not None:
+                condition &= Q(price__gte=low)
+            if high is not None:
+                condition &= Q(price__lt=high)
+            return condition
+    return None
+
+
+def facet_key(category_id, price, stock_quantity):
+    """Return the facet cell a book belongs to"""
+    return (category_id, price_band_for(Decimal(price)), stock_quantity > 0)
+
+
+def adjust_facet(key, delta):
+    """Add ``delta`` to the count of a facet cell, creating it if needed"""
+    category_id, price_band, in_stock = key
+    cell = BookFacetCount.objects.filter(
+        category_id=category_id, price_band=price_band, in_stock=in_stock
+    )
+    if cell.update(count=F('count') + delta):
+        return
+
+    try:
+        with transaction.atomic():
+            BookFacetCount.objects.create(
+                category_id=category_id,
+                price_band=price_band,
+                in_stock=in_stock,
+                count=delta,
+            )
+    except IntegrityError:
+        # Another writer created the cell first
+        cell.update(count=F('count') + delta)
+
+
+def move_book(old_key, new_key):
+    """Move a book between facet cells (either key may be None)"""
+    if old_key == new_key:
+        return
+    if old_key is not None:
+        adjust_facet(old_key, -1)
+    if new_key is not None:
+        adjust_facet(new_key, 1)
+
+
+def rebuild_facets():
+    """Recompute every facet cell from the Book table"""
+    cells = defaultdict(int)
+    rows = Book.objects.values('category_id', 'price', 'stock_quantity').annotate(
+        books=Count('id')
+    ).order_by()
+    for row in rows.iterator(chunk_size=2000):
+        key = facet_key(row['category_id'], row['price'], row['stock_quantity'])
+        cells[key] += row['books']
+
+    with transaction.atomic():
+        BookFacetCount.objects.all().delete()
+        BookFacetCount.objects.bulk_create(
+            BookFacetCount(
+                category_id=category_id,
+                price_band=price_band,
+                in_stock=in_stock,
+                count=count,
+            )
+            for (category_id, price_band, in_stock), count in cells.items()
+        )
+    return len(cells)
+
+
+def get_facet_cells():
+    """Return all facet cells, cached per catalog version"""
+    return get_or_build(
+        'facets',
+        lambda: list(BookFacetCount.objects.filter(count__gt=0).values_list(
+            'category_id', 'price_band', 'in_stock', 'count'
+        )),
+        FACET_CACHE_TIMEOUT
+    )
+
+
+def get_categories():
+    """Return all categories, cached per catalog version"""
+    return get_or_build(
+        'categories',
+        lambda: list(Category.objects.values('id', 'name', 'slug')),
+        FACET_CACHE_TIMEOUT
+    )
+
+
+def get_facets(category_id=None, price_band=None):
+    """
+    Return facet counts for the catalog listing.
+
+    Category and price band counts cover in-stock books (what the
+    listing shows) and respect the other active filter; stock counts
+    cover every book matching the active filters.
+    """
+    by_category = defaultdict(int)
+    by_price_band = defaultdict(int)
+    by_stock = {True: 0, False: 0}
+
+    for cell_category, cell_band, in_stock, count in get_facet_cells():
+        category_match = category_id is None or cell_category == category_id
+        band_match = price_band is None or cell_band == price_band
+
+        if in_stock and band_match:
+            by_category[cell_category] += count
+        if in_stock and category_match:
+            by_price_band[cell_band] += count
+        if category_match and band_match:
+            by_stock[in_stock] += count
+
+    return {
+        'categories': [
+            dict(category, count=by_category.get(category['id'], 0))
+            for category in get_categories()
+        ],
+        'price_bands': [
+            {'key': key, 'label': label, 'count': by_price_band.get(key, 0)}
+            for key, label, _, _ in PRICE_BANDS
+        ],
+        'in_stock': by_stock[True],
+        'out_of_stock': by_stock[False],
+    }
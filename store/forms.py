@@ -9,7 +9,8 @@ from django import forms
 from django.contrib.auth.forms import UserCreationForm
 from django.contrib.auth.models import User
 from django.core.exceptions import ValidationError
-from .models import Order, UserProfile
+from .models import Order, Review, UserProfile
+from .facets import PRICE_BANDS, get_categories
 
 
 class CustomUserCreationForm(UserCreationForm):
@@ -192,6 +193,18 @@ class CheckoutForm(forms.ModelForm):
         return zip_code
 
 
+def category_choices():
+    """Category filter choices (evaluated lazily when rendered)"""
+    return [('all', 'All Categories')] + [
+        (category['slug'], category['name']) for category in get_categories()
+    ]
+
+
+def price_band_choices():
+    """Price band filter choices"""
+    return [('all', 'Any Price')] + [(key, label) for key, label, _, _ in PRICE_BANDS]
+
+
 class BookSearchForm(forms.Form):
     """
     Form for searching books by title or author.
@@ -211,15 +224,15 @@ class BookSearchForm(forms.Form):
     )
 
     category = forms.ChoiceField(
-        choices=[
-            ('all', 'All Categories'),
-            ('fiction', 'Fiction'),
-            ('non-fiction', 'Non-Fiction'),
-            ('science', 'Science'),
-            ('technology', 'Technology'),
-            ('history', 'History'),
-            ('biography', 'Biography'),
-        ],
+        choices=category_choices,
+        required=False,
+        widget=forms.Select(attrs={
+            'class': 'form-control'
+        })
+    )
+
+    price = forms.ChoiceField(
+        choices=price_band_choices,
         required=False,
         widget=forms.Select(attrs={
             'class': 'form-control'
@@ -228,12 +241,14 @@ class BookSearchForm(forms.Form):
 
     sort_by = forms.ChoiceField(
         choices=[
+            ('relevance', 'Best Match'),
             ('title', 'Title A-Z'),
             ('-title', 'Title Z-A'),
             ('price', 'Price Low to High'),
             ('-price', 'Price High to Low'),
             ('-created_at', 'Newest First'),
             ('created_at', 'Oldest First'),
+            ('-rating_average', 'Top Rated'),
         ],
         required=False,
         initial='-created_at',
@@ -243,6 +258,26 @@ class BookSearchForm(forms.Form):
     )
 
 
+class ReviewForm(forms.ModelForm):
+    """
+    Form for writing or updating a book review.
+    """
+
+    class Meta:
+        model = Review
+        fields = ['rating', 'comment']
+        widgets = {
+            'rating': forms.Select(attrs={
+                'class': 'form-control'
+            }),
+            'comment': forms.Textarea(attrs={
+                'class': 'form-control',
+                'rows': 3,
+                'placeholder': 'What did you think of this book? (optional)'
+            })
+        }
+
+
 class UserProfileForm(forms.ModelForm):
     """
     Form for updating user profile information.
@@ -0,0 +1,43 @@
+"""
+Django management command to rebuild the bestseller counters.
+
+Checkout keeps BookSales and BookSalesDay up to date as orders are
+placed. Run this command once after deploying the bestseller shelves,
+or whenever the counters need rebuilding from order history.
+"""
+
+from django.core.management.base import BaseCommand
+
+from store.bestsellers import backfill_sales
+from store.caching import bump_catalog_version
+
+
+class Command(BaseCommand):
+    """
+    Management command to rebuild sales counters from OrderItem rows.
+    """
+
+    help = 'Rebuild 7-day, 30-day and all-time sales counters from orders'
+
+    def add_arguments(self, parser):
+        """Add command line arguments"""
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=5000,
+            help='Order items read per query (default: 5000)',
+        )
+
+    def handle(self, *args, **options):
+        """Handle the command execution"""
+        self.stdout.write('Backfilling bestseller counters...')
+
+        stats = backfill_sales(chunk_size=options['chunk_size'], stdout=self.stdout)
+        bump_catalog_version()
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Counted {stats['order_items']} order items for {stats['books']} "
+                f"books ({stats['day_buckets']} daily buckets)."
+            )
+        )
@@ -0,0 +1,73 @@
+"""
+Django management command to build "customers also bought" data.
+
+Counts how often books are bought in the same order, scores each pair
+by cosine similarity and stores the top matches per book in
+CoPurchase. Run it periodically (for example nightly) from cron.
+"""
+
+from django.core.management.base import BaseCommand, CommandError
+
+
+class Command(BaseCommand):
+    """
+    Management command to rebuild co-purchase recommendations.
+    """
+
+    help = 'Build "customers also bought" recommendations from orders'
+
+    def add_arguments(self, parser):
+        """Add command line arguments"""
+        parser.add_argument(
+            '--top-k',
+            type=int,
+            default=10,
+            help='Number of co-purchased books to store per book (default: 10)',
+        )
+
+        parser.add_argument(
+            '--min-support',
+            type=int,
+            default=2,
+            help='Minimum number of shared orders for a pair (default: 2)',
+        )
+
+        parser.add_argument(
+            '--max-basket',
+            type=int,
+            default=50,
+            help='Skip orders with more distinct books than this (default: 50)',
+        )
+
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=100000,
+            help='Order items per counting batch (default: 100000)',
+        )
+
+    def handle(self, *args, **options):
+        """Handle the command execution"""
+        try:
+            from store.recommendations import build_co_purchases
+        except ImportError as e:
+            raise CommandError(
+                f'NumPy and SciPy are required to build co-purchases ({e}).'
+            )
+
+        self.stdout.write('Building co-purchase recommendations...')
+
+        stats = build_co_purchases(
+            top_k=options['top_k'],
+            min_support=options['min_support'],
+            max_basket=options['max_basket'],
+            chunk_size=options['chunk_size'],
+            stdout=self.stdout,
+        )
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Counted {stats['order_items']} order items; stored "
+                f"{stats['rows_written']} rows for {stats['books']} books."
+            )
+        )
@@ -0,0 +1,65 @@
+"""
+Django management command to build the related-books table.
+
+Computes TF-IDF similarity between books and stores the top neighbours
+of each book in RelatedBook. By default only books changed since the
+previous run are recomputed; pass --full to rebuild everything.
+"""
+
+from django.core.management.base import BaseCommand, CommandError
+
+
+class Command(BaseCommand):
+    """
+    Management command to (re)build precomputed related books.
+    """
+
+    help = 'Build precomputed related books from TF-IDF similarity'
+
+    def add_arguments(self, parser):
+        """Add command line arguments"""
+        parser.add_argument(
+            '--full',
+            action='store_true',
+            help='Recompute every book instead of only changed ones',
+        )
+
+        parser.add_argument(
+            '--top-k',
+            type=int,
+            default=10,
+            help='Number of related books to store per book (default: 10)',
+        )
+
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=256,
+            help='Books compared per similarity batch (default: 256)',
+        )
+
+    def handle(self, *args, **options):
+        """Handle the command execution"""
+        try:
+            from store.recommendations import build_related_books
+        except ImportError as e:
+            raise CommandError(
+                f'NumPy and SciPy are required to build related books ({e}).'
+            )
+
+        self.stdout.write('Building related books...')
+
+        stats = build_related_books(
+            top_k=options['top_k'],
+            chunk_size=options['chunk_size'],
+            full=options['full'],
+            stdout=self.stdout,
+        )
+
+        mode = 'Incremental' if stats['incremental'] else 'Full'
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"{mode} build finished: recomputed {stats['recomputed']} of "
+                f"{stats['books']} books, wrote {stats['rows_written']} rows."
+            )
+        )
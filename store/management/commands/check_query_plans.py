@@ -0,0 +1,143 @@
+"""
+Django management command to verify storefront query plans.
+
+Runs EXPLAIN on every storefront query shape (home page shelves, each
+catalog sort, category filtering, keyset "next page" seeks and related
+books) and fails if any of them reads the book table with a sequential
+scan. Planners happily scan small tables, so run this against a
+realistically sized catalog (around a million books, e.g. built with
+generate_load_data --books 1000000).
+"""
+
+import json
+import re
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import RequestFactory
+
+from store.forms import BookSearchForm
+from store.models import Book, Category, RelatedBook
+from store.pagination import KeysetPaginator
+from store.views import BookListView
+
+
+SQLITE_FULL_SCAN_RE = re.compile(r'\bSCAN (\w+)(?! USING)')
+
+
+class Command(BaseCommand):
+    """
+    Management command to EXPLAIN storefront queries.
+    """
+
+    help = 'EXPLAIN storefront queries and fail on sequential scans of books'
+
+    def add_arguments(self, parser):
+        """Add command line arguments"""
+        parser.add_argument(
+            '--min-books',
+            type=int,
+            default=100000,
+            help='Warn if the catalog has fewer books than this (default: 100000)',
+        )
+
+        parser.add_argument(
+            '--verbose-plans',
+            action='store_true',
+            help='Print the full plan of every query',
+        )
+
+    def handle(self, *args, **options):
+        """Handle the command execution"""
+        total = Book.objects.count()
+        if total < options['min_books']:
+            self.stdout.write(self.style.WARNING(
+                f'Only {total} books in the catalog; plans on a small '
+                f'catalog may not match production (see generate_load_data).'
+            ))
+
+        failures = []
+        for label, queryset in self.storefront_queries():
+            scanned = self.sequential_scans(queryset)
+            if options['verbose_plans']:
+                self.stdout.write(f'--- {label}\n{queryset.explain()}')
+
+            if Book._meta.db_table in scanned:
+                failures.append(label)
+                self.stdout.write(self.style.ERROR(f'  SEQ SCAN  {label}'))
+            else:
+                self.stdout.write(f'  ok        {label}')
+
+        if failures:
+            raise CommandError(
+                f'{len(failures)} storefront queries scan the whole book table: '
+                + ', '.join(failures)
+            )
+
+        self.stdout.write(self.style.SUCCESS('All storefront queries use indexes.'))
+
+    def storefront_queries(self):
+        """Yield ``(label, queryset)`` for every storefront query shape"""
+        yield 'home: featured books', Book.objects.filter(
+            is_featured=True, stock_quantity__gt=0
+        )[:6]
+        yield 'home: recent books', Book.objects.filter(
+            stock_quantity__gt=0
+        ).order_by('-created_at')[:8]
+
+        factory = RequestFactory()
+        category = Category.objects.first()
+        sorts = [
+            value for value, _ in BookSearchForm.base_fields['sort_by'].choices
+            if value != 'relevance'
+        ]
+
+        for sort_by in sorts:
+            params = {'sort_by': sort_by}
+            yield from self.listing_queries(factory, params, f'catalog: {sort_by}')
+
+        if category is not None:
+            params = {'category': category.slug}
+            yield from self.listing_queries(factory, params, 'catalog: category')
+
+        book = Book.objects.filter(stock_quantity__gt=0).order_by('-id').first()
+        if book is not None:
+            yield 'detail: related books', RelatedBook.objects.filter(
+                book=book,
+                related__stock_quantity__gt=0
+            ).select_related('related').order_by('rank')[:4]
+
+    def listing_queries(self, factory, params, label):
+        """Yield the first page and a keyset seek for a catalog listing"""
+        view = BookListView()
+        view.setup(factory.get('/books/', params))
+        queryset = view.get_queryset()
+        page_size = view.paginate_by
+
+        yield f'{label} (first page)', queryset[:page_size + 1]
+
+        paginator = KeysetPaginator(queryset, page_size, view.get_ordering())
+        first_page = paginator.get_page()
+        cursor = paginator.next_cursor(first_page)
+        if cursor:
+            payload = paginator.decode_cursor(cursor)
+            seek = queryset.filter(paginator._seek_filter(payload['v'], reverse=False))
+            yield f'{label} (next page)', seek[:page_size + 1]
+
+    def sequential_scans(self, queryset):
+        """Return the set of tables the query plan reads sequentially"""
+        if connection.vendor == 'postgresql':
+            plan = json.loads(queryset.explain(format='json'))
+            scanned = set()
+            nodes = [plan[0]['Plan']]
+            while nodes:
+                node = nodes.pop()
+                if node.get('Node Type') == 'Seq Scan':
+                    scanned.add(node.get('Relation Name'))
+                nodes.extend(node.get('Plans', []))
+            return scanned
+
+        if connection.vendor == 'sqlite':
+            return set(SQLITE_FULL_SCAN_RE.findall(queryset.explain()))
+
+        raise CommandError(f'Query plan checks are not supported on {connection.vendor}.')
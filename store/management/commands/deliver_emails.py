@@ -0,0 +1,70 @@
+"""
+Django management command to deliver queued transactional emails.
+
+Checkout only writes an OutboxEmail row; this worker renders and sends
+the emails over one SMTP connection and retries failures with backoff.
+Run it continuously next to the web server:
+
+    python manage.py deliver_emails --loop
+
+or from cron without --loop. Several workers may run at once; each
+claims its own batches.
+"""
+
+import time
+
+from django.core.management.base import BaseCommand
+
+from store.emails import DELIVERY_BATCH_SIZE, MAX_ATTEMPTS, deliver_pending
+
+
+class Command(BaseCommand):
+    """
+    Management command to send due emails from the outbox.
+    """
+
+    help = 'Send queued order confirmation emails'
+
+    def add_arguments(self, parser):
+        """Add command line arguments"""
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=DELIVERY_BATCH_SIZE,
+            help=f'Emails claimed per transaction (default: {DELIVERY_BATCH_SIZE})',
+        )
+
+        parser.add_argument(
+            '--max-attempts',
+            type=int,
+            default=MAX_ATTEMPTS,
+            help=f'Attempts before an email is marked failed (default: {MAX_ATTEMPTS})',
+        )
+
+        parser.add_argument(
+            '--loop',
+            action='store_true',
+            help='Keep polling for new emails instead of exiting when the outbox is empty',
+        )
+
+        parser.add_argument(
+            '--interval',
+            type=float,
+            default=5.0,
+            help='Seconds between polls with --loop (default: 5)',
+        )
+
+    def handle(self, *args, **options):
+        """Handle the command execution"""
+        while True:
+            sent, failed = deliver_pending(
+                batch_size=options['batch_size'],
+                max_attempts=options['max_attempts'],
+            )
+            if sent or failed or not options['loop']:
+                self.stdout.write(
+                    self.style.SUCCESS(f'Sent {sent} emails, {failed} failed.')
+                )
+            if not options['loop']:
+                break
+            time.sleep(options['interval'])
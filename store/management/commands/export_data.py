@@ -0,0 +1,68 @@
+"""
+Django management command to export books, orders or order items.
+
+Streams the table to a file (or stdout) as CSV, JSON Lines or Parquet
+without loading it into memory, for finance and partner dumps.
+"""
+
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+
+from store.exports import DATASETS, DEFAULT_CHUNK_SIZE, FORMATS, ExportError, stream_export
+
+
+class Command(BaseCommand):
+    """
+    Management command to stream a full table export.
+    """
+
+    help = 'Stream a full export of books, orders or order items'
+
+    def add_arguments(self, parser):
+        """Add command line arguments"""
+        parser.add_argument('dataset', choices=sorted(DATASETS))
+
+        parser.add_argument(
+            '--format',
+            choices=FORMATS,
+            default='csv',
+            help='Output format (default: csv)',
+        )
+
+        parser.add_argument(
+            '--output',
+            help='File to write (default: stdout)',
+        )
+
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=DEFAULT_CHUNK_SIZE,
+            help=f'Rows fetched per database round trip (default: {DEFAULT_CHUNK_SIZE})',
+        )
+
+    def handle(self, *args, **options):
+        """Handle the command execution"""
+        try:
+            stream = stream_export(options['dataset'], options['format'], options['chunk_size'])
+        except ExportError as e:
+            raise CommandError(str(e))
+
+        output = options['output']
+        handle = open(output, 'wb') if output else sys.stdout.buffer
+        written = 0
+        try:
+            for chunk in stream:
+                handle.write(chunk)
+                written += len(chunk)
+        finally:
+            if output:
+                handle.close()
+            else:
+                handle.flush()
+
+        if output:
+            self.stdout.write(
+                self.style.SUCCESS(f'Wrote {written} bytes of {options["dataset"]} to {output}.')
+            )
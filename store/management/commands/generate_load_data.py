@@ -0,0 +1,108 @@
+"""
+Django management command to generate a synthetic load-testing dataset.
+
+Unlike init_data, which creates a handful of sample books, this builds
+a catalog of any size with users, carts and orders (Zipf-distributed
+book popularity, multi-item orders, long descriptions) using
+bulk_create in large batches. The same --seed always produces the same
+data. For example, a benchmark fixture for check_query_plans:
+
+    python manage.py generate_load_data --books 1000000 --users 200000 --orders 5000000
+"""
+
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+
+class Command(BaseCommand):
+    """
+    Management command to generate synthetic books, users, carts and orders.
+    """
+
+    help = 'Generate a large, deterministic synthetic dataset for load testing'
+
+    def add_arguments(self, parser):
+        """Add command line arguments"""
+        parser.add_argument('--books', type=int, default=10000, help='Books to create (default: 10000)')
+        parser.add_argument('--users', type=int, default=1000, help='Customers to create (default: 1000)')
+        parser.add_argument('--carts', type=int, default=500, help='Customers with a filled cart (default: 500)')
+        parser.add_argument('--orders', type=int, default=20000, help='Orders to create (default: 20000)')
+
+        parser.add_argument(
+            '--seed',
+            type=int,
+            default=42,
+            help='Random seed; the same seed gives the same data (default: 42)',
+        )
+
+        parser.add_argument(
+            '--skew',
+            type=float,
+            default=1.1,
+            help='Zipf exponent of book popularity (default: 1.1)',
+        )
+
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=10000,
+            help='Rows per bulk insert and transaction (default: 10000)',
+        )
+
+        parser.add_argument(
+            '--clear',
+            action='store_true',
+            help='Delete previously generated data first (slow on large datasets; '
+                 'recreating the database is faster)',
+        )
+
+        parser.add_argument(
+            '--skip-refresh',
+            action='store_true',
+            help='Do not rebuild search index, facets, caches and bestseller counters',
+        )
+
+    def handle(self, *args, **options):
+        """Handle the command execution"""
+        try:
+            from store.synthetic import (
+                SyntheticDataGenerator, clear_synthetic_data, synthetic_data_exists,
+            )
+        except ImportError as e:
+            raise CommandError(f'NumPy is required to generate load data ({e}).')
+
+        from store.bestsellers import backfill_sales
+        from store.catalog_io import refresh_derived_data
+
+        if options['clear']:
+            self.stdout.write('Deleting previously generated data...')
+            clear_synthetic_data()
+        elif synthetic_data_exists():
+            raise CommandError('Generated data already exists; use --clear to replace it.')
+
+        started = time.monotonic()
+        generator = SyntheticDataGenerator(
+            seed=options['seed'],
+            batch_size=options['batch_size'],
+            skew=options['skew'],
+            stdout=self.stdout,
+        )
+        stats = generator.generate(
+            books=options['books'],
+            users=options['users'],
+            carts=options['carts'],
+            orders=options['orders'],
+        )
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Generated {stats['books']} books, {stats['users']} users, "
+            f"{stats['carts']} carts and {stats['orders']} orders "
+            f"({stats['order_items']} items) in {time.monotonic() - started:.1f}s."
+        ))
+
+        if not options['skip_refresh']:
+            self.stdout.write('Refreshing search index, facets, caches and bestsellers...')
+            refresh_derived_data()
+            backfill_sales()
+            self.stdout.write(self.style.SUCCESS('Derived data refreshed.'))
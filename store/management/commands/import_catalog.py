@@ -0,0 +1,127 @@
+"""
+Django management command to bulk import a supplier catalog.
+
+Streams a CSV or JSON Lines feed, upserts books by ISBN in batched
+transactions and keeps a checkpoint file so an interrupted import can
+continue where it stopped with --resume. Expected columns: isbn, title,
+author, description, price, stock_quantity, category, is_featured.
+"""
+
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from store.catalog_io import (
+    CategoryResolver, Checkpoint, RecordError, detect_format, parse_record,
+    read_records, refresh_derived_data, upsert_books,
+)
+
+
+class Command(BaseCommand):
+    """
+    Management command to import books from a CSV or JSONL feed.
+    """
+
+    help = 'Stream a CSV/JSONL catalog feed into the database, upserting by ISBN'
+
+    def add_arguments(self, parser):
+        """Add command line arguments"""
+        parser.add_argument('path', help='Path to the CSV or JSONL feed')
+
+        parser.add_argument(
+            '--format',
+            choices=['csv', 'jsonl'],
+            help='Feed format (default: guessed from the file extension)',
+        )
+
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=2000,
+            help='Books upserted per transaction (default: 2000)',
+        )
+
+        parser.add_argument(
+            '--checkpoint',
+            help='Checkpoint file (default: <path>.checkpoint)',
+        )
+
+        parser.add_argument(
+            '--resume',
+            action='store_true',
+            help='Skip records committed by a previous, interrupted run',
+        )
+
+        parser.add_argument(
+            '--skip-refresh',
+            action='store_true',
+            help='Do not rebuild search index, facets and caches afterwards',
+        )
+
+    def handle(self, *args, **options):
+        """Handle the command execution"""
+        path = options['path']
+        file_format = options['format'] or detect_format(path)
+        batch_size = options['batch_size']
+
+        try:
+            checkpoint = Checkpoint(options['checkpoint'] or f'{path}.checkpoint', path)
+        except OSError as e:
+            raise CommandError(f'Cannot read {path}: {e}')
+
+        skip = checkpoint.load() if options['resume'] else 0
+        if skip:
+            self.stdout.write(f'Resuming after {skip} records...')
+
+        categories = CategoryResolver()
+        started = time.monotonic()
+        position = 0
+        upserted = 0
+        errors = 0
+        batch = []
+
+        def flush():
+            nonlocal upserted
+            upserted += upsert_books(batch)
+            batch.clear()
+            checkpoint.save(position)
+            elapsed = time.monotonic() - started
+            self.stdout.write(
+                f'  ...{position} records read, {upserted} books upserted '
+                f'({upserted / elapsed if elapsed else 0:.0f} books/s)'
+            )
+
+        try:
+            for record in read_records(path, file_format):
+                position += 1
+                if position <= skip:
+                    continue
+
+                try:
+                    batch.append(parse_record(record, categories))
+                except RecordError as e:
+                    errors += 1
+                    self.stderr.write(f'Record {position}: {e}')
+                    continue
+
+                if len(batch) >= batch_size:
+                    flush()
+        except (OSError, ValueError) as e:
+            raise CommandError(f'Cannot read record {position + 1} of {path}: {e}')
+
+        if batch:
+            flush()
+        checkpoint.clear()
+
+        elapsed = time.monotonic() - started
+        self.stdout.write(
+            self.style.SUCCESS(
+                f'Imported {upserted} books from {position - skip} records in '
+                f'{elapsed:.1f}s ({errors} rejected).'
+            )
+        )
+
+        if not options['skip_refresh']:
+            self.stdout.write('Refreshing search index, facets and caches...')
+            refresh_derived_data()
+            self.stdout.write(self.style.SUCCESS('Derived data refreshed.'))
@@ -9,7 +9,7 @@ from django.core.management.base import BaseCommand
 from django.contrib.auth.models import User
 from django.utils import timezone
 from decimal import Decimal
-from store.models import Book, UserProfile
+from store.models import Book, Category, UserProfile
 import os
 
 
@@ -253,9 +253,16 @@ class Command(BaseCommand):
             },
         ]
 
+        # All sample books are programming titles
+        technology, _ = Category.objects.get_or_create(
+            slug='technology',
+            defaults={'name': 'Technology'}
+        )
+
         # Create books
         created_count = 0
         for book_data in books_data:
+            book_data['category'] = technology
             book, created = Book.objects.get_or_create(
                 isbn=book_data['isbn'],
                 defaults=book_data
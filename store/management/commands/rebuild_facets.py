@@ -0,0 +1,31 @@
+"""
+Django management command to rebuild the catalog facet counts.
+
+Book saves and deletes keep BookFacetCount up to date, but bulk
+operations such as ``QuerySet.update()`` bypass model signals. Run this
+command after bulk imports or manual database changes.
+"""
+
+from django.core.management.base import BaseCommand
+
+from store.caching import bump_catalog_version
+from store.facets import rebuild_facets
+
+
+class Command(BaseCommand):
+    """
+    Management command to recompute materialized facet counts.
+    """
+
+    help = 'Recompute category, price band and stock facet counts'
+
+    def handle(self, *args, **options):
+        """Handle the command execution"""
+        self.stdout.write('Rebuilding facet counts...')
+
+        cells = rebuild_facets()
+        bump_catalog_version()
+
+        self.stdout.write(
+            self.style.SUCCESS(f'Facet counts rebuilt ({cells} cells).')
+        )
@@ -0,0 +1,38 @@
+"""
+Django management command to rebuild the catalog full-text search index.
+
+Book saves and deletes keep the index in sync automatically, but bulk
+operations such as ``QuerySet.update()`` bypass model signals. Run this
+command after bulk imports or manual database changes.
+"""
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from store.models import Book
+from store.search import get_search_backend
+
+
+class Command(BaseCommand):
+    """
+    Management command to rebuild the full-text search index.
+    """
+
+    help = 'Rebuild the full-text search index for all books'
+
+    def handle(self, *args, **options):
+        """Handle the command execution"""
+        backend = get_search_backend()
+
+        self.stdout.write(
+            f'Rebuilding search index with {backend.__class__.__name__}...'
+        )
+
+        with transaction.atomic():
+            backend.rebuild()
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f'Search index rebuilt for {Book.objects.count()} books!'
+            )
+        )
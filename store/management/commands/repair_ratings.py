@@ -0,0 +1,42 @@
+"""
+Django management command to repair book rating aggregates.
+
+Review saves and deletes keep Book.rating_sum, rating_count and
+rating_average up to date, but bulk operations such as
+``QuerySet.update()`` or raw SQL bypass model signals. Run this command
+after such changes, or periodically as a consistency check.
+"""
+
+from django.core.management.base import BaseCommand
+
+from store.caching import bump_catalog_version
+from store.reviews import repair_rating_aggregates
+
+
+class Command(BaseCommand):
+    """
+    Management command to recompute rating aggregates from reviews.
+    """
+
+    help = 'Recompute book rating sums, counts and averages from reviews'
+
+    def add_arguments(self, parser):
+        """Add command line arguments"""
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=1000,
+            help='Books written per UPDATE batch (default: 1000)',
+        )
+
+    def handle(self, *args, **options):
+        """Handle the command execution"""
+        self.stdout.write('Repairing rating aggregates...')
+
+        fixed = repair_rating_aggregates(batch_size=options['batch_size'])
+        if fixed:
+            bump_catalog_version()
+
+        self.stdout.write(
+            self.style.SUCCESS(f'Rating aggregates repaired ({fixed} books corrected).')
+        )
@@ -0,0 +1,38 @@
+"""
+Django management command to report search result cache statistics.
+
+Shows how many catalog search pages were served from the result cache
+versus computed from the database, to help tune SEARCH_CACHE_TIMEOUT.
+"""
+
+from django.core.management.base import BaseCommand
+
+from store.search_cache import get_stats, reset_stats
+
+
+class Command(BaseCommand):
+    """
+    Management command to show (and optionally reset) cache hit ratios.
+    """
+
+    help = 'Show search result cache hit and miss counts'
+
+    def add_arguments(self, parser):
+        """Add command line arguments"""
+        parser.add_argument(
+            '--reset',
+            action='store_true',
+            help='Reset the counters after printing them',
+        )
+
+    def handle(self, *args, **options):
+        """Handle the command execution"""
+        stats = get_stats()
+        self.stdout.write(
+            f"Hits: {stats['hits']}  Misses: {stats['misses']}  "
+            f"Hit ratio: {stats['hit_ratio']:.1%}"
+        )
+
+        if options['reset']:
+            reset_stats()
+            self.stdout.write(self.style.SUCCESS('Counters reset.'))
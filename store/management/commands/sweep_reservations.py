@@ -0,0 +1,49 @@
+"""
+Django management command to release expired cart stock reservations.
+
+Expired holds keep counting against a book's available stock until this
+command releases them, so schedule it to run every minute or so, e.g.
+from cron:
+
+    * * * * * python manage.py sweep_reservations
+"""
+
+from django.core.management.base import BaseCommand
+
+from store.reservations import SWEEP_BATCH_SIZE, expire_holds, repair_reserved_stock
+
+
+class Command(BaseCommand):
+    """
+    Management command to expire stock reservations in bulk.
+    """
+
+    help = 'Release expired cart stock reservations'
+
+    def add_arguments(self, parser):
+        """Add command line arguments"""
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=SWEEP_BATCH_SIZE,
+            help=f'Reservations released per transaction (default: {SWEEP_BATCH_SIZE})',
+        )
+
+        parser.add_argument(
+            '--repair',
+            action='store_true',
+            help='Also recompute the reserved stock counters from the reservations',
+        )
+
+    def handle(self, *args, **options):
+        """Handle the command execution"""
+        released = expire_holds(batch_size=options['batch_size'])
+        self.stdout.write(
+            self.style.SUCCESS(f'Released {released} expired reservations.')
+        )
+
+        if options['repair']:
+            counters = repair_reserved_stock()
+            self.stdout.write(
+                self.style.SUCCESS(f'Reserved stock recomputed ({counters} books).')
+            )
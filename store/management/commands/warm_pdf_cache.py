@@ -0,0 +1,57 @@
+"""
+Django management command to pre-render eBook PDFs for top sellers.
+
+Confirmation emails attach a generated placeholder PDF per order line,
+served from the PDF cache (see store.pdf_cache). Warming the cache for
+the best selling books after a deploy or a PDF template change keeps
+the email worker from rendering them on its first orders.
+"""
+
+from django.core.management.base import BaseCommand
+
+from store.bestsellers import WINDOWS, top_books
+from store.pdf_cache import evict, warm
+
+
+class Command(BaseCommand):
+    """
+    Management command to fill the PDF cache for bestselling books.
+    """
+
+    help = 'Pre-render eBook placeholder PDFs for the best selling books'
+
+    def add_arguments(self, parser):
+        """Add command line arguments"""
+        parser.add_argument(
+            '--top',
+            type=int,
+            default=100,
+            help='Number of best selling books to render (default: 100)',
+        )
+
+        parser.add_argument(
+            '--window',
+            choices=list(WINDOWS),
+            default='30d',
+            help='Bestseller window to rank books by (default: 30d)',
+        )
+
+        parser.add_argument(
+            '--max-quantity',
+            type=int,
+            default=1,
+            help='Render quantities 1 to N for each book (default: 1)',
+        )
+
+    def handle(self, *args, **options):
+        """Handle the command execution"""
+        books = top_books(options['window'], options['top'])
+        quantities = range(1, max(options['max_quantity'], 1) + 1)
+
+        self.stdout.write(f'Rendering PDFs for {len(books)} books...')
+        rendered, cached = warm(books, quantities)
+        evicted = evict()
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Rendered {rendered} PDFs ({cached} already cached, {evicted} evicted).'
+        ))
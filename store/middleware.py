@@ -0,0 +1,22 @@
+"""
+Middleware for the store app.
+"""
+
+
+class AnonymousCartMiddleware:
+    """
+    Save changes to the anonymous cookie cart (see store.cart).
+
+    Views and the login merge change the cart held on the request; the
+    cookie is rewritten only when it actually changed.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        cart = getattr(request, '_anonymous_cart', None)
+        if cart is not None:
+            cart.save(response)
+        return response
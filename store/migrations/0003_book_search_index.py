@@ -0,0 +1,52 @@
+from django.db import migrations
+
+
+POSTGRES_DOCUMENT = (
+    "setweight(to_tsvector('english', coalesce(title, '')), 'A') || "
+    "setweight(to_tsvector('english', coalesce(author, '')), 'B') || "
+    "setweight(to_tsvector('english', coalesce(description, '')), 'C')"
+)
+
+
+def create_search_index(apps, schema_editor):
+    """Create the vendor-specific full-text index and backfill it"""
+    vendor = schema_editor.connection.vendor
+
+    if vendor == 'postgresql':
+        schema_editor.execute("ALTER TABLE store_book ADD COLUMN search_vector tsvector")
+        schema_editor.execute(f"UPDATE store_book SET search_vector = {POSTGRES_DOCUMENT}")
+        schema_editor.execute(
+            "CREATE INDEX store_book_search_vector_gin "
+            "ON store_book USING GIN (search_vector)"
+        )
+    elif vendor == 'sqlite':
+        schema_editor.execute(
+            "CREATE VIRTUAL TABLE store_book_fts "
+            "USING fts5(title, author, description, tokenize='porter unicode61')"
+        )
+        schema_editor.execute(
+            "INSERT INTO store_book_fts (rowid, title, author, description) "
+            "SELECT id, title, author, description FROM store_book"
+        )
+
+
+def drop_search_index(apps, schema_editor):
+    """Remove the vendor-specific full-text index"""
+    vendor = schema_editor.connection.vendor
+
+    if vendor == 'postgresql':
+        schema_editor.execute("DROP INDEX IF EXISTS store_book_search_vector_gin")
+        schema_editor.execute("ALTER TABLE store_book DROP COLUMN IF EXISTS search_vector")
+    elif vendor == 'sqlite':
+        schema_editor.execute("DROP TABLE IF EXISTS store_book_fts")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('store', '0002_remove_book_cover_image_url_book_cover_image_and_more'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
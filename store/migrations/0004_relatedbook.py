@@ -0,0 +1,32 @@
+# Generated by Django 4.2.7 on 2026-10-18 04:48
+
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('store', '0003_book_search_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RelatedBook',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('score', models.FloatField(help_text='Cosine similarity between the two books', verbose_name='Similarity Score')),
+                ('rank', models.PositiveSmallIntegerField(help_text='Position in the related list (0 is most similar)', verbose_name='Rank')),
+                ('computed_at', models.DateTimeField(default=django.utils.timezone.now, help_text='Start time of the build run that produced this row', verbose_name='Computed At')),
+                ('book', models.ForeignKey(help_text='The book these recommendations are for', on_delete=django.db.models.deletion.CASCADE, related_name='related_entries', to='store.book', verbose_name='Book')),
+                ('related', models.ForeignKey(help_text='A book similar to the source book', on_delete=django.db.models.deletion.CASCADE, related_name='+', to='store.book', verbose_name='Related Book')),
+            ],
+            options={
+                'verbose_name': 'Related Book',
+                'verbose_name_plural': 'Related Books',
+                'ordering': ['book', 'rank'],
+                'unique_together': {('book', 'rank')},
+            },
+        ),
+    ]
@@ -0,0 +1,99 @@
+# Generated by Django 4.2.7 on 2026-10-18 04:49
+
+from collections import Counter
+from decimal import Decimal
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+DEFAULT_CATEGORIES = [
+    ('Fiction', 'fiction'),
+    ('Non-Fiction', 'non-fiction'),
+    ('Science', 'science'),
+    ('Technology', 'technology'),
+    ('History', 'history'),
+    ('Biography', 'biography'),
+]
+
+
+def price_band_for(price):
+    if price < Decimal('20'):
+        return 'under-20'
+    if price < Decimal('35'):
+        return '20-35'
+    if price < Decimal('50'):
+        return '35-50'
+    return '50-plus'
+
+
+def seed_categories_and_facets(apps, schema_editor):
+    """Create the default categories and the initial facet counts"""
+    Category = apps.get_model('store', 'Category')
+    Book = apps.get_model('store', 'Book')
+    BookFacetCount = apps.get_model('store', 'BookFacetCount')
+
+    for name, slug in DEFAULT_CATEGORIES:
+        Category.objects.get_or_create(slug=slug, defaults={'name': name})
+
+    cells = Counter(
+        (category_id, price_band_for(price), stock_quantity > 0)
+        for category_id, price, stock_quantity in Book.objects.values_list(
+            'category_id', 'price', 'stock_quantity'
+        ).iterator()
+    )
+    BookFacetCount.objects.bulk_create(
+        BookFacetCount(category_id=category_id, price_band=band, in_stock=in_stock, count=count)
+        for (category_id, band, in_stock), count in cells.items()
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('store', '0004_relatedbook'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Category',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100, unique=True, verbose_name='Category Name')),
+                ('slug', models.SlugField(help_text='URL identifier used in catalog filters', max_length=100, unique=True, verbose_name='Slug')),
+            ],
+            options={
+                'verbose_name': 'Category',
+                'verbose_name_plural': 'Categories',
+                'ordering': ['name'],
+            },
+        ),
+        migrations.CreateModel(
+            name='BookFacetCount',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('price_band', models.CharField(max_length=20, verbose_name='Price Band')),
+                ('in_stock', models.BooleanField(verbose_name='In Stock')),
+                ('count', models.IntegerField(default=0, verbose_name='Book Count')),
+                ('category', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='+', to='store.category', verbose_name='Category')),
+            ],
+            options={
+                'verbose_name': 'Book Facet Count',
+                'verbose_name_plural': 'Book Facet Counts',
+            },
+        ),
+        migrations.AddField(
+            model_name='book',
+            name='category',
+            field=models.ForeignKey(blank=True, help_text='The category this book is listed under', null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='books', to='store.category', verbose_name='Category'),
+        ),
+        migrations.AddConstraint(
+            model_name='bookfacetcount',
+            constraint=models.UniqueConstraint(condition=models.Q(('category__isnull', True)), fields=('price_band', 'in_stock'), name='unique_uncategorized_facet'),
+        ),
+        migrations.AlterUniqueTogether(
+            name='bookfacetcount',
+            unique_together={('category', 'price_band', 'in_stock')},
+        ),
+        migrations.RunPython(seed_categories_and_facets, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,37 @@
+from django.db import migrations
+
+
+def create_trigram_indexes(apps, schema_editor):
+    """Create pg_trgm GIN indexes for fuzzy title/author matching"""
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+
+    schema_editor.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    schema_editor.execute(
+        "CREATE INDEX IF NOT EXISTS store_book_title_trgm "
+        "ON store_book USING GIN (title gin_trgm_ops)"
+    )
+    schema_editor.execute(
+        "CREATE INDEX IF NOT EXISTS store_book_author_trgm "
+        "ON store_book USING GIN (author gin_trgm_ops)"
+    )
+
+
+def drop_trigram_indexes(apps, schema_editor):
+    """Drop the pg_trgm indexes (the extension is left installed)"""
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+
+    schema_editor.execute("DROP INDEX IF EXISTS store_book_title_trgm")
+    schema_editor.execute("DROP INDEX IF EXISTS store_book_author_trgm")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('store', '0005_book_category'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_trigram_indexes, drop_trigram_indexes),
+    ]
@@ -0,0 +1,56 @@
+from django.db import migrations, models
+
+
+class AddIndexConcurrentlyIfPostgres(migrations.AddIndex):
+    """
+    AddIndex that builds the index with CREATE INDEX CONCURRENTLY on
+    PostgreSQL, so large catalogs stay writable while it is created.
+    Other databases fall back to a plain CREATE INDEX.
+    """
+
+    def database_forwards(self, app_label, schema_editor, from_state, to_state):
+        if schema_editor.connection.vendor != 'postgresql':
+            return super().database_forwards(app_label, schema_editor, from_state, to_state)
+        model = to_state.apps.get_model(app_label, self.model_name)
+        if self.allow_migrate_model(schema_editor.connection.alias, model):
+            schema_editor.add_index(model, self.index, concurrently=True)
+
+    def database_backwards(self, app_label, schema_editor, from_state, to_state):
+        if schema_editor.connection.vendor != 'postgresql':
+            return super().database_backwards(app_label, schema_editor, from_state, to_state)
+        model = from_state.apps.get_model(app_label, self.model_name)
+        if self.allow_migrate_model(schema_editor.connection.alias, model):
+            schema_editor.remove_index(model, self.index, concurrently=True)
+
+
+class Migration(migrations.Migration):
+
+    # CREATE INDEX CONCURRENTLY cannot run inside a transaction
+    atomic = False
+
+    dependencies = [
+        ('store', '0006_book_trigram_indexes'),
+    ]
+
+    operations = [
+        AddIndexConcurrentlyIfPostgres(
+            model_name='book',
+            index=models.Index(condition=models.Q(('stock_quantity__gt', 0)), fields=['-created_at', '-id'], name='store_book_instock_new_idx'),
+        ),
+        AddIndexConcurrentlyIfPostgres(
+            model_name='book',
+            index=models.Index(condition=models.Q(('stock_quantity__gt', 0)), fields=['title', 'id'], name='store_book_instock_title_idx'),
+        ),
+        AddIndexConcurrentlyIfPostgres(
+            model_name='book',
+            index=models.Index(condition=models.Q(('stock_quantity__gt', 0)), fields=['price', 'id'], name='store_book_instock_price_idx'),
+        ),
+        AddIndexConcurrentlyIfPostgres(
+            model_name='book',
+            index=models.Index(condition=models.Q(('stock_quantity__gt', 0)), fields=['category', '-created_at', '-id'], name='store_book_instock_cat_idx'),
+        ),
+        AddIndexConcurrentlyIfPostgres(
+            model_name='book',
+            index=models.Index(condition=models.Q(('is_featured', True), ('stock_quantity__gt', 0)), fields=['-created_at'], name='store_book_featured_idx'),
+        ),
+    ]
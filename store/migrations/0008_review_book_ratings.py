@@ -0,0 +1,61 @@
+# Generated by Django 4.2.7 on 2026-10-18 04:56
+
+from django.conf import settings
+import django.core.validators
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('store', '0007_book_storefront_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Review',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('rating', models.PositiveSmallIntegerField(choices=[(1, '1 star'), (2, '2 stars'), (3, '3 stars'), (4, '4 stars'), (5, '5 stars')], help_text='Rating from 1 to 5 stars', validators=[django.core.validators.MinValueValidator(1), django.core.validators.MaxValueValidator(5)], verbose_name='Rating')),
+                ('comment', models.TextField(blank=True, help_text='Optional review text', verbose_name='Comment')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Date Posted')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='Last Updated')),
+            ],
+            options={
+                'verbose_name': 'Review',
+                'verbose_name_plural': 'Reviews',
+                'ordering': ['-created_at'],
+            },
+        ),
+        migrations.AddField(
+            model_name='book',
+            name='rating_average',
+            field=models.FloatField(default=0, help_text='rating_sum / rating_count, stored so listings can sort by it', verbose_name='Average Rating'),
+        ),
+        migrations.AddField(
+            model_name='book',
+            name='rating_count',
+            field=models.PositiveIntegerField(default=0, help_text='Number of reviews', verbose_name='Rating Count'),
+        ),
+        migrations.AddField(
+            model_name='book',
+            name='rating_sum',
+            field=models.PositiveIntegerField(default=0, help_text='Sum of all review ratings', verbose_name='Rating Sum'),
+        ),
+        migrations.AddField(
+            model_name='review',
+            name='book',
+            field=models.ForeignKey(help_text='The book being reviewed', on_delete=django.db.models.deletion.CASCADE, related_name='reviews', to='store.book', verbose_name='Book'),
+        ),
+        migrations.AddField(
+            model_name='review',
+            name='user',
+            field=models.ForeignKey(help_text='The user who wrote this review', on_delete=django.db.models.deletion.CASCADE, related_name='reviews', to=settings.AUTH_USER_MODEL, verbose_name='Customer'),
+        ),
+        migrations.AlterUniqueTogether(
+            name='review',
+            unique_together={('user', 'book')},
+        ),
+    ]
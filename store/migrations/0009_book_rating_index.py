@@ -0,0 +1,20 @@
+from django.db import migrations, models
+
+from store.migration_operations import AddIndexConcurrentlyIfPostgres
+
+
+class Migration(migrations.Migration):
+
+    # CREATE INDEX CONCURRENTLY cannot run inside a transaction
+    atomic = False
+
+    dependencies = [
+        ('store', '0008_review_book_ratings'),
+    ]
+
+    operations = [
+        AddIndexConcurrentlyIfPostgres(
+            model_name='book',
+            index=models.Index(condition=models.Q(('stock_quantity__gt', 0)), fields=['-rating_average', '-id'], name='store_book_instock_rating_idx'),
+        ),
+    ]
@@ -0,0 +1,42 @@
+# Generated by Django 4.2.7 on 2026-10-18 04:57
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('store', '0009_book_rating_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BookSales',
+            fields=[
+                ('book', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='sales', serialize=False, to='store.book', verbose_name='Book')),
+                ('quantity_7d', models.PositiveIntegerField(default=0, help_text='Copies sold in the last 7 days', verbose_name='Sold (7 days)')),
+                ('quantity_30d', models.PositiveIntegerField(default=0, help_text='Copies sold in the last 30 days', verbose_name='Sold (30 days)')),
+                ('quantity_total', models.PositiveIntegerField(default=0, help_text='Copies sold since the store opened', verbose_name='Sold (all time)')),
+            ],
+            options={
+                'verbose_name': 'Book Sales',
+                'verbose_name_plural': 'Book Sales',
+                'indexes': [models.Index(fields=['-quantity_7d', 'book'], name='store_sales_7d_idx'), models.Index(fields=['-quantity_30d', 'book'], name='store_sales_30d_idx'), models.Index(fields=['-quantity_total', 'book'], name='store_sales_total_idx')],
+            },
+        ),
+        migrations.CreateModel(
+            name='BookSalesDay',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField(db_index=True, verbose_name='Day')),
+                ('quantity', models.PositiveIntegerField(default=0, verbose_name='Copies Sold')),
+                ('book', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='store.book', verbose_name='Book')),
+            ],
+            options={
+                'verbose_name': 'Book Sales Day',
+                'verbose_name_plural': 'Book Sales Days',
+                'unique_together': {('book', 'day')},
+            },
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 4.2.7 on 2026-10-18 04:59
+
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('store', '0010_booksales'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CoPurchase',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('score', models.FloatField(help_text="Cosine similarity of the two books' order baskets", verbose_name='Score')),
+                ('together', models.PositiveIntegerField(help_text='Number of orders containing both books', verbose_name='Orders Together')),
+                ('rank', models.PositiveSmallIntegerField(help_text='Position in the list (0 is strongest)', verbose_name='Rank')),
+                ('computed_at', models.DateTimeField(default=django.utils.timezone.now, help_text='Start time of the build run that produced this row', verbose_name='Computed At')),
+                ('book', models.ForeignKey(help_text='The book these recommendations are for', on_delete=django.db.models.deletion.CASCADE, related_name='co_purchase_entries', to='store.book', verbose_name='Book')),
+                ('related', models.ForeignKey(help_text='A book often bought together with the source book', on_delete=django.db.models.deletion.CASCADE, related_name='+', to='store.book', verbose_name='Also Bought')),
+            ],
+            options={
+                'verbose_name': 'Co-Purchase',
+                'verbose_name_plural': 'Co-Purchases',
+                'ordering': ['book', 'rank'],
+                'unique_together': {('book', 'rank')},
+            },
+        ),
+    ]
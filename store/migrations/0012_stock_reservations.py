@@ -0,0 +1,42 @@
+# Generated by Django 4.2.7 on 2026-10-18 05:14
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('store', '0011_copurchase'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ReservedStock',
+            fields=[
+                ('book', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='reserved_stock', serialize=False, to='store.book', verbose_name='Book')),
+                ('quantity', models.PositiveIntegerField(default=0, verbose_name='Copies Reserved')),
+            ],
+            options={
+                'verbose_name': 'Reserved Stock',
+                'verbose_name_plural': 'Reserved Stock',
+            },
+        ),
+        migrations.CreateModel(
+            name='StockReservation',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('quantity', models.PositiveIntegerField(default=0, verbose_name='Copies Held')),
+                ('expires_at', models.DateTimeField(db_index=True, verbose_name='Expires At')),
+                ('book', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='reservations', to='store.book', verbose_name='Book')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='stock_reservations', to=settings.AUTH_USER_MODEL, verbose_name='Customer')),
+            ],
+            options={
+                'verbose_name': 'Stock Reservation',
+                'verbose_name_plural': 'Stock Reservations',
+                'unique_together': {('user', 'book')},
+            },
+        ),
+    ]
@@ -12,6 +12,39 @@ from django.utils import timezone
 from decimal import Decimal
 
 
+# Book fields written only by store.reviews (see Book.save)
+RATING_FIELDS = ('rating_sum', 'rating_count', 'rating_average')
+
+
+class Category(models.Model):
+    """
+    Model representing a book category.
+
+    Used for filtering the catalog and for category facet counts.
+    """
+
+    name = models.CharField(
+        max_length=100,
+        unique=True,
+        verbose_name="Category Name"
+    )
+
+    slug = models.SlugField(
+        max_length=100,
+        unique=True,
+        verbose_name="Slug",
+        help_text="URL identifier used in catalog filters"
+    )
+
+    class Meta:
+        ordering = ['name']
+        verbose_name = "Category"
+        verbose_name_plural = "Categories"
+
+    def __str__(self):
+        return self.name
+
+
 class Book(models.Model):
     """
     Model representing a book in the bookstore.
@@ -44,6 +77,16 @@ class Book(models.Model):
         help_text="Detailed description of the book content"
     )
 
+    category = models.ForeignKey(
+        Category,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='books',
+        verbose_name="Category",
+        help_text="The category this book is listed under"
+    )
+
     price = models.DecimalField(
         max_digits=10,
         decimal_places=2,
@@ -90,14 +133,86 @@ class Book(models.Model):
         help_text="Mark this book as featured on homepage"
     )
 
+    # Rating aggregates, maintained incrementally by Review signal
+    # handlers (see store.reviews) so listings never run AVG()
+    rating_sum = models.PositiveIntegerField(
+        default=0,
+        verbose_name="Rating Sum",
+        help_text="Sum of all review ratings"
+    )
+
+    rating_count = models.PositiveIntegerField(
+        default=0,
+        verbose_name="Rating Count",
+        help_text="Number of reviews"
+    )
+
+    rating_average = models.FloatField(
+        default=0,
+        verbose_name="Average Rating",
+        help_text="rating_sum / rating_count, stored so listings can sort by it"
+    )
+
     class Meta:
         ordering = ['-created_at']
         verbose_name = "Book"
         verbose_name_plural = "Books"
+        # Storefront queries only ever list in-stock books, so the
+        # listing indexes are partial on that condition and end on id to
+        # match the keyset pagination ordering
+        indexes = [
+            models.Index(
+                fields=['-created_at', '-id'],
+                condition=models.Q(stock_quantity__gt=0),
+                name='store_book_instock_new_idx',
+            ),
+            models.Index(
+                fields=['title', 'id'],
+                condition=models.Q(stock_quantity__gt=0),
+                name='store_book_instock_title_idx',
+            ),
+            models.Index(
+                fields=['price', 'id'],
+                condition=models.Q(stock_quantity__gt=0),
+                name='store_book_instock_price_idx',
+            ),
+            models.Index(
+                fields=['category', '-created_at', '-id'],
+                condition=models.Q(stock_quantity__gt=0),
+                name='store_book_instock_cat_idx',
+            ),
+            models.Index(
+                fields=['-created_at'],
+                condition=models.Q(is_featured=True, stock_quantity__gt=0),
+                name='store_book_featured_idx',
+            ),
+            models.Index(
+                fields=['-rating_average', '-id'],
+                condition=models.Q(stock_quantity__gt=0),
+                name='store_book_instock_rating_idx',
+            ),
+        ]
 
     def __str__(self):
         return f"{self.title} by {self.author}"
 
+    def save(self, *args, **kwargs):
+        """
+        Save the book, leaving its rating aggregates alone.
+
+        Only store.reviews writes the aggregates, with F() deltas. A full
+        save of a loaded book would write back the values it was loaded
+        with and lose any review saved in the meantime, so full saves of
+        existing rows skip RATING_FIELDS.
+        """
+        full_update = not self._state.adding and not kwargs.get('force_insert')
+        if full_update and kwargs.get('update_fields') is None:
+            kwargs['update_fields'] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key and field.name not in RATING_FIELDS
+            ]
+        super().save(*args, **kwargs)
+
     @property
     def is_in_stock(self):
         """Check if book is available in stock"""
@@ -105,8 +220,307 @@ class Book(models.Model):
 
     @property
     def average_rating(self):
-        """Calculate average rating (placeholder for future feature)"""
-        return 0  # TODO: Implement when review system is added
+        """Average review rating rounded to one decimal (0 if unrated)"""
+        return round(self.rating_average, 1)
+
+
+class RelatedBook(models.Model):
+    """
+    Model storing precomputed "related books" for a book.
+
+    Rows are produced offline by the build_related_books command from
+    TF-IDF similarity over title, author and description, so the
+    detail page only needs a single indexed lookup.
+    """
+
+    book = models.ForeignKey(
+        Book,
+        on_delete=models.CASCADE,
+        related_name='related_entries',
+        verbose_name="Book",
+        help_text="The book these recommendations are for"
+    )
+
+    related = models.ForeignKey(
+        Book,
+        on_delete=models.CASCADE,
+        related_name='+',
+        verbose_name="Related Book",
+        help_text="A book similar to the source book"
+    )
+
+    score = models.FloatField(
+        verbose_name="Similarity Score",
+        help_text="Cosine similarity between the two books"
+    )
+
+    rank = models.PositiveSmallIntegerField(
+        verbose_name="Rank",
+        help_text="Position in the related list (0 is most similar)"
+    )
+
+    computed_at = models.DateTimeField(
+        default=timezone.now,
+        verbose_name="Computed At",
+        help_text="Start time of the build run that produced this row"
+    )
+
+    class Meta:
+        ordering = ['book', 'rank']
+        unique_together = ('book', 'rank')
+        verbose_name = "Related Book"
+        verbose_name_plural = "Related Books"
+
+    def __str__(self):
+        return f"{self.book.title} -> {self.related.title} ({self.score:.3f})"
+
+
+class CoPurchase(models.Model):
+    """
+    Model storing precomputed "customers also bought" books.
+
+    Rows are produced offline by the build_co_purchases command from
+    how often two books appear in the same order, so the detail and
+    cart pages only need a single indexed lookup.
+    """
+
+    book = models.ForeignKey(
+        Book,
+        on_delete=models.CASCADE,
+        related_name='co_purchase_entries',
+        verbose_name="Book",
+        help_text="The book these recommendations are for"
+    )
+
+    related = models.ForeignKey(
+        Book,
+        on_delete=models.CASCADE,
+        related_name='+',
+        verbose_name="Also Bought",
+        help_text="A book often bought together with the source book"
+    )
+
+    score = models.FloatField(
+        verbose_name="Score",
+        help_text="Cosine similarity of the two books' order baskets"
+    )
+
+    together = models.PositiveIntegerField(
+        verbose_name="Orders Together",
+        help_text="Number of orders containing both books"
+    )
+
+    rank = models.PositiveSmallIntegerField(
+        verbose_name="Rank",
+        help_text="Position in the list (0 is strongest)"
+    )
+
+    computed_at = models.DateTimeField(
+        default=timezone.now,
+        verbose_name="Computed At",
+        help_text="Start time of the build run that produced this row"
+    )
+
+    class Meta:
+        ordering = ['book', 'rank']
+        unique_together = ('book', 'rank')
+        verbose_name = "Co-Purchase"
+        verbose_name_plural = "Co-Purchases"
+
+    def __str__(self):
+        return f"{self.book.title} -> {self.related.title} ({self.score:.3f})"
+
+
+class BookFacetCount(models.Model):
+    """
+    Materialized book counts per (category, price band, stock status).
+
+    Kept up to date by Book signal handlers so that catalog facet
+    counts are read from this small table instead of running GROUP BY
+    over every book on each listing request.
+    """
+
+    category = models.ForeignKey(
+        Category,
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        related_name='+',
+        verbose_name="Category"
+    )
+
+    price_band = models.CharField(
+        max_length=20,
+        verbose_name="Price Band"
+    )
+
+    in_stock = models.BooleanField(
+        verbose_name="In Stock"
+    )
+
+    count = models.IntegerField(
+        default=0,
+        verbose_name="Book Count"
+    )
+
+    class Meta:
+        unique_together = ('category', 'price_band', 'in_stock')
+        constraints = [
+            # NULLs are distinct in unique indexes, so uncategorized
+            # books need their own constraint
+            models.UniqueConstraint(
+                fields=['price_band', 'in_stock'],
+                condition=models.Q(category__isnull=True),
+                name='unique_uncategorized_facet',
+            ),
+        ]
+        verbose_name = "Book Facet Count"
+        verbose_name_plural = "Book Facet Counts"
+
+    def __str__(self):
+        return f"{self.category or 'Uncategorized'} / {self.price_band} / {self.in_stock}: {self.count}"
+
+
+class BookSales(models.Model):
+    """
+    Per-book sales counters for the bestseller shelves.
+
+    Checkout increments the counters together with the order, and the
+    rolling 7- and 30-day windows are recomputed daily from
+    BookSalesDay buckets (see store.bestsellers), so bestseller shelves
+    are a single indexed top-N query.
+    """
+
+    book = models.OneToOneField(
+        Book,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='sales',
+        verbose_name="Book"
+    )
+
+    quantity_7d = models.PositiveIntegerField(
+        default=0,
+        verbose_name="Sold (7 days)",
+        help_text="Copies sold in the last 7 days"
+    )
+
+    quantity_30d = models.PositiveIntegerField(
+        default=0,
+        verbose_name="Sold (30 days)",
+        help_text="Copies sold in the last 30 days"
+    )
+
+    quantity_total = models.PositiveIntegerField(
+        default=0,
+        verbose_name="Sold (all time)",
+        help_text="Copies sold since the store opened"
+    )
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['-quantity_7d', 'book'], name='store_sales_7d_idx'),
+            models.Index(fields=['-quantity_30d', 'book'], name='store_sales_30d_idx'),
+            models.Index(fields=['-quantity_total', 'book'], name='store_sales_total_idx'),
+        ]
+        verbose_name = "Book Sales"
+        verbose_name_plural = "Book Sales"
+
+    def __str__(self):
+        return f"{self.book.title}: {self.quantity_7d} / {self.quantity_30d} / {self.quantity_total}"
+
+
+class BookSalesDay(models.Model):
+    """
+    Copies of a book sold on one day.
+
+    Only the last 30 days are kept; they are what the rolling windows
+    in BookSales are recomputed from.
+    """
+
+    book = models.ForeignKey(
+        Book,
+        on_delete=models.CASCADE,
+        related_name='+',
+        verbose_name="Book"
+    )
+
+    day = models.DateField(
+        db_index=True,
+        verbose_name="Day"
+    )
+
+    quantity = models.PositiveIntegerField(
+        default=0,
+        verbose_name="Copies Sold"
+    )
+
+    class Meta:
+        unique_together = ('book', 'day')
+        verbose_name = "Book Sales Day"
+        verbose_name_plural = "Book Sales Days"
+
+    def __str__(self):
+        return f"{self.book.title} on {self.day}: {self.quantity}"
+
+
+class Review(models.Model):
+    """
+    Model representing a customer's review of a book.
+
+    Each user can review a book once. Saving or deleting a review
+    updates the book's rating aggregates in the same transaction.
+    """
+
+    RATING_CHOICES = [(i, f"{i} star{'s' if i > 1 else ''}") for i in range(1, 6)]
+
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='reviews',
+        verbose_name="Customer",
+        help_text="The user who wrote this review"
+    )
+
+    book = models.ForeignKey(
+        Book,
+        on_delete=models.CASCADE,
+        related_name='reviews',
+        verbose_name="Book",
+        help_text="The book being reviewed"
+    )
+
+    rating = models.PositiveSmallIntegerField(
+        choices=RATING_CHOICES,
+        validators=[MinValueValidator(1), MaxValueValidator(5)],
+        verbose_name="Rating",
+        help_text="Rating from 1 to 5 stars"
+    )
+
+    comment = models.TextField(
+        blank=True,
+        verbose_name="Comment",
+        help_text="Optional review text"
+    )
+
+    created_at = models.DateTimeField(
+        auto_now_add=True,
+        verbose_name="Date Posted"
+    )
+
+    updated_at = models.DateTimeField(
+        auto_now=True,
+        verbose_name="Last Updated"
+    )
+
+    class Meta:
+        ordering = ['-created_at']
+        unique_together = ('user', 'book')
+        verbose_name = "Review"
+        verbose_name_plural = "Reviews"
+
+    def __str__(self):
+        return f"{self.user.username} - {self.book.title} ({self.rating}/5)"
 
 
 class CartItem(models.Model):
@@ -156,6 +570,80 @@ class CartItem(models.Model):
         return self.book.price * self.quantity
 
 
+class StockReservation(models.Model):
+    """
+    A time-limited hold on copies of a book for one user's cart.
+
+    Adding a book to the cart reserves the copies, so they can't be
+    sold to someone else while the customer checks out. Holds expire
+    after a few minutes unless the cart is touched again, and expired
+    holds are released in bulk by the sweep_reservations command.
+    """
+
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='stock_reservations',
+        verbose_name="Customer"
+    )
+
+    book = models.ForeignKey(
+        Book,
+        on_delete=models.CASCADE,
+        related_name='reservations',
+        verbose_name="Book"
+    )
+
+    quantity = models.PositiveIntegerField(
+        default=0,
+        verbose_name="Copies Held"
+    )
+
+    expires_at = models.DateTimeField(
+        db_index=True,
+        verbose_name="Expires At"
+    )
+
+    class Meta:
+        unique_together = ('user', 'book')
+        verbose_name = "Stock Reservation"
+        verbose_name_plural = "Stock Reservations"
+
+    def __str__(self):
+        return f"{self.user.username} holds {self.quantity} x {self.book.title}"
+
+
+class ReservedStock(models.Model):
+    """
+    Copies of a book currently held by StockReservation rows.
+
+    Maintained together with the reservations (see store.reservations)
+    so available stock is ``stock_quantity - quantity`` instead of a SUM
+    over reservations. Kept out of the Book row so that saving a book
+    can never overwrite the counter with a stale value.
+    """
+
+    book = models.OneToOneField(
+        Book,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='reserved_stock',
+        verbose_name="Book"
+    )
+
+    quantity = models.PositiveIntegerField(
+        default=0,
+        verbose_name="Copies Reserved"
+    )
+
+    class Meta:
+        verbose_name = "Reserved Stock"
+        verbose_name_plural = "Reserved Stock"
+
+    def __str__(self):
+        return f"{self.book.title}: {self.quantity} reserved"
+
+
 class Order(models.Model):
     """
     Model representing a customer's order.
@@ -305,6 +793,85 @@ class OrderItem(models.Model):
         return self.price * self.quantity
 
 
+class OutboxEmail(models.Model):
+    """
+    A transactional email waiting to be delivered.
+
+    Written in the same transaction as the change that triggers it (an
+    order, for instance), so the email is sent if and only if that
+    change commits. The deliver_emails worker sends pending rows in
+    batches and retries failures with exponential backoff.
+    """
+
+    KIND_CHOICES = [
+        ('order_confirmation', 'Order Confirmation'),
+    ]
+
+    STATUS_CHOICES = [
+        ('pending', 'Pending'),
+        ('sent', 'Sent'),
+        ('failed', 'Failed'),
+    ]
+
+    kind = models.CharField(
+        max_length=30,
+        choices=KIND_CHOICES,
+        verbose_name="Kind"
+    )
+
+    order = models.ForeignKey(
+        Order,
+        on_delete=models.CASCADE,
+        related_name='outbox_emails',
+        verbose_name="Order"
+    )
+
+    status = models.CharField(
+        max_length=10,
+        choices=STATUS_CHOICES,
+        default='pending',
+        verbose_name="Status"
+    )
+
+    attempts = models.PositiveIntegerField(
+        default=0,
+        verbose_name="Attempts"
+    )
+
+    next_attempt_at = models.DateTimeField(
+        default=timezone.now,
+        verbose_name="Next Attempt",
+        help_text="Pending emails are not sent before this time"
+    )
+
+    last_error = models.TextField(
+        blank=True,
+        verbose_name="Last Error"
+    )
+
+    created_at = models.DateTimeField(
+        auto_now_add=True,
+        verbose_name="Queued At"
+    )
+
+    sent_at = models.DateTimeField(
+        null=True,
+        blank=True,
+        verbose_name="Sent At"
+    )
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['status', 'next_attempt_at'], name='store_outbox_due_idx'),
+        ]
+        ordering = ['-created_at']
+        verbose_name = "Outbox Email"
+        verbose_name_plural = "Outbox Emails"
+
+    def __str__(self):
+        return f"{self.get_kind_display()} for {self.order.order_number} ({self.status})"
+
+
 class UserProfile(models.Model):
     """
     Extended user profile model.
@@ -0,0 +1,324 @@
+"""
+Keyset (cursor) pagination for the store's listing pages.
+
+Offset pagination gets linearly slower on deep pages because the
+database has to walk and discard every skipped row. Keyset pagination
+instead remembers the sort key of the last row shown and seeks past it,
+so page 10,000 costs the same as page 2.
+"""
+
+import hashlib
+import json
+from datetime import datetime
+from decimal import Decimal
+
+from django.core import signing
+from django.core.cache import cache
+from django.core.paginator import Paginator
+from django.db import connection
+from django.db.models import Q
+from django.utils.functional import cached_property
+
+from .caching import catalog_cache_key
+
+
+CURSOR_SALT = 'store.pagination.cursor'
+COUNT_CACHE_TIMEOUT = 60 * 10  # 10 minutes
+ESTIMATE_THRESHOLD = 100000
+
+
+def estimate_count(queryset):
+    """
+    Return the planner's row estimate for a queryset, or None.
+
+    Only PostgreSQL exposes a usable estimate; on other databases the
+    caller has to fall back to an exact COUNT(*).
+    """
+    if connection.vendor != 'postgresql':
+        return None
+
+    plan = json.loads(queryset.order_by().explain(format='json'))
+    return int(plan[0]['Plan']['Plan Rows'])
+
+
+def count_queryset(queryset, use_cache=False):
+    """
+    Count a queryset, returning ``(count, is_exact)``.
+
+    With ``use_cache`` the result is stored under a key tied to the
+    catalog version, so Book writes invalidate it. Result sets the
+    planner expects to be larger than ESTIMATE_THRESHOLD use the
+    estimate instead of scanning every row for an exact count.
+    """
+    if not use_cache:
+        return queryset.count(), True
+
+    sql, params = queryset.order_by().query.sql_with_params()
+    digest = hashlib.md5(f'{sql}|{params!r}'.encode()).hexdigest()
+    key = catalog_cache_key('count', digest)
+
+    cached = cache.get(key)
+    if cached is not None:
+        return tuple(cached)
+
+    estimate = estimate_count(queryset)
+    if estimate is not None and estimate > ESTIMATE_THRESHOLD:
+        result = (estimate, False)
+    else:
+        result = (queryset.count(), True)
+
+    cache.set(key, result, COUNT_CACHE_TIMEOUT)
+    return result
+
+
+class CachedCountPaginator(Paginator):
+    """
+    Django paginator whose total count goes through count_queryset().
+
+    ``count_is_exact`` tells templates whether to show the count as an
+    approximation.
+    """
+
+    def __init__(self, object_list, per_page, cache_count=False, **kwargs):
+        super().__init__(object_list, per_page, **kwargs)
+        self.cache_count = cache_count
+
+    @cached_property
+    def count_info(self):
+        return count_queryset(self.object_list, self.cache_count)
+
+    @property
+    def count(self):
+        return self.count_info[0]
+
+    @property
+    def count_is_exact(self):
+        return self.count_info[1]
+
+
+class KeysetPage:
+    """
+    A single page of keyset-paginated results.
+
+    Mirrors the parts of Django's ``Page`` API that the templates use.
+    """
+
+    def __init__(self, object_list, number, paginator, has_next, has_previous):
+        self.object_list = object_list
+        self.number = number
+        self.paginator = paginator
+        self._has_next = has_next
+        self._has_previous = has_previous
+
+    def __repr__(self):
+        return f'<KeysetPage {self.number}>'
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __getitem__(self, index):
+        return self.object_list[index]
+
+    def has_next(self):
+        return self._has_next
+
+    def has_previous(self):
+        return self._has_previous
+
+    def has_other_pages(self):
+        return self._has_next or self._has_previous
+
+
+class KeysetPaginator:
+    """
+    Paginate a queryset by seeking on its ordering columns.
+
+    ``ordering`` must end with a unique column (normally ``id``) so that
+    every row has a distinct position. Cursors are signed, opaque tokens
+    holding the sort key of the boundary row, the direction to move in
+    and the resulting page number.
+    """
+
+    def __init__(self, queryset, per_page, ordering, cache_count=False):
+        self.queryset = queryset.order_by(*ordering)
+        self.per_page = int(per_page)
+        self.ordering = tuple(ordering)
+        self.cache_count = cache_count
+        self.fields = [
+            (field.lstrip('-'), field.startswith('-'))
+            for field in self.ordering
+        ]
+
+    @cached_property
+    def count_info(self):
+        """Total count, only evaluated if a template asks for it"""
+        return count_queryset(self.queryset, self.cache_count)
+
+    @property
+    def count(self):
+        return self.count_info[0]
+
+    @property
+    def count_is_exact(self):
+        return self.count_info[1]
+
+    # Cursor encoding
+
+    def encode_cursor(self, obj, direction, number):
+        """
+        Build an opaque cursor pointing before/after ``obj``, which may
+        be a model instance or a ``values()`` dict.
+        """
+        if isinstance(obj, dict):
+            values = [encode_value(obj[field]) for field, _ in self.fields]
+        else:
+            values = [encode_value(getattr(obj, field)) for field, _ in self.fields]
+        return signing.dumps(
+            {'o': self.ordering, 'v': values, 'd': direction, 'n': number},
+            salt=CURSOR_SALT,
+            compress=True,
+        )
+
+    def decode_cursor(self, token):
+        """Return the cursor payload, or None if it is invalid or stale"""
+        try:
+            payload = signing.loads(token, salt=CURSOR_SALT)
+        except signing.BadSignature:
+            return None
+
+        if tuple(payload.get('o', ())) != self.ordering:
+            return None
+        if payload.get('d') not in ('next', 'prev'):
+            return None
+        if len(payload.get('v', ())) != len(self.fields):
+            return None
+        if not isinstance(payload.get('n'), int) or payload['n'] < 1:
+            return None
+        return payload
+
+    def next_cursor(self, page):
+        """Cursor for the page after ``page``"""
+        if not page.has_next() or not len(page):
+            return None
+        return self.encode_cursor(page[-1], 'next', page.number + 1)
+
+    def previous_cursor(self, page):
+        """Cursor for the page before ``page``"""
+        if not page.has_previous() or not len(page):
+            return None
+        return self.encode_cursor(page[0], 'prev', max(page.number - 1, 1))
+
+    # Page lookup
+
+    def _seek_filter(self, values, reverse):
+        """
+        Build the row-value comparison ``(a, b, id) > (x, y, z)``.
+
+        Spelled out as ``a > x OR (a = x AND b > y) OR ...`` so it works
+        with mixed sort directions on every database.
+        """
+        condition = Q()
+        equal = {}
+        for (field, descending), value in zip(self.fields, values):
+            lookup = 'lt' if descending != reverse else 'gt'
+            condition |= Q(**equal, **{f'{field}__{lookup}': value})
+            equal[field] = value
+        return condition
+
+    def get_page(self, token=None):
+        """Return the page a cursor points at (first page if missing)"""
+        payload = self.decode_cursor(token) if token else None
+
+        if payload is None:
+            rows = list(self.queryset[:self.per_page + 1])
+            return KeysetPage(
+                rows[:self.per_page], 1, self,
+                has_next=len(rows) > self.per_page,
+                has_previous=False,
+            )
+
+        if payload['d'] == 'next':
+            rows = list(
+                self.queryset.filter(self._seek_filter(payload['v'], reverse=False))
+                [:self.per_page + 1]
+            )
+            return KeysetPage(
+                rows[:self.per_page], payload['n'], self,
+                has_next=len(rows) > self.per_page,
+                has_previous=True,
+            )
+
+        # Walk backwards from the cursor, then restore display order
+        reversed_ordering = [
+            field[1:] if field.startswith('-') else f'-{field}'
+            for field in self.ordering
+        ]
+        rows = list(
+            self.queryset.filter(self._seek_filter(payload['v'], reverse=True))
+            .order_by(*reversed_ordering)[:self.per_page + 1]
+        )
+        has_previous = len(rows) > self.per_page
+        rows = rows[:self.per_page]
+        rows.reverse()
+        return KeysetPage(
+            rows, payload['n'] if has_previous else 1, self,
+            has_next=True,
+            has_previous=has_previous,
+        )
+
+
+def encode_value(value):
+    """Make a sort key value JSON serialisable"""
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return str(value)
+    return value
+
+
+def paginate(request, queryset, per_page, ordering, cache_count=False):
+    """
+    Paginate a queryset for a listing page.
+
+    Uses keyset pagination when the request carries a ``cursor``
+    parameter and classic page numbers otherwise. Previous/next links
+    are always cursors so that walking through a listing never needs
+    an OFFSET. With ``cache_count`` the total count is cached per catalog
+    version and may be a planner estimate (see count_queryset).
+
+    Returns ``(paginator, page, context)`` where ``context`` holds the
+    extra variables used by ``store/includes/pagination.html``.
+    """
+    keyset = KeysetPaginator(queryset, per_page, ordering, cache_count)
+    cursor = request.GET.get('cursor')
+
+    if cursor:
+        paginator = keyset
+        page = keyset.get_page(cursor)
+        page_range = None
+    else:
+        paginator = CachedCountPaginator(keyset.queryset, per_page, cache_count)
+        page = paginator.get_page(request.GET.get('page'))
+        page_range = list(
+            paginator.get_elided_page_range(page.number, on_each_side=2, on_ends=1)
+        )
+
+    context = {
+        'next_cursor': keyset.next_cursor(page),
+        'previous_cursor': keyset.previous_cursor(page),
+        'page_range': page_range,
+        'ellipsis': Paginator.ELLIPSIS,
+        'base_querystring': base_querystring(request),
+    }
+    return paginator, page, context
+
+
+def base_querystring(request):
+    """The request's query string without its pagination parameters"""
+    params = request.GET.copy()
+    params.pop('page', None)
+    params.pop('cursor', None)
+    return params.urlencode()
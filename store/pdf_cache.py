@@ -0,0 +1,208 @@
+"""
+Content-addressed disk cache for generated eBook placeholder PDFs.
+
+A placeholder PDF only depends on the book's details and the quantity
+ordered, so it is rendered once and stored under a hash of (book id,
+``updated_at``, quantity, PDF_TEMPLATE_VERSION). Editing the book
+changes ``updated_at`` and bumping PDF_TEMPLATE_VERSION after changing
+the layout changes every key, so stale files are never served; they
+just age out.
+
+Files live in ``settings.PDF_CACHE_DIR``, sharded by the first two hex
+digits of the key, and are written atomically. A hit refreshes the
+file's mtime, and once enough new bytes have been written the cache is
+trimmed back below ``settings.PDF_CACHE_MAX_BYTES`` by deleting the
+least recently used files. Losing the directory only costs re-renders.
+"""
+
+import hashlib
+import os
+import tempfile
+from io import BytesIO
+
+from django.conf import settings
+from reportlab.lib.pagesizes import letter
+from reportlab.pdfgen import canvas
+
+
+PDF_TEMPLATE_VERSION = 1  # bump when render_placeholder_pdf() output changes
+EVICT_LOW_WATER = 0.9  # trim to this fraction of the size limit
+EVICT_CHECK_FRACTION = 0.1  # rescan after writing this fraction of the limit
+
+_written_since_check = 0
+
+
+def cache_key(book, quantity):
+    """Return the cache key of a book's placeholder PDF"""
+    updated_at = book.updated_at.isoformat() if book.updated_at else ''
+    raw = f'{book.pk}:{updated_at}:{quantity}:{PDF_TEMPLATE_VERSION}'
+    return hashlib.sha256(raw.encode()).hexdigest()
+
+
+def cache_path(key):
+    return os.path.join(settings.PDF_CACHE_DIR, key[:2], f'{key}.pdf')
+
+
+def render_placeholder_pdf(book, quantity):
+    """
+    Render a placeholder PDF file for eBook delivery.
+
+    Generates a simple PDF with book information and returns its bytes.
+    """
+    # Create PDF in memory
+    buffer = BytesIO()
+    pdf = canvas.Canvas(buffer, pagesize=letter)
+
+    # Add content to PDF
+    pdf.setFont("Helvetica-Bold", 16)
+    pdf.drawString(100, 750, f"eBook: {book.title}")
+
+    pdf.setFont("Helvetica", 12)
+    pdf.drawString(100, 720, f"Author: {book.author}")
+    pdf.drawString(100, 700, f"ISBN: {book.isbn}")
+    pdf.drawString(100, 680, f"Quantity: {quantity}")
+
+    pdf.drawString(100, 640, "Thank you for your purchase!")
+    pdf.drawString(100, 620, "This is a placeholder PDF file.")
+    pdf.drawString(100, 600, "In a real bookstore, this would be the actual eBook.")
+
+    pdf.drawString(100, 560, "Book Description:")
+
+    # Add description with line wrapping
+    description = book.description
+    lines = []
+    words = description.split()
+    current_line = ""
+
+    for word in words:
+        if len(current_line + word) < 70:
+            current_line += word + " "
+        else:
+            lines.append(current_line.strip())
+            current_line = word + " "
+
+    if current_line:
+        lines.append(current_line.strip())
+
+    y_position = 540
+    for line in lines[:10]:  # Limit to 10 lines
+        pdf.drawString(100, y_position, line)
+        y_position -= 20
+
+    pdf.save()
+    return buffer.getvalue()
+
+
+def read_cached(key):
+    """Return the cached bytes for ``key``, or None on a miss"""
+    path = cache_path(key)
+    try:
+        with open(path, 'rb') as f:
+            data = f.read()
+    except FileNotFoundError:
+        return None
+    try:
+        # Mark as recently used for eviction
+        os.utime(path)
+    except OSError:
+        pass
+    return data
+
+
+def write_cached(key, data):
+    """Store ``data`` under ``key`` atomically; errors are ignored"""
+    global _written_since_check
+
+    path = cache_path(key)
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+    except OSError:
+        # A read-only or full disk only costs re-renders
+        return
+
+    _written_since_check += len(data)
+    if _written_since_check >= settings.PDF_CACHE_MAX_BYTES * EVICT_CHECK_FRACTION:
+        evict()
+
+
+def placeholder_pdf_bytes(book, quantity):
+    """Return a book's placeholder PDF, rendering it on a cache miss"""
+    key = cache_key(book, quantity)
+    data = read_cached(key)
+    if data is None:
+        data = render_placeholder_pdf(book, quantity)
+        write_cached(key, data)
+    return data
+
+
+def evict(max_bytes=None):
+    """
+    Trim the cache to below ``max_bytes`` (default PDF_CACHE_MAX_BYTES).
+
+    Deletes the least recently used files until the total size is under
+    EVICT_LOW_WATER of the limit. Returns the number of files deleted.
+    """
+    global _written_since_check
+    _written_since_check = 0
+
+    if max_bytes is None:
+        max_bytes = settings.PDF_CACHE_MAX_BYTES
+
+    files = []
+    total = 0
+    try:
+        shards = list(os.scandir(settings.PDF_CACHE_DIR))
+    except FileNotFoundError:
+        return 0
+    for shard in shards:
+        if not shard.is_dir():
+            continue
+        for entry in os.scandir(shard.path):
+            try:
+                stat = entry.stat()
+            except FileNotFoundError:
+                continue
+            files.append((stat.st_mtime, stat.st_size, entry.path))
+            total += stat.st_size
+
+    if total <= max_bytes:
+        return 0
+
+    deleted = 0
+    target = max_bytes * EVICT_LOW_WATER
+    for _, size, path in sorted(files):
+        if total <= target:
+            break
+        try:
+            os.unlink(path)
+        except FileNotFoundError:
+            pass
+        total -= size
+        deleted += 1
+    return deleted
+
+
+def warm(books, quantities=(1,)):
+    """
+    Render any missing PDFs for ``books`` at each of ``quantities``.
+
+    Returns ``(rendered, already_cached)`` counts.
+    """
+    rendered = cached = 0
+    for book in books:
+        for quantity in quantities:
+            key = cache_key(book, quantity)
+            if os.path.exists(cache_path(key)):
+                cached += 1
+                continue
+            write_cached(key, render_placeholder_pdf(book, quantity))
+            rendered += 1
+    return rendered, cached
@@ -0,0 +1,398 @@
+"""
+Offline builders for book recommendations.
+
+These builders run from management commands, never from web requests,
+and precompute recommendation tables so that pages only need a single
+indexed lookup. They use NumPy and SciPy sparse matrices to keep the
+similarity computations vectorised and memory-bounded.
+
+- Related books: TF-IDF similarity over title, author and description.
+- Co-purchases: cosine similarity of the sets of orders containing
+  each book ("customers also bought").
+"""
+
+import math
+from collections import Counter
+
+import numpy as np
+from scipy import sparse
+
+from django.db import transaction
+from django.db.models import Count, Max, Min
+from django.utils import timezone
+
+from .models import Book, CoPurchase, OrderItem, RelatedBook
+from .search import normalize_terms
+
+
+STOP_WORDS = frozenset({
+    'a', 'an', 'and', 'are', 'as', 'at', 'be', 'by', 'for', 'from', 'how',
+    'in', 'into', 'is', 'it', 'its', 'learn', 'of', 'on', 'or', 'that',
+    'the', 'this', 'to', 'with', 'you', 'your',
+})
+
+# Relative importance of each field in the document vector
+TITLE_WEIGHT = 2.0
+AUTHOR_WEIGHT = 3.0
+DESCRIPTION_WEIGHT = 1.0
+
+# Terms that appear in fewer books than this can never link two books
+MIN_DOCUMENT_FREQUENCY = 2
+
+
+def book_terms(title, author, description):
+    """Return weighted term frequencies for a single book"""
+    terms = Counter()
+    for token in normalize_terms(title):
+        if token not in STOP_WORDS:
+            terms[token] += TITLE_WEIGHT
+    # Authors are matched as whole names, not as individual words
+    author_key = ' '.join(normalize_terms(author))
+    if author_key:
+        terms[f'author:{author_key}'] += AUTHOR_WEIGHT
+    for token in normalize_terms(description):
+        if token not in STOP_WORDS:
+            terms[token] += DESCRIPTION_WEIGHT
+    return terms
+
+
+def build_tfidf_matrix():
+    """
+    Build an L2-normalised TF-IDF matrix over every book.
+
+    Returns ``(book_ids, matrix)`` where row ``i`` of the CSR matrix is
+    the document vector for ``book_ids[i]``.
+    """
+    book_ids = []
+    documents = []
+    document_frequency = Counter()
+
+    rows = Book.objects.order_by('id').values_list('id', 'title', 'author', 'description')
+    for book_id, title, author, description in rows.iterator(chunk_size=2000):
+        terms = book_terms(title, author, description)
+        book_ids.append(book_id)
+        documents.append(terms)
+        document_frequency.update(terms.keys())
+
+    vocabulary = {}
+    total = len(documents)
+    for term, frequency in document_frequency.items():
+        if frequency >= MIN_DOCUMENT_FREQUENCY:
+            vocabulary[term] = len(vocabulary)
+
+    indptr = [0]
+    indices = []
+    data = []
+    for terms in documents:
+        for term, weight in terms.items():
+            column = vocabulary.get(term)
+            if column is None:
+                continue
+            idf = math.log((1 + total) / (1 + document_frequency[term])) + 1
+            indices.append(column)
+            data.append((1 + math.log(weight)) * idf)
+        indptr.append(len(indices))
+
+    matrix = sparse.csr_matrix(
+        (np.asarray(data, dtype=np.float32), indices, indptr),
+        shape=(total, max(len(vocabulary), 1)),
+    )
+
+    # L2-normalise rows so dot products are cosine similarities
+    norms = np.sqrt(np.asarray(matrix.multiply(matrix).sum(axis=1)).ravel())
+    norms[norms == 0] = 1
+    matrix = sparse.diags(1 / norms).dot(matrix).tocsr().astype(np.float32)
+
+    return np.asarray(book_ids), matrix
+
+
+def similarity_chunk(matrix, transposed, chunk):
+    """
+    Sparse similarities of the ``chunk`` rows against every book.
+
+    Each book's similarity to itself is set to zero so it is never
+    recommended. The result stays sparse: only pairs of books sharing a
+    term are stored.
+    """
+    similarities = (matrix[chunk] @ transposed).tocsr()
+    rows = np.repeat(chunk, np.diff(similarities.indptr))
+    similarities.data[similarities.indices == rows] = 0
+    return similarities
+
+
+def top_neighbours(matrix, row_indices, top_k, chunk_size):
+    """
+    Yield ``(row, [(column, score), ...])`` for the given rows.
+
+    Similarities are computed one chunk of rows at a time as a sparse
+    product, and each row is pruned to its ``top_k`` best scores, so
+    memory follows the number of similar pairs in a chunk rather than
+    ``chunk_size * number_of_books``.
+    """
+    transposed = matrix.T.tocsr()
+    k = min(top_k, matrix.shape[0] - 1)
+    if k <= 0:
+        for row in row_indices:
+            yield row, []
+        return
+
+    for start in range(0, len(row_indices), chunk_size):
+        chunk = np.asarray(row_indices[start:start + chunk_size])
+        similarities = similarity_chunk(matrix, transposed, chunk)
+
+        for offset, row in enumerate(chunk):
+            lo, hi = similarities.indptr[offset], similarities.indptr[offset + 1]
+            columns = similarities.indices[lo:hi]
+            scores = similarities.data[lo:hi]
+            positive = scores > 0
+            columns, scores = columns[positive], scores[positive]
+            if len(scores) > k:
+                best = np.argpartition(-scores, k - 1)[:k]
+                columns, scores = columns[best], scores[best]
+            order = np.argsort(-scores, kind='stable')
+            yield int(row), [
+                (int(columns[i]), float(scores[i])) for i in order
+            ]
+
+
+def affected_rows(matrix, book_ids, changed_rows, top_k, chunk_size):
+    """
+    Return rows whose related list may change because of changed books.
+
+    That is every changed book, every book that currently lists a
+    changed book, and every book for which some changed book now beats
+    its weakest stored neighbour.
+    """
+    changed_ids = book_ids[changed_rows].tolist()
+    affected = set(changed_rows)
+
+    position = {book_id: row for row, book_id in enumerate(book_ids.tolist())}
+    for start in range(0, len(changed_ids), 500):
+        listing_changed = RelatedBook.objects.filter(
+            related_id__in=changed_ids[start:start + 500]
+        ).values_list('book_id', flat=True).distinct()
+        affected.update(position[book_id] for book_id in listing_changed if book_id in position)
+
+    # Weakest stored score per book; books with a short list accept anything
+    threshold = np.zeros(len(book_ids), dtype=np.float32)
+    stored = RelatedBook.objects.values('book_id').annotate(
+        weakest=Min('score'), entries=Count('id')
+    )
+    for entry in stored.iterator(chunk_size=2000):
+        row = position.get(entry['book_id'])
+        if row is not None and entry['entries'] >= top_k:
+            threshold[row] = entry['weakest']
+
+    transposed = matrix.T.tocsr()
+    best = np.zeros(len(book_ids), dtype=np.float32)
+    for start in range(0, len(changed_rows), chunk_size):
+        chunk = np.asarray(changed_rows[start:start + chunk_size])
+        similarities = similarity_chunk(matrix, transposed, chunk)
+        best = np.maximum(best, similarities.max(axis=0).toarray().ravel())
+
+    affected.update(np.nonzero(best > threshold)[0].tolist())
+    return sorted(affected)
+
+
+def build_related_books(top_k=10, chunk_size=256, full=False, stdout=None):
+    """
+    Rebuild the RelatedBook table.
+
+    By default only books changed since the previous run (and the books
+    whose neighbour lists they affect) are recomputed. Returns a dict of
+    statistics about the run.
+    """
+    started_at = timezone.now()
+    last_run = None
+    if not full:
+        last_run = RelatedBook.objects.aggregate(last=Max('computed_at'))['last']
+
+    book_ids, matrix = build_tfidf_matrix()
+    if last_run is None:
+        rows = list(range(len(book_ids)))
+    else:
+        changed_ids = set(
+            Book.objects.filter(updated_at__gte=last_run).values_list('id', flat=True)
+        )
+        changed_rows = [row for row, book_id in enumerate(book_ids.tolist()) if book_id in changed_ids]
+        rows = affected_rows(matrix, book_ids, changed_rows, top_k, chunk_size) if changed_rows else []
+
+    written = 0
+    batch = []
+    batch_books = []
+
+    def flush():
+        nonlocal written
+        with transaction.atomic():
+            RelatedBook.objects.filter(book_id__in=batch_books).delete()
+            RelatedBook.objects.bulk_create(batch)
+        written += len(batch)
+        batch.clear()
+        batch_books.clear()
+
+    for row, neighbours in top_neighbours(matrix, rows, top_k, chunk_size):
+        book_id = int(book_ids[row])
+        batch_books.append(book_id)
+        batch.extend(
+            RelatedBook(
+                book_id=book_id,
+                related_id=int(book_ids[column]),
+                score=score,
+                rank=rank,
+                computed_at=started_at,
+            )
+            for rank, (column, score) in enumerate(neighbours)
+        )
+        if len(batch_books) >= chunk_size:
+            flush()
+            if stdout:
+                stdout.write(f'  ...{written} related rows written')
+
+    if batch_books:
+        flush()
+
+    return {
+        'books': len(book_ids),
+        'recomputed': len(rows),
+        'rows_written': written,
+        'incremental': last_run is not None,
+    }
+
+
+def co_purchase_counts(chunk_size=100000, max_basket=50, stdout=None):
+    """
+    Count how often each pair of books was bought in the same order.
+
+    Makes one pass over order items sorted by order. Each chunk of whole
+    orders becomes a sparse order-by-book matrix ``B``, and ``B.T @ B``
+    is added to the running book-by-book count matrix, so memory is
+    bounded by the number of distinct co-purchased pairs plus one chunk.
+    Orders with more than ``max_basket`` distinct books (bulk or
+    institutional purchases) are skipped. The diagonal holds the number
+    of orders containing each book.
+    """
+    width = (Book.objects.aggregate(last=Max('id'))['last'] or 0) + 1
+    counts = sparse.csr_matrix((width, width), dtype=np.int32)
+
+    order_ids = []
+    book_ids = []
+    read = 0
+
+    def accumulate():
+        nonlocal counts
+        _, rows, sizes = np.unique(
+            np.asarray(order_ids), return_inverse=True, return_counts=True
+        )
+        keep = sizes[rows] <= max_basket
+        columns = np.asarray(book_ids)[keep]
+        basket = sparse.csr_matrix(
+            (np.ones(len(columns), dtype=np.int32), (rows[keep], columns)),
+            shape=(len(sizes), width),
+        )
+        counts = counts + (basket.T @ basket).tocsr()
+        order_ids.clear()
+        book_ids.clear()
+
+    items = OrderItem.objects.exclude(order__status='cancelled').order_by(
+        'order_id'
+    ).values_list('order_id', 'book_id')
+
+    for order_id, book_id in items.iterator(chunk_size=5000):
+        # Only flush on an order boundary so baskets are never split
+        if len(order_ids) >= chunk_size and order_id != order_ids[-1]:
+            accumulate()
+            if stdout:
+                stdout.write(f'  ...{read} order items counted')
+        order_ids.append(order_id)
+        book_ids.append(book_id)
+        read += 1
+
+    if order_ids:
+        accumulate()
+
+    return counts, read
+
+
+def co_purchase_scores(counts, min_support=2):
+    """
+    Turn co-purchase counts into cosine similarity scores.
+
+    Returns ``(together, scores)``: a CSR matrix of pair counts without
+    the diagonal, keeping only pairs bought together in at least
+    ``min_support`` orders, and an array of cosine scores aligned with
+    its ``data``.
+    """
+    orders_per_book = counts.diagonal()
+
+    together = (counts - sparse.diags(orders_per_book)).tocsr()
+    together.data[together.data < min_support] = 0
+    together.eliminate_zeros()
+
+    # cosine(i, j) = together(i, j) / sqrt(orders(i) * orders(j))
+    norms = np.sqrt(orders_per_book.astype(np.float64))
+    rows = np.repeat(np.arange(together.shape[0]), np.diff(together.indptr))
+    scores = (together.data / (norms[rows] * norms[together.indices])).astype(np.float32)
+    return together, scores
+
+
+def build_co_purchases(top_k=10, min_support=2, max_basket=50, chunk_size=100000, stdout=None):
+    """
+    Rebuild the CoPurchase table from order history.
+
+    Returns a dict of statistics about the run.
+    """
+    started_at = timezone.now()
+    counts, read = co_purchase_counts(chunk_size, max_basket, stdout)
+    together, scores = co_purchase_scores(counts, min_support)
+
+    written = 0
+    books = 0
+    batch = []
+    batch_books = []
+
+    def flush():
+        nonlocal written
+        with transaction.atomic():
+            CoPurchase.objects.filter(book_id__in=batch_books).delete()
+            CoPurchase.objects.bulk_create(batch)
+        written += len(batch)
+        batch.clear()
+        batch_books.clear()
+
+    for book_id in np.flatnonzero(np.diff(together.indptr)):
+        start, end = together.indptr[book_id], together.indptr[book_id + 1]
+        columns = together.indices[start:end]
+        values = scores[start:end]
+        pairs = together.data[start:end]
+        if len(values) > top_k:
+            best = np.argpartition(-values, top_k - 1)[:top_k]
+            columns, values, pairs = columns[best], values[best], pairs[best]
+        order = np.lexsort((columns, -values))
+
+        books += 1
+        batch_books.append(int(book_id))
+        batch.extend(
+            CoPurchase(
+                book_id=int(book_id),
+                related_id=int(columns[i]),
+                score=float(values[i]),
+                together=int(pairs[i]),
+                rank=rank,
+                computed_at=started_at,
+            )
+            for rank, i in enumerate(order)
+        )
+        if len(batch_books) >= 500:
+            flush()
+
+    if batch_books:
+        flush()
+
+    # Books that no longer have any co-purchases
+    CoPurchase.objects.filter(computed_at__lt=started_at).delete()
+
+    return {
+        'order_items': read,
+        'books': books,
+        'rows_written': written,
+    }
@@ -0,0 +1,215 @@
+"""
+Time-limited stock reservations for carts.
+
+Adding a book to a logged-in user's cart holds the copies for
+RESERVATION_TTL. Each (user, book) hold is a StockReservation row, and
+the copies held per book are kept in a ReservedStock counter that is
+updated in the same transaction, so available stock is
+``stock_quantity - reserved`` without summing reservations.
+
+A hold is only granted while ``reserved + requested <= stock_quantity``,
+checked in the UPDATE of the counter itself, so concurrent carts can't
+reserve more copies than exist. Expired holds keep counting until the
+sweeper (the sweep_reservations command, run every minute or so)
+releases them in bulk; touching the cart again before that extends them.
+
+Rows are always locked in the same order (the user's reservations, then
+the books' counters) to keep concurrent holds and sweeps deadlock-free.
+"""
+
+from datetime import timedelta
+
+from django.db import transaction
+from django.db.models import Case, F, IntegerField, OuterRef, Subquery, Sum, Value, When
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from .models import Book, ReservedStock, StockReservation
+
+
+RESERVATION_TTL = timedelta(minutes=15)
+SWEEP_BATCH_SIZE = 1000
+
+
+class InsufficientStock(Exception):
+    """Raised inside a hold transaction to roll it back"""
+
+
+def per_book(values, field='book_id'):
+    """CASE expression mapping book ids (in ``field``) to per-book values"""
+    return Case(
+        *[When(**{field: book_id}, then=Value(value)) for book_id, value in values.items()],
+        default=Value(0),
+        output_field=IntegerField()
+    )
+
+
+def with_available_stock(queryset):
+    """Annotate a Book queryset with ``available_quantity``"""
+    return queryset.annotate(
+        available_quantity=F('stock_quantity') - Coalesce(F('reserved_stock__quantity'), 0)
+    )
+
+
+def available_for_user(user_id, book_ids):
+    """
+    Return ``{book_id: copies the user can have}`` (one query).
+
+    That is the available stock plus what the user already holds.
+    """
+    held = Subquery(
+        StockReservation.objects.filter(
+            user_id=user_id, book=OuterRef('pk')
+        ).values('quantity')[:1]
+    )
+    return dict(
+        with_available_stock(Book.objects.filter(id__in=list(book_ids))).annotate(
+            available_to_user=F('available_quantity') + Coalesce(held, 0)
+        ).values_list('id', 'available_to_user')
+    )
+
+
+def adjust_reserved(deltas, guarded=False):
+    """
+    Add per-book ``deltas`` to the ReservedStock counters.
+
+    With ``guarded`` a counter only changes if the result fits in the
+    book's stock; returns the number of counters changed.
+    """
+    if not deltas:
+        return 0
+    rows = ReservedStock.objects.filter(book_id__in=list(deltas))
+    if guarded:
+        stock = Subquery(Book.objects.filter(pk=OuterRef('book_id')).values('stock_quantity')[:1])
+        rows = rows.filter(quantity__lte=stock - per_book(deltas))
+    return rows.update(quantity=F('quantity') + per_book(deltas))
+
+
+def set_holds(user_id, quantities):
+    """
+    Set a user's holds to ``quantities`` (``{book_id: copies}``).
+
+    A quantity of 0 releases the hold. Every hold is refreshed to expire
+    RESERVATION_TTL from now. Either all holds are set or none: returns
+    the ids of books without enough available stock (empty on success).
+    The number of queries does not depend on the number of books.
+    """
+    if not quantities:
+        return []
+
+    book_ids = sorted(quantities)
+    expires_at = timezone.now() + RESERVATION_TTL
+    increases = {}
+
+    try:
+        with transaction.atomic():
+            # Make sure every row exists, then lock the user's holds
+            StockReservation.objects.bulk_create(
+                [
+                    StockReservation(user_id=user_id, book_id=book_id, expires_at=expires_at)
+                    for book_id in book_ids if quantities[book_id] > 0
+                ],
+                ignore_conflicts=True,
+            )
+            ReservedStock.objects.bulk_create(
+                [ReservedStock(book_id=book_id) for book_id in book_ids if quantities[book_id] > 0],
+                ignore_conflicts=True,
+            )
+            held = dict(
+                StockReservation.objects.select_for_update().filter(
+                    user_id=user_id, book_id__in=book_ids
+                ).order_by('book_id').values_list('book_id', 'quantity')
+            )
+
+            deltas = {
+                book_id: quantities[book_id] - held.get(book_id, 0)
+                for book_id in book_ids
+            }
+            increases = {book_id: delta for book_id, delta in deltas.items() if delta > 0}
+            decreases = {book_id: delta for book_id, delta in deltas.items() if delta < 0}
+
+            if increases and adjust_reserved(increases, guarded=True) != len(increases):
+                raise InsufficientStock
+            if decreases:
+                adjust_reserved(decreases)
+
+            kept = {book_id: quantity for book_id, quantity in quantities.items() if quantity > 0}
+            if kept:
+                StockReservation.objects.filter(user_id=user_id, book_id__in=list(kept)).update(
+                    quantity=per_book(kept), expires_at=expires_at
+                )
+            released = [book_id for book_id in book_ids if quantities[book_id] <= 0]
+            if released:
+                StockReservation.objects.filter(user_id=user_id, book_id__in=released).delete()
+    except InsufficientStock:
+        available = available_for_user(user_id, increases)
+        short = [
+            book_id for book_id in increases
+            if available.get(book_id, 0) < quantities[book_id]
+        ]
+        # Stock may have been freed since; report every book we tried
+        return short or list(increases)
+
+    return []
+
+
+def release_holds(user_id, book_ids):
+    """Release a user's holds on the given books"""
+    set_holds(user_id, {book_id: 0 for book_id in book_ids})
+
+
+def expire_holds(now=None, batch_size=SWEEP_BATCH_SIZE):
+    """
+    Release every hold that expired before ``now``.
+
+    Works through expired rows in batches, each in one transaction that
+    deletes the rows and subtracts them from the counters. Holds locked
+    by a cart update are skipped; that update is extending them. Returns
+    the number of holds released.
+    """
+    now = now or timezone.now()
+    released = 0
+
+    while True:
+        with transaction.atomic():
+            rows = list(
+                StockReservation.objects.select_for_update(skip_locked=True).filter(
+                    expires_at__lte=now
+                ).order_by('id').values_list('id', 'book_id', 'quantity')[:batch_size]
+            )
+            if not rows:
+                break
+
+            totals = {}
+            for _, book_id, quantity in rows:
+                totals[book_id] = totals.get(book_id, 0) - quantity
+
+            StockReservation.objects.filter(id__in=[row[0] for row in rows]).delete()
+            adjust_reserved({
+                book_id: total for book_id, total in sorted(totals.items()) if total
+            })
+
+        released += len(rows)
+        if len(rows) < batch_size:
+            break
+
+    return released
+
+
+def repair_reserved_stock():
+    """
+    Recompute every ReservedStock counter from the reservations.
+
+    Use after restoring a backup or if the counters are ever suspected
+    to have drifted; run it while carts are quiet, as holds placed
+    during the repair can be missed. Returns the number of counters
+    rewritten.
+    """
+    with transaction.atomic():
+        ReservedStock.objects.all().delete()
+        totals = StockReservation.objects.values('book_id').annotate(total=Sum('quantity'))
+        counters = ReservedStock.objects.bulk_create(
+            (ReservedStock(book_id=row['book_id'], quantity=row['total']) for row in totals),
+            batch_size=1000,
+        )
+    return len(counters)
@@ -0,0 +1,92 @@
+"""
+Rating aggregates for book reviews.
+
+Each Book carries ``rating_sum``, ``rating_count`` and the derived
+``rating_average`` so listings can show and sort by ratings without
+aggregating the Review table. Review signal handlers apply deltas with
+F() expressions inside the review's transaction; repair_rating_aggregates
+recomputes them in bulk if they ever drift (for example after bulk
+deletes that bypass signals).
+"""
+
+from django.db import transaction
+from django.db.models import Case, Count, F, FloatField, Sum, Value, When
+from django.db.models.functions import Cast
+
+from .models import Book, Review
+
+
+def apply_rating_delta(book_id, sum_delta, count_delta):
+    """Atomically add to a book's rating sum and count"""
+    # SET expressions all see the row's old values, so the average is
+    # computed from the old sum/count plus the deltas
+    new_count = F('rating_count') + count_delta
+    Book.objects.filter(pk=book_id).update(
+        rating_sum=F('rating_sum') + sum_delta,
+        rating_count=new_count,
+        rating_average=Case(
+            When(rating_count=-count_delta, then=Value(0.0)),
+            default=Cast(F('rating_sum') + sum_delta, FloatField()) / new_count,
+            output_field=FloatField(),
+        ),
+    )
+
+
+def move_rating(previous, current):
+    """
+    Update aggregates for a review changing from ``previous`` to
+    ``current``; each is a ``(book_id, rating)`` pair or None.
+    """
+    if previous == current:
+        return
+    if previous is not None and current is not None and previous[0] == current[0]:
+        apply_rating_delta(current[0], current[1] - previous[1], 0)
+        return
+    if previous is not None:
+        apply_rating_delta(previous[0], -previous[1], -1)
+    if current is not None:
+        apply_rating_delta(current[0], current[1], 1)
+
+
+def repair_rating_aggregates(batch_size=1000):
+    """
+    Recompute every book's rating aggregates from the Review table.
+
+    Only books whose stored values differ are written. Returns the
+    number of books that were corrected.
+    """
+    totals = {
+        row['book_id']: (row['total'], row['reviews'])
+        for row in Review.objects.values('book_id').annotate(
+            total=Sum('rating'), reviews=Count('id')
+        ).order_by()
+    }
+
+    fixed = 0
+    batch = []
+    rows = Book.objects.order_by().values_list(
+        'id', 'rating_sum', 'rating_count', 'rating_average'
+    )
+    for book_id, rating_sum, rating_count, rating_average in rows.iterator(chunk_size=2000):
+        total, reviews = totals.get(book_id, (0, 0))
+        average = total / reviews if reviews else 0.0
+        if (rating_sum, rating_count) == (total, reviews) and abs(rating_average - average) < 1e-9:
+            continue
+        batch.append(Book(
+            id=book_id, rating_sum=total, rating_count=reviews, rating_average=average
+        ))
+        if len(batch) >= batch_size:
+            fixed += flush_ratings(batch)
+
+    if batch:
+        fixed += flush_ratings(batch)
+    return fixed
+
+
+def flush_ratings(batch):
+    """Write a batch of corrected aggregates and empty the batch"""
+    with transaction.atomic():
+        Book.objects.bulk_update(batch, ['rating_sum', 'rating_count', 'rating_average'])
+    written = len(batch)
+    batch.clear()
+    return written
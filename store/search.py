@@ -0,0 +1,302 @@
+"""
+Full-text and fuzzy search backends for the book catalog.
+
+This module hides the database-specific search machinery behind a
+small common interface. PostgreSQL uses a weighted tsvector column
+with a GIN index, SQLite uses an FTS5 virtual table, and any other
+database falls back to simple substring matching. When a query finds
+nothing, backends fall back to typo-tolerant trigram matching: pg_trgm
+GIN indexes on PostgreSQL and the in-process trigram index elsewhere.
+"""
+
+import re
+
+from django.db import connection, transaction
+from django.db.models import BooleanField, Case, FloatField, Q, Value, When
+from django.db.models.expressions import RawSQL
+
+from .models import Book
+
+
+# Words are the only thing we pass on to the database query parsers,
+# so user input can never inject FTS operators or syntax errors.
+SEARCH_TERM_RE = re.compile(r'\w+', re.UNICODE)
+
+# search_rank is rounded to this many decimals and returned as a double,
+# so a rank stored in a pagination cursor compares equal to the value
+# the database computes for the same row on the next page.
+RANK_PRECISION = 6
+
+
+def normalize_terms(query):
+    """Split a raw search string into lowercase word tokens"""
+    return SEARCH_TERM_RE.findall((query or '').lower())
+
+
+def no_results(queryset):
+    """Return an empty queryset that still carries ``search_rank``"""
+    return queryset.none().annotate(
+        search_rank=Value(0.0, output_field=FloatField())
+    )
+
+
+class BaseSearchBackend:
+    """
+    Common interface for catalog search backends.
+
+    Backends keep their index in sync with the Book table and turn a
+    user query into a filtered queryset annotated with ``search_rank``
+    (higher is more relevant).
+    """
+
+    def index_book(self, book):
+        """Add or refresh a single book in the search index"""
+
+    def remove_book(self, book_id):
+        """Remove a single book from the search index"""
+
+    def rebuild(self):
+        """Rebuild the whole index from the Book table"""
+
+    def search(self, queryset, query):
+        """Filter a Book queryset by query and annotate search_rank"""
+        raise NotImplementedError
+
+    def fuzzy_search(self, queryset, query):
+        """
+        Typo-tolerant search ranked by trigram similarity.
+
+        The candidates from fuzzy_matches() are applied as an id filter,
+        so the returned queryset does not depend on any connection state
+        when it is evaluated later.
+        """
+        matches = self.fuzzy_matches(queryset, query)
+        if not matches:
+            return no_results(queryset)
+
+        return queryset.filter(id__in=[book_id for book_id, _ in matches]).annotate(
+            search_rank=Case(
+                *[
+                    When(id=book_id, then=Value(round(score, RANK_PRECISION)))
+                    for book_id, score in matches
+                ],
+                default=Value(0.0),
+                output_field=FloatField()
+            )
+        )
+
+    def fuzzy_matches(self, queryset, query):
+        """
+        Return a bounded list of ``(book_id, similarity)`` candidates.
+
+        The default uses the per-process trigram index, which finds them
+        without touching the database.
+        """
+        from .autocomplete import prefix_index
+
+        return prefix_index.fuzzy_matches(query)
+
+
+class PostgresSearchBackend(BaseSearchBackend):
+    """
+    PostgreSQL full-text search using the ``store_book.search_vector``
+    tsvector column and its GIN index.
+    """
+
+    document_sql = (
+        "setweight(to_tsvector('english', coalesce(title, '')), 'A') || "
+        "setweight(to_tsvector('english', coalesce(author, '')), 'B') || "
+        "setweight(to_tsvector('english', coalesce(description, '')), 'C')"
+    )
+
+    def index_book(self, book):
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"UPDATE {Book._meta.db_table} "
+                f"SET search_vector = {self.document_sql} WHERE id = %s",
+                [book.pk]
+            )
+
+    def rebuild(self):
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"UPDATE {Book._meta.db_table} SET search_vector = {self.document_sql}"
+            )
+
+    def search(self, queryset, query):
+        terms = normalize_terms(query)
+        if not terms:
+            return no_results(queryset)
+
+        # Prefix-match every term so partially typed words still hit
+        tsquery = ' & '.join(f'{term}:*' for term in terms)
+        table = Book._meta.db_table
+
+        return queryset.filter(
+            RawSQL(
+                f"{table}.search_vector @@ to_tsquery('english', %s)",
+                [tsquery],
+                output_field=BooleanField()
+            )
+        ).annotate(
+            search_rank=RawSQL(
+                f"ROUND(ts_rank_cd({table}.search_vector, to_tsquery('english', %s))::numeric, "
+                f"{RANK_PRECISION})::float8",
+                [tsquery],
+                output_field=FloatField()
+            )
+        )
+
+    # Lower than pg_trgm's 0.6 default so transposed letters still match
+    word_similarity_threshold = 0.25
+
+    def fuzzy_matches(self, queryset, query):
+        from .autocomplete import FUZZY_LIMIT
+
+        terms = normalize_terms(query)
+        if not terms:
+            return []
+
+        text = ' '.join(terms)
+        table = Book._meta.db_table
+
+        # "<%" is the GIN-indexable word similarity operator from pg_trgm
+        candidates = queryset.filter(
+            RawSQL(
+                f"(%s <%% {table}.title OR %s <%% {table}.author)",
+                [text, text],
+                output_field=BooleanField()
+            )
+        ).annotate(
+            similarity=RawSQL(
+                f"GREATEST(word_similarity(%s, {table}.title), "
+                f"word_similarity(%s, {table}.author))",
+                [text, text],
+                output_field=FloatField()
+            )
+        ).order_by('-similarity', 'id').values_list('id', 'similarity')[:FUZZY_LIMIT]
+
+        # The threshold is set transaction-locally, right before the
+        # query that uses it, so it never leaks into later queries on a
+        # persistent or pooled connection.
+        with transaction.atomic():
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    "SELECT set_config('pg_trgm.word_similarity_threshold', %s, true)",
+                    [str(self.word_similarity_threshold)]
+                )
+            return list(candidates)
+
+
+class SQLiteSearchBackend(BaseSearchBackend):
+    """
+    SQLite full-text search using the ``store_book_fts`` FTS5 table.
+
+    The FTS table uses the book id as its rowid and is ranked with the
+    built-in bm25 function.
+    """
+
+    fts_table = 'store_book_fts'
+
+    def index_book(self, book):
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"DELETE FROM {self.fts_table} WHERE rowid = %s",
+                [book.pk]
+            )
+            cursor.execute(
+                f"INSERT INTO {self.fts_table} (rowid, title, author, description) "
+                f"VALUES (%s, %s, %s, %s)",
+                [book.pk, book.title, book.author, book.description]
+            )
+
+    def remove_book(self, book_id):
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"DELETE FROM {self.fts_table} WHERE rowid = %s",
+                [book_id]
+            )
+
+    def rebuild(self):
+        with connection.cursor() as cursor:
+            cursor.execute(f"DELETE FROM {self.fts_table}")
+            cursor.execute(
+                f"INSERT INTO {self.fts_table} (rowid, title, author, description) "
+                f"SELECT id, title, author, description FROM {Book._meta.db_table}"
+            )
+
+    def search(self, queryset, query):
+        terms = normalize_terms(query)
+        if not terms:
+            return no_results(queryset)
+
+        match = ' '.join(f'"{term}"*' for term in terms)
+        table = Book._meta.db_table
+
+        return queryset.filter(
+            RawSQL(
+                f"{table}.id IN (SELECT rowid FROM {self.fts_table} "
+                f"WHERE {self.fts_table} MATCH %s)",
+                [match],
+                output_field=BooleanField()
+            )
+        ).annotate(
+            # FTS5 rank is bm25, where lower is better, so flip the sign
+            search_rank=RawSQL(
+                f"SELECT ROUND(-rank, {RANK_PRECISION}) FROM {self.fts_table} "
+                f"WHERE {self.fts_table} MATCH %s AND rowid = {table}.id",
+                [match],
+                output_field=FloatField()
+            )
+        )
+
+
+class SimpleSearchBackend(BaseSearchBackend):
+    """
+    Fallback backend for databases without a supported full-text engine.
+    """
+
+    def search(self, queryset, query):
+        terms = normalize_terms(query)
+        if not terms:
+            return no_results(queryset)
+
+        condition = Q()
+        for term in terms:
+            condition &= (
+                Q(title__icontains=term) |
+                Q(author__icontains=term) |
+                Q(description__icontains=term)
+            )
+
+        return queryset.filter(condition).annotate(
+            search_rank=Value(0.0, output_field=FloatField())
+        )
+
+
+SEARCH_BACKENDS = {
+    'postgresql': PostgresSearchBackend,
+    'sqlite': SQLiteSearchBackend,
+}
+
+
+def get_search_backend():
+    """Return the search backend for the default database"""
+    backend_class = SEARCH_BACKENDS.get(connection.vendor, SimpleSearchBackend)
+    return backend_class()
+
+
+def search_books(queryset, query, fuzzy=True):
+    """
+    Run a full-text search against a Book queryset.
+
+    If nothing matches and ``fuzzy`` is set, retries with trigram
+    matching so misspelled titles and authors still find books.
+    Returns the filtered queryset annotated with ``search_rank``;
+    callers decide how to order it.
+    """
+    backend = get_search_backend()
+    results = backend.search(queryset, query)
+    if fuzzy and not results.exists():
+        results = backend.fuzzy_search(queryset, query)
+    return results
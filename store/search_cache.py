@@ -0,0 +1,133 @@
+"""
+Result cache for catalog searches.
+
+Search traffic is dominated by a small set of popular queries, so the
+book ids of each search results page are cached under a key built from
+the normalized query, filters, sort and page. The key is tied to the
+catalog version, so Book writes invalidate every cached page, and a
+hit costs a single ``id__in`` query to load the books.
+
+Hit and miss counters are kept in the shared cache; see the
+search_cache_stats management command.
+"""
+
+import hashlib
+import json
+
+from django.core.cache import cache
+
+from .caching import catalog_cache_key
+from .models import Book
+from .pagination import KeysetPage
+from .search import normalize_terms
+
+
+SEARCH_CACHE_TIMEOUT = 60 * 5  # 5 minutes
+HITS_KEY = 'search_cache:hits'
+MISSES_KEY = 'search_cache:misses'
+
+
+class CachedResultPaginator:
+    """Stand-in paginator for a page restored from the result cache"""
+
+    def __init__(self, per_page, count_info):
+        self.per_page = per_page
+        # None for cursor pages, which never show a total
+        self.count_info = tuple(count_info) if count_info is not None else (None, True)
+
+    @property
+    def count(self):
+        return self.count_info[0]
+
+    @property
+    def count_is_exact(self):
+        return self.count_info[1]
+
+
+def search_cache_key(query, category, price_band, sort_by, page, cursor):
+    """Build the cache key for one page of search results"""
+    parts = [
+        ' '.join(normalize_terms(query)),
+        category or '',
+        price_band or '',
+        sort_by,
+        page or '',
+        cursor or '',
+    ]
+    digest = hashlib.md5(json.dumps(parts).encode()).hexdigest()
+    return catalog_cache_key('search', digest)
+
+
+def record(hit):
+    """Count a cache hit or miss"""
+    key = HITS_KEY if hit else MISSES_KEY
+    cache.add(key, 0, timeout=None)
+    try:
+        cache.incr(key)
+    except ValueError:
+        # The counter was evicted between add() and incr()
+        cache.set(key, 1, timeout=None)
+
+
+def get_stats():
+    """Return hit/miss counts and the hit ratio"""
+    hits = cache.get(HITS_KEY) or 0
+    misses = cache.get(MISSES_KEY) or 0
+    total = hits + misses
+    return {
+        'hits': hits,
+        'misses': misses,
+        'hit_ratio': hits / total if total else 0.0,
+    }
+
+
+def reset_stats():
+    """Reset the hit/miss counters"""
+    cache.delete_many([HITS_KEY, MISSES_KEY])
+
+
+def get_cached_page(key, per_page):
+    """
+    Restore a cached results page.
+
+    Returns ``(paginator, page, context)`` like pagination.paginate(),
+    or None on a miss. The context has no ``base_querystring``; the
+    caller fills it in for the current request.
+    """
+    entry = cache.get(key)
+    record(entry is not None)
+    if entry is None:
+        return None
+
+    books = Book.objects.in_bulk(entry['ids'])
+    paginator = CachedResultPaginator(per_page, entry['count'])
+    page = KeysetPage(
+        [books[book_id] for book_id in entry['ids'] if book_id in books],
+        entry['number'],
+        paginator,
+        has_next=entry['has_next'],
+        has_previous=entry['has_previous'],
+    )
+    return paginator, page, dict(entry['context'])
+
+
+def store_page(key, paginator, page, context):
+    """
+    Cache the book ids and pagination state of a results page.
+
+    Only page-number pages store the total count (which their paginator
+    has already computed); cursor pages do not display it, so caching
+    one never pays for a count.
+    """
+    numbered = context['page_range'] is not None
+    cache.set(key, {
+        'ids': [book.pk for book in page],
+        'number': page.number,
+        'has_next': page.has_next(),
+        'has_previous': page.has_previous(),
+        'count': paginator.count_info if numbered else None,
+        'context': {
+            name: value for name, value in context.items()
+            if name != 'base_querystring'
+        },
+    }, SEARCH_CACHE_TIMEOUT)
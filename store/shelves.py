@@ -0,0 +1,53 @@
+"""
+Cached book shelves for the home page and catalog listing.
+
+Shelves are the same for every visitor, so they are built once per
+catalog version and served from the cache (see caching.get_or_build).
+Book and Category signals bump the catalog version, which makes the
+next request rebuild them.
+"""
+
+from .bestsellers import ensure_windows_current, top_books
+from .caching import get_or_build
+from .models import Book
+
+
+SHELF_CACHE_TIMEOUT = 60 * 15  # 15 minutes
+FEATURED_SHELF_SIZE = 6
+RECENT_SHELF_SIZE = 8
+BESTSELLER_SHELF_SIZE = 8
+
+
+def get_featured_books(limit=FEATURED_SHELF_SIZE):
+    """Return in-stock featured books, newest first"""
+    books = get_or_build(
+        'shelf:featured',
+        lambda: list(Book.objects.filter(
+            is_featured=True,
+            stock_quantity__gt=0
+        ).order_by('-created_at')[:FEATURED_SHELF_SIZE]),
+        SHELF_CACHE_TIMEOUT
+    )
+    return books[:limit]
+
+
+def get_recent_books(limit=RECENT_SHELF_SIZE):
+    """Return the most recently added in-stock books"""
+    books = get_or_build(
+        'shelf:recent',
+        lambda: list(Book.objects.filter(
+            stock_quantity__gt=0
+        ).order_by('-created_at')[:RECENT_SHELF_SIZE]),
+        SHELF_CACHE_TIMEOUT
+    )
+    return books[:limit]
+
+
+def get_bestsellers(window='7d', limit=BESTSELLER_SHELF_SIZE):
+    """Return the best selling in-stock books for a sales window"""
+    def build():
+        ensure_windows_current()
+        return top_books(window, BESTSELLER_SHELF_SIZE)
+
+    books = get_or_build(f'shelf:bestsellers:{window}', build, SHELF_CACHE_TIMEOUT)
+    return books[:limit]
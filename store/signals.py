@@ -0,0 +1,128 @@
+"""
+Signal handlers for the store app.
+
+This module keeps derived data such as the full-text search index,
+the autocomplete prefix index, facet counts, rating aggregates and
+version-stamped catalog caches in sync with changes to the Book table,
+and the cached cart badge count in sync with CartItem. It also merges
+an anonymous visitor's cookie cart into their account on login.
+"""
+
+from django.contrib.auth.signals import user_logged_in
+from django.db import transaction
+from django.db.models.signals import pre_save, post_save, post_delete
+from django.dispatch import receiver
+
+from .autocomplete import publish_book_change
+from .caching import bump_catalog_version
+from .cart import get_anonymous_cart, invalidate_cart_count, merge_anonymous_cart
+from .facets import facet_key, move_book, rebuild_facets
+from .models import Book, CartItem, Category, Review
+from .reviews import move_rating
+from .search import get_search_backend
+
+
+@receiver(post_save, sender=Book)
+def index_book_on_save(sender, instance, **kwargs):
+    """Refresh the search index entries for a saved book"""
+    book_id = instance.pk
+    get_search_backend().index_book(instance)
+    transaction.on_commit(lambda: publish_book_change(book_id))
+
+
+@receiver(post_delete, sender=Book)
+def remove_book_from_index(sender, instance, **kwargs):
+    """Drop the search index entries for a deleted book"""
+    book_id = instance.pk
+    get_search_backend().remove_book(book_id)
+    transaction.on_commit(lambda: publish_book_change(book_id))
+
+
+@receiver(pre_save, sender=Book)
+def remember_facet_cell(sender, instance, **kwargs):
+    """Record which facet cell the stored row is in before it changes"""
+    previous = None
+    if instance.pk is not None:
+        row = Book.objects.filter(pk=instance.pk).values_list(
+            'category_id', 'price', 'stock_quantity'
+        ).first()
+        if row is not None:
+            previous = facet_key(*row)
+    instance._previous_facet_key = previous
+
+
+@receiver(post_save, sender=Book)
+def update_facet_counts_on_save(sender, instance, **kwargs):
+    """Move a saved book into its new facet cell"""
+    move_book(
+        getattr(instance, '_previous_facet_key', None),
+        facet_key(instance.category_id, instance.price, instance.stock_quantity)
+    )
+
+
+@receiver(post_delete, sender=Book)
+def update_facet_counts_on_delete(sender, instance, **kwargs):
+    """Remove a deleted book from its facet cell"""
+    move_book(
+        facet_key(instance.category_id, instance.price, instance.stock_quantity),
+        None
+    )
+
+
+@receiver(post_delete, sender=Category)
+def rebuild_facets_on_category_delete(sender, instance, **kwargs):
+    """Books of a deleted category become uncategorized in bulk"""
+    rebuild_facets()
+
+
+@receiver(pre_save, sender=Review)
+def remember_review_rating(sender, instance, **kwargs):
+    """Record the stored book and rating before a review changes"""
+    previous = None
+    if instance.pk is not None:
+        previous = Review.objects.filter(pk=instance.pk).values_list(
+            'book_id', 'rating'
+        ).first()
+    instance._previous_rating = previous
+
+
+@receiver(post_save, sender=Review)
+def update_rating_on_save(sender, instance, **kwargs):
+    """Apply a saved review to its book's rating aggregates"""
+    move_rating(
+        getattr(instance, '_previous_rating', None),
+        (instance.book_id, instance.rating)
+    )
+
+
+@receiver(post_delete, sender=Review)
+def update_rating_on_delete(sender, instance, **kwargs):
+    """Remove a deleted review from its book's rating aggregates"""
+    move_rating((instance.book_id, instance.rating), None)
+
+
+@receiver(post_save, sender=Book)
+@receiver(post_delete, sender=Book)
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+@receiver(post_save, sender=Review)
+@receiver(post_delete, sender=Review)
+def invalidate_catalog_cache(sender, **kwargs):
+    """Bump the catalog version once the change is committed"""
+    transaction.on_commit(bump_catalog_version)
+
+
+@receiver(post_save, sender=CartItem)
+@receiver(post_delete, sender=CartItem)
+def invalidate_cart_count_on_change(sender, instance, created=True, **kwargs):
+    """Drop the user's cached cart count once an item is added or removed"""
+    if created:
+        user_id = instance.user_id
+        transaction.on_commit(lambda: invalidate_cart_count(user_id))
+
+
+@receiver(user_logged_in)
+def merge_cart_on_login(sender, request, user, **kwargs):
+    """Move the visitor's cookie cart into their account"""
+    if request is not None:
+        merge_anonymous_cart(user, get_anonymous_cart(request))
@@ -0,0 +1,365 @@
+"""
+Synthetic load-testing data.
+
+Generates books, users, carts and orders at benchmark scale (a million
+books and several million orders) with bulk_create in large batches.
+The data has a realistic shape:
+
+- book popularity follows a Zipf distribution, so a few titles account
+  for most sales and most books rarely sell;
+- orders hold one to several items, with older orders mostly delivered
+  and order dates skewed towards the recent past;
+- descriptions are several sentences long, like real catalog copy.
+
+Everything is derived from one seed, so the same seed and sizes produce
+the same dataset (dates are relative to the start of the current day).
+Generated rows are recognisable by their ISBN and username prefixes, so
+they can be removed again with clear_synthetic_data().
+"""
+
+import random
+from contextlib import contextmanager
+from datetime import datetime, time as dt_time, timedelta
+from decimal import Decimal
+
+import numpy as np
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.db import transaction
+from django.utils import timezone
+from django.utils.text import slugify
+
+from .models import Book, CartItem, Category, Order, OrderItem
+
+
+ISBN_PREFIX = '9798'
+USERNAME_PREFIX = 'loadtest'
+PASSWORD = 'loadtest123'
+
+MAX_ORDER_ITEMS = 8
+MAX_ITEM_QUANTITY = 5
+MAX_CART_ITEMS = 4
+ORDER_HISTORY_DAYS = 730
+CATALOG_HISTORY_DAYS = 5 * 365
+
+ORDER_STATUSES = ['pending', 'processing', 'shipped', 'delivered', 'cancelled']
+ORDER_STATUS_WEIGHTS = [0.03, 0.05, 0.10, 0.77, 0.05]
+
+CATEGORY_NAMES = [
+    'Programming', 'Data Science', 'Fiction', 'Mystery', 'Science Fiction',
+    'Fantasy', 'History', 'Biography', 'Business', 'Self-Help', 'Cooking',
+    'Travel', 'Poetry', 'Philosophy', 'Psychology', 'Children', 'Art',
+    'Music', 'Health', 'Religion', 'Sports', 'Politics', 'Mathematics',
+    'Physics', 'Design',
+]
+
+WORDS = [
+    'shadow', 'river', 'garden', 'empire', 'silent', 'code', 'machine',
+    'winter', 'secret', 'journey', 'ocean', 'mountain', 'city', 'night',
+    'light', 'stone', 'fire', 'glass', 'paper', 'storm', 'forest', 'iron',
+    'golden', 'hidden', 'broken', 'final', 'lost', 'wild', 'ancient',
+    'modern', 'practical', 'complete', 'essential', 'advanced', 'guide',
+    'art', 'science', 'history', 'theory', 'systems', 'design', 'patterns',
+    'data', 'algorithms', 'python', 'django', 'networks', 'markets',
+    'kingdom', 'voyage', 'letters', 'memory', 'dream', 'house', 'road',
+    'island', 'engine', 'signal', 'crown', 'harbor', 'valley', 'bridge',
+    'mirror', 'compass', 'lantern', 'atlas', 'orchard', 'meadow', 'frontier',
+    'horizon', 'echo', 'cipher', 'circuit', 'quantum', 'economy', 'mind',
+    'habit', 'kitchen', 'recipe', 'wisdom', 'courage', 'promise', 'summer',
+]
+
+FIRST_NAMES = [
+    'James', 'Mary', 'Wei', 'Aisha', 'Carlos', 'Yuki', 'Olga', 'Liam',
+    'Priya', 'Noah', 'Fatima', 'Lucas', 'Elena', 'Omar', 'Sofia', 'Ken',
+    'Grace', 'Mateo', 'Ingrid', 'Kwame', 'Chloe', 'Ravi', 'Hannah', 'Diego',
+]
+
+LAST_NAMES = [
+    'Smith', 'Garcia', 'Chen', 'Khan', 'Novak', 'Tanaka', 'Okafor', 'Rossi',
+    'Müller', 'Silva', 'Kim', 'Patel', 'Johnson', 'Ivanova', 'Dubois',
+    'Nguyen', 'Hansen', 'Cohen', 'Lopez', 'Walker', 'Sato', 'Moreau',
+]
+
+CITIES = [
+    ('Springfield', 'IL'), ('Portland', 'OR'), ('Austin', 'TX'),
+    ('Denver', 'CO'), ('Boston', 'MA'), ('Seattle', 'WA'),
+    ('Madison', 'WI'), ('Raleigh', 'NC'), ('Tucson', 'AZ'), ('Albany', 'NY'),
+]
+
+
+@contextmanager
+def explicit_timestamps(*fields):
+    """
+    Let bulk_create store the given auto_now/auto_now_add values.
+
+    Generated rows need dates spread over the past instead of "now".
+    """
+    saved = [(field, field.auto_now, field.auto_now_add) for field in fields]
+    for field in fields:
+        field.auto_now = field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field, auto_now, auto_now_add in saved:
+            field.auto_now, field.auto_now_add = auto_now, auto_now_add
+
+
+def zipf_cdf(size, skew):
+    """Cumulative Zipf weights for ranks 1..size"""
+    weights = 1.0 / np.arange(1, size + 1) ** skew
+    cdf = np.cumsum(weights)
+    return cdf / cdf[-1]
+
+
+def sample(rng, cdf, count):
+    """Draw ``count`` ranks from a cumulative distribution"""
+    return np.minimum(np.searchsorted(cdf, rng.random(count)), len(cdf) - 1)
+
+
+class SyntheticDataGenerator:
+    """
+    Builds the synthetic dataset in batches.
+
+    ``stdout`` (optional) receives progress lines with throughput.
+    """
+
+    def __init__(self, seed=42, batch_size=10000, skew=1.1, stdout=None):
+        self.seed = seed
+        self.batch_size = batch_size
+        self.skew = skew
+        self.stdout = stdout
+        self.rng = np.random.default_rng(seed)
+        self.text = random.Random(seed)
+        self.anchor = timezone.make_aware(
+            datetime.combine(timezone.localdate(), dt_time.min)
+        )
+        self.sentences = [self.sentence() for _ in range(1000)]
+
+    def progress(self, label, done, total, started):
+        if self.stdout:
+            elapsed = max(timezone.now() - started, timedelta(microseconds=1)).total_seconds()
+            self.stdout.write(f'  ...{done}/{total} {label} ({done / elapsed:.0f}/s)')
+
+    def past(self, days):
+        """Timestamps ``days`` (a float array) before the anchor"""
+        return [self.anchor - timedelta(days=float(day)) for day in days]
+
+    def sentence(self):
+        words = self.text.choices(WORDS, k=self.text.randint(8, 18))
+        return ' '.join(words).capitalize() + '.'
+
+    def title(self):
+        return ' '.join(self.text.choices(WORDS, k=self.text.randint(1, 5))).title()
+
+    def author(self):
+        return f'{self.text.choice(FIRST_NAMES)} {self.text.choice(LAST_NAMES)}'
+
+    def description(self):
+        return ' '.join(self.text.choices(self.sentences, k=self.text.randint(5, 25)))
+
+    def categories(self):
+        """Return the category ids, creating the standard categories"""
+        ids = []
+        for name in CATEGORY_NAMES:
+            category, _ = Category.objects.get_or_create(
+                slug=slugify(name), defaults={'name': name}
+            )
+            ids.append(category.id)
+        return ids
+
+    def create_books(self, count):
+        """Create ``count`` books; return their ids in popularity order and prices"""
+        category_ids = self.categories()
+        category_cdf = zipf_cdf(len(category_ids), 1.0)
+        ids = []
+        prices = []
+        started = timezone.now()
+
+        for offset in range(0, count, self.batch_size):
+            size = min(self.batch_size, count - offset)
+            batch_prices = np.clip(np.round(self.rng.lognormal(2.9, 0.5, size), 2), 1.0, 300.0)
+            in_stock = self.rng.random(size) >= 0.08
+            stock = self.rng.integers(1, 200, size, endpoint=True) * in_stock
+            featured = self.rng.random(size) < 0.0005
+            categories = sample(self.rng, category_cdf, size)
+            created = self.past(self.rng.uniform(0, CATALOG_HISTORY_DAYS, size))
+
+            books = [
+                Book(
+                    isbn=f'{ISBN_PREFIX}{offset + i:09d}',
+                    title=self.title(),
+                    author=self.author(),
+                    description=self.description(),
+                    category_id=category_ids[categories[i]],
+                    price=Decimal(f'{batch_prices[i]:.2f}'),
+                    stock_quantity=int(stock[i]),
+                    is_featured=bool(featured[i]),
+                    created_at=created[i],
+                    updated_at=created[i],
+                )
+                for i in range(size)
+            ]
+            with transaction.atomic():
+                Book.objects.bulk_create(books)
+            ids.extend(book.pk for book in books)
+            prices.extend(batch_prices)
+            self.progress('books', offset + size, count, started)
+
+        # Popularity rank is independent of insertion order
+        order = self.rng.permutation(len(ids))
+        return np.asarray(ids)[order], np.asarray(prices)[order]
+
+    def create_users(self, count):
+        """Create ``count`` customers and return their ids"""
+        password = make_password(PASSWORD)
+        ids = []
+        started = timezone.now()
+
+        for offset in range(0, count, self.batch_size):
+            size = min(self.batch_size, count - offset)
+            joined = self.past(self.rng.uniform(0, ORDER_HISTORY_DAYS, size))
+            users = []
+            for i in range(size):
+                first_name = self.text.choice(FIRST_NAMES)
+                last_name = self.text.choice(LAST_NAMES)
+                username = f'{USERNAME_PREFIX}{offset + i:07d}'
+                users.append(User(
+                    username=username,
+                    email=f'{username}@example.com',
+                    first_name=first_name,
+                    last_name=last_name,
+                    password=password,
+                    date_joined=joined[i],
+                ))
+            with transaction.atomic():
+                User.objects.bulk_create(users)
+            ids.extend(user.pk for user in users)
+            self.progress('users', offset + size, count, started)
+
+        return np.asarray(ids)
+
+    def create_carts(self, count, user_ids, book_ids):
+        """Give ``count`` distinct users a cart of popular-skewed books"""
+        book_cdf = zipf_cdf(len(book_ids), self.skew)
+        owners = self.rng.choice(user_ids, size=min(count, len(user_ids)), replace=False)
+        started = timezone.now()
+
+        for offset in range(0, len(owners), self.batch_size):
+            batch = owners[offset:offset + self.batch_size]
+            sizes = self.rng.integers(1, MAX_CART_ITEMS, len(batch), endpoint=True)
+            books = book_ids[sample(self.rng, book_cdf, int(sizes.sum()))]
+            quantities = self.rng.integers(1, 3, len(books), endpoint=True)
+
+            items = []
+            position = 0
+            for user_id, size in zip(batch, sizes):
+                seen = set()
+                for book_id, quantity in zip(books[position:position + size],
+                                             quantities[position:position + size]):
+                    if book_id not in seen:
+                        seen.add(book_id)
+                        items.append(CartItem(
+                            user_id=int(user_id), book_id=int(book_id), quantity=int(quantity)
+                        ))
+                position += size
+            with transaction.atomic():
+                CartItem.objects.bulk_create(items)
+            self.progress('carts', offset + len(batch), len(owners), started)
+
+    def create_orders(self, count, user_ids, book_ids, prices):
+        """Create ``count`` orders with Zipf-distributed books"""
+        book_cdf = zipf_cdf(len(book_ids), self.skew)
+        user_cdf = zipf_cdf(len(user_ids), 0.6)
+        users = user_ids[self.rng.permutation(len(user_ids))]
+        created_items = 0
+        started = timezone.now()
+
+        for offset in range(0, count, self.batch_size):
+            size = min(self.batch_size, count - offset)
+            sizes = np.minimum(self.rng.geometric(0.55, size), MAX_ORDER_ITEMS)
+            ranks = sample(self.rng, book_cdf, int(sizes.sum()))
+            quantities = np.minimum(self.rng.geometric(0.7, len(ranks)), MAX_ITEM_QUANTITY)
+            customers = users[sample(self.rng, user_cdf, size)]
+            ages = np.minimum(self.rng.exponential(120, size), ORDER_HISTORY_DAYS)
+            created = self.past(ages)
+            statuses = self.rng.choice(len(ORDER_STATUSES), size, p=ORDER_STATUS_WEIGHTS)
+
+            orders = []
+            lines = []
+            position = 0
+            for i in range(size):
+                merged = {}
+                for rank, quantity in zip(ranks[position:position + sizes[i]],
+                                          quantities[position:position + sizes[i]]):
+                    merged[rank] = merged.get(rank, 0) + int(quantity)
+                position += sizes[i]
+
+                order_lines = [
+                    (int(book_ids[rank]), quantity, Decimal(f'{prices[rank]:.2f}'))
+                    for rank, quantity in merged.items()
+                ]
+                status = ORDER_STATUSES[statuses[i]]
+                if ages[i] > 14 and status in ('pending', 'processing', 'shipped'):
+                    status = 'delivered'
+                city, state = CITIES[i % len(CITIES)]
+                orders.append(Order(
+                    user_id=int(customers[i]),
+                    total_amount=sum(price * quantity for _, quantity, price in order_lines),
+                    status=status,
+                    shipping_address=f'{100 + i % 9000} {self.text.choice(WORDS).title()} Street',
+                    shipping_city=city,
+                    shipping_state=state,
+                    shipping_zip_code=f'{10000 + i % 89999}',
+                    email_sent=True,
+                    created_at=created[i],
+                    updated_at=created[i],
+                ))
+                lines.append(order_lines)
+
+            with transaction.atomic():
+                Order.objects.bulk_create(orders)
+                items = [
+                    OrderItem(order_id=order.pk, book_id=book_id, quantity=quantity, price=price)
+                    for order, order_lines in zip(orders, lines)
+                    for book_id, quantity, price in order_lines
+                ]
+                OrderItem.objects.bulk_create(items)
+            created_items += len(items)
+            self.progress('orders', offset + size, count, started)
+
+        return created_items
+
+    def generate(self, books, users, carts, orders):
+        """Generate the whole dataset and return row counts"""
+        with explicit_timestamps(
+            Book._meta.get_field('created_at'), Book._meta.get_field('updated_at'),
+            Order._meta.get_field('created_at'), Order._meta.get_field('updated_at'),
+        ):
+            book_ids, prices = self.create_books(books)
+            user_ids = self.create_users(users)
+            if carts and len(user_ids) and len(book_ids):
+                self.create_carts(carts, user_ids, book_ids)
+            order_items = 0
+            if orders and len(user_ids) and len(book_ids):
+                order_items = self.create_orders(orders, user_ids, book_ids, prices)
+
+        return {
+            'books': len(book_ids),
+            'users': len(user_ids),
+            'carts': min(carts, len(user_ids)) if len(book_ids) else 0,
+            'orders': orders if len(user_ids) and len(book_ids) else 0,
+            'order_items': order_items,
+        }
+
+
+def synthetic_data_exists():
+    return (
+        Book.objects.filter(isbn__startswith=ISBN_PREFIX).exists()
+        or User.objects.filter(username__startswith=USERNAME_PREFIX).exists()
+    )
+
+
+def clear_synthetic_data():
+    """Delete generated users (with their carts and orders) and books"""
+    User.objects.filter(username__startswith=USERNAME_PREFIX).delete()
+    Book.objects.filter(isbn__startswith=ISBN_PREFIX).delete()
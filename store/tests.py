@@ -1,3 +1,1422 @@
-from django.test import TestCase
+"""
+Tests for the store app.
 
-# Create your tests here.
+Covers the derived data the store keeps next to the Book table and
+the write paths whose correctness depends on SQL the ORM does not
+check for us.
+"""
+
+import json
+import math
+import os
+import shutil
+import tempfile
+import unittest
+from datetime import datetime, time as dt_time, timedelta
+from decimal import Decimal
+from io import StringIO
+from unittest import mock
+
+import numpy as np
+from scipy import sparse
+
+from django.contrib.auth.models import User
+from django.core import mail
+from django.core.cache import cache
+from django.core.management import CommandError, call_command
+from django.db import connection
+from django.test import RequestFactory, TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from . import pagination, views
+from .autocomplete import CHANGE_CACHE_KEY, PrefixIndex, get_shared_version, prefix_index
+from .bestsellers import record_sales, roll_windows, top_books
+from .caching import get_catalog_version
+from .cart import (
+    ANONYMOUS_CART_COOKIE, MAX_CART_CHANGES, AnonymousCart, add_cart_quantity, apply_cart_changes,
+    cart_count_key, get_cart_count, merge_anonymous_cart,
+)
+from .catalog_io import CategoryResolver, RecordError, parse_record
+from .checkout import OutOfStock, place_order
+from .context_processors import cart_item_count
+from .emails import BUILDERS, deliver_pending, queue_order_confirmation
+from .exports import ExportError, stream_export
+from .facets import get_facets, rebuild_facets
+from .management.commands.check_query_plans import Command as CheckQueryPlans
+from .models import (
+    Book, BookFacetCount, BookSales, CartItem, Category, CoPurchase, Order, OrderItem, OutboxEmail,
+    RelatedBook, ReservedStock, Review, StockReservation,
+)
+from .pagination import count_queryset
+from .pdf_cache import cache_key, cache_path, evict, placeholder_pdf_bytes, warm
+from .recommendations import build_co_purchases, build_related_books, top_neighbours
+from .reservations import (
+    available_for_user, expire_holds, release_holds, repair_reserved_stock, set_holds,
+)
+from .reviews import repair_rating_aggregates
+from .search import PostgresSearchBackend, search_books
+from .search_cache import get_cached_page, search_cache_key
+from .shelves import get_featured_books
+from .synthetic import SyntheticDataGenerator, clear_synthetic_data
+
+
+def make_book(number, stock_quantity=5, price='19.99', **fields):
+    return Book.objects.create(**{
+        'title': f'Test Book {number}',
+        'author': 'Test Author',
+        'isbn': f'979000000{number:04d}',
+        'description': 'A book used by the test suite.',
+        'price': Decimal(price),
+        'stock_quantity': stock_quantity,
+        **fields,
+    })
+
+
+def make_order(user, books, status='pending'):
+    order = Order.objects.create(
+        user=user,
+        total_amount=Decimal('0'),
+        status=status,
+        shipping_address='1 Main Street',
+        shipping_city='Springfield',
+        shipping_state='IL',
+        shipping_zip_code='62701',
+        shipping_country='USA',
+    )
+    OrderItem.objects.bulk_create(
+        OrderItem(order=order, book=book, quantity=1, price=book.price) for book in books
+    )
+    return order
+
+
+
+
+
+class PDFCacheDirMixin:
+    """Point the PDF cache at a temporary directory"""
+
+    def setUp(self):
+        super().setUp()
+        pdf_cache_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, pdf_cache_dir, ignore_errors=True)
+        settings_override = override_settings(PDF_CACHE_DIR=pdf_cache_dir)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+
+class FullTextSearchTests(TestCase):
+    """The search index follows Book writes"""
+
+    def setUp(self):
+        self.python = make_book(1, title='Fluent Python', author='Luciano Ramalho')
+        self.django = make_book(
+            2, title='Two Scoops of Django', description='Best practices for Python web apps.'
+        )
+        make_book(3, title='Cooking at Home')
+
+    def search(self, query):
+        return set(search_books(Book.objects.all(), query))
+
+    def test_matches_prefixes_of_every_term(self):
+        self.assertEqual(self.search('pyth'), {self.python, self.django})
+        self.assertEqual(self.search('ramalho'), {self.python})
+        self.assertEqual(self.search('fluent pyth'), {self.python})
+        self.assertEqual(self.search('fluent scoops'), set())
+
+    def test_query_syntax_is_treated_as_words(self):
+        self.assertEqual(self.search('"python" OR NOT *'), set())
+        self.assertEqual(self.search('python*'), {self.python, self.django})
+
+    def test_index_follows_saves_and_deletes(self):
+        self.python.title = 'Effective Rust'
+        self.python.save()
+        self.django.delete()
+
+        self.assertEqual(self.search('fluent'), set())
+        self.assertEqual(self.search('rust'), {self.python})
+        self.assertEqual(self.search('scoops'), set())
+
+    def test_catalog_search_page(self):
+        response = self.client.get(reverse('book_list'), {'query': 'ramalho'})
+        self.assertContains(response, 'Fluent Python')
+        self.assertNotContains(response, 'Cooking at Home')
+
+
+class AutocompleteIndexTests(TestCase):
+    """The prefix trie ranks matches and replays other workers' changes"""
+
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+        self.python = make_book(1, title='Python Tricks', author='Dan Bader')
+        self.pythonic = make_book(2, title='Pythonic Code', author='Ann Lee', stock_quantity=0)
+        self.monty = make_book(3, title='Flying Circus', author='Monty Python')
+        self.index = PrefixIndex()
+
+    def titles(self, query):
+        return [result['title'] for result in self.index.lookup(query)]
+
+    def test_ranking(self):
+        # Title matches first, then in-stock books, then shorter titles
+        self.assertEqual(self.titles('pyth'), ['Python Tricks', 'Pythonic Code', 'Flying Circus'])
+        self.assertEqual(self.titles('python bader'), ['Python Tricks'])
+        self.assertEqual(self.titles('rust'), [])
+        self.assertEqual(self.titles('  '), [])
+
+    def test_change_log_is_replayed(self):
+        self.assertEqual(self.titles('monty'), ['Flying Circus'])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.monty.author = 'Graham Chapman'
+            self.monty.save()
+            self.python.delete()
+
+        # Another worker only notices on its next version check
+        self.index.checked_at = 0.0
+        with mock.patch.object(self.index, 'rebuild', side_effect=AssertionError):
+            self.assertEqual(self.titles('monty'), [])
+            self.assertEqual(self.titles('chapman'), ['Flying Circus'])
+            self.assertEqual(self.titles('pyth'), ['Pythonic Code'])
+        self.assertEqual(self.index.version, get_shared_version())
+
+    def test_missing_change_log_entry_forces_rebuild(self):
+        self.titles('pyth')
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.monty.delete()
+        cache.delete(CHANGE_CACHE_KEY.format(get_shared_version()))
+
+        self.index.checked_at = 0.0
+        with mock.patch.object(self.index, 'rebuild', wraps=self.index.rebuild) as rebuild:
+            self.assertEqual(self.titles('pyth'), ['Python Tricks', 'Pythonic Code'])
+        rebuild.assert_called_once()
+
+
+class KeysetPaginationTests(TestCase):
+    """Cursors walk a listing without skipping or repeating rows"""
+
+    def setUp(self):
+        # Identical text, so every book has the same relevance rank
+        self.ids = [
+            make_book(number, title='Tied Title', description='Same words.').pk
+            for number in range(30)
+        ]
+        self.url = reverse('book_list')
+
+    def walk(self, params, direction='next_cursor'):
+        pages = []
+        response = self.client.get(self.url, params)
+        while True:
+            pages.append([book.pk for book in response.context['books']])
+            cursor = response.context[direction]
+            if cursor is None:
+                return pages, response
+            response = self.client.get(self.url, {**params, 'cursor': cursor})
+
+    def test_tied_relevance_ranks_page_through_every_book_once(self):
+        pages, last = self.walk({'query': 'tied'})
+        self.assertEqual([len(page) for page in pages], [12, 12, 6])
+        self.assertEqual(sum(pages, []), self.ids)
+
+        back = [[book.pk for book in last.context['books']]]
+        cursor = last.context['previous_cursor']
+        while cursor is not None:
+            response = self.client.get(self.url, {'query': 'tied', 'cursor': cursor})
+            back.append([book.pk for book in response.context['books']])
+            cursor = response.context['previous_cursor']
+        self.assertEqual(back, pages[::-1])
+        self.assertEqual(response.context['page_obj'].number, 1)
+
+    def test_cursor_round_trip_with_a_column_sort(self):
+        pages, _ = self.walk({'sort_by': '-price'})
+        self.assertEqual(sum(pages, []), self.ids[::-1])
+
+    def test_tampered_or_foreign_cursor_shows_the_first_page(self):
+        first = self.client.get(self.url, {'query': 'tied'})
+        cursor = first.context['next_cursor']
+
+        for params in (
+            {'query': 'tied', 'cursor': cursor[:-4] + 'AAAA'},
+            {'query': 'tied', 'cursor': 'not-a-cursor'},
+            # Signed for the relevance ordering, not this one
+            {'query': 'tied', 'sort_by': 'title', 'cursor': cursor},
+        ):
+            response = self.client.get(self.url, params)
+            self.assertEqual(response.context['page_obj'].number, 1)
+            self.assertEqual(len(response.context['books']), 12)
+            self.assertIsNone(response.context['previous_cursor'])
+
+
+class ResultCountTests(TestCase):
+    """Catalog counts are cached per catalog version and may be estimates"""
+
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+        self.book = make_book(1)
+        make_book(2)
+
+    def test_count_is_cached_until_a_book_changes(self):
+        queryset = Book.objects.filter(price__lt=50)
+        self.assertEqual(count_queryset(queryset, use_cache=True), (2, True))
+        with self.assertNumQueries(0):
+            self.assertEqual(count_queryset(queryset, use_cache=True), (2, True))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.book.price = Decimal('99.00')
+            self.book.save()
+        self.assertEqual(count_queryset(queryset, use_cache=True), (1, True))
+
+    def test_large_results_use_the_planner_estimate(self):
+        with mock.patch.object(pagination, 'estimate_count', return_value=250000):
+            self.assertEqual(count_queryset(Book.objects.all(), use_cache=True), (250000, False))
+            response = self.client.get(reverse('book_list'), {'query': 'test'})
+        self.assertContains(response, 'about 250000 books found')
+
+
+class RelatedBooksTests(TestCase):
+    """Related books come from shared terms and skip unrelated books"""
+
+    def test_books_sharing_terms_are_related(self):
+        django = [
+            make_book(1, title='Django for Beginners', author='William Vincent', description='Web apps.'),
+            make_book(2, title='Django for APIs', author='William Vincent', description='REST services.'),
+            make_book(3, title='Two Scoops of Django', author='Daniel Feldroy', description='Web tips.'),
+        ]
+        cooking = make_book(4, title='Salt Fat Acid Heat', author='Samin Nosrat', description='Cooking.')
+
+        stats = build_related_books(top_k=2, full=True)
+
+        self.assertEqual(stats['recomputed'], 4)
+        related = {
+            book.pk: list(
+                RelatedBook.objects.filter(book=book).order_by('rank').values_list('related_id', flat=True)
+            )
+            for book in django + [cooking]
+        }
+        # Same author outweighs a shared title word
+        self.assertEqual(related[django[0].pk], [django[1].pk, django[2].pk])
+        self.assertIn(related[django[2].pk][0], {django[0].pk, django[1].pk})
+        self.assertEqual(related[cooking.pk], [])
+        self.assertNotIn(cooking.pk, sum(related.values(), []))
+
+
+class TopNeighboursTests(TestCase):
+    """Sparse, per-row pruned neighbours match the dense computation"""
+
+    def test_matches_dense_similarities(self):
+        matrix = sparse.random(60, 20, density=0.15, random_state=1, format='csr', dtype=np.float32)
+        dense = (matrix @ matrix.T).toarray()
+        np.fill_diagonal(dense, 0)
+
+        neighbours = dict(top_neighbours(matrix, list(range(60)), top_k=3, chunk_size=16))
+
+        for row in range(60):
+            expected = sorted((score for score in dense[row] if score > 0), reverse=True)[:3]
+            columns = [column for column, _ in neighbours[row]]
+            self.assertNotIn(row, columns)
+            np.testing.assert_allclose([score for _, score in neighbours[row]], expected, rtol=1e-6)
+
+
+class FacetCountTests(TestCase):
+    """Book writes move books between facet cells"""
+
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+        self.fiction = Category.objects.create(name='Test Fiction', slug='test-fiction')
+        self.history = Category.objects.create(name='Test History', slug='test-history')
+        self.book = make_book(1, price='15.00', category=self.fiction)
+        make_book(2, price='40.00', category=self.fiction)
+        make_book(3, price='60.00', category=self.history, stock_quantity=0)
+
+    def cells(self):
+        return {
+            (cell.category_id, cell.price_band, cell.in_stock): cell.count
+            for cell in BookFacetCount.objects.filter(count__gt=0)
+        }
+
+    def assert_cells_match_rebuild(self):
+        maintained = self.cells()
+        rebuild_facets()
+        self.assertEqual(maintained, self.cells())
+
+    def test_moves_on_category_price_and_stock_changes(self):
+        self.book.category = self.history
+        self.book.save()
+        self.assert_cells_match_rebuild()
+
+        self.book.price = Decimal('55.00')
+        self.book.stock_quantity = 0
+        self.book.save()
+        self.assertEqual(self.cells()[(self.history.pk, '50-plus', False)], 2)
+        self.assert_cells_match_rebuild()
+
+        self.book.delete()
+        self.assert_cells_match_rebuild()
+
+    def test_facets_respect_the_other_active_filter(self):
+        facets = get_facets(price_band='35-50')
+        counts = {category['slug']: category['count'] for category in facets['categories']}
+        self.assertEqual(counts['test-fiction'], 1)
+        self.assertEqual(counts['test-history'], 0)
+
+        facets = get_facets(category_id=self.fiction.pk)
+        bands = {band['key']: band['count'] for band in facets['price_bands']}
+        self.assertEqual(bands, {'under-20': 1, '20-35': 0, '35-50': 1, '50-plus': 0})
+        self.assertEqual((facets['in_stock'], facets['out_of_stock']), (2, 0))
+
+    def test_deleting_a_category_rebuilds_the_cells(self):
+        self.history.delete()
+        self.assertEqual(self.cells(), {
+            (self.fiction.pk, 'under-20', True): 1,
+            (self.fiction.pk, '35-50', True): 1,
+            (None, '50-plus', False): 1,
+        })
+
+
+class FuzzySearchTests(TestCase):
+    """Misspelled queries fall back to trigram matching"""
+
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+        self.tricks = make_book(1, title='Python Tricks', author='Dan Bader')
+        self.crash = make_book(2, title='Python Crash Course', author='Eric Matthes')
+        make_book(3, title='Cooking at Home')
+        # Make the shared index reload these books
+        prefix_index.version = None
+
+    def test_misspelled_query_is_ranked_by_similarity(self):
+        results = list(search_books(Book.objects.all(), 'pythn triks').order_by('-search_rank', 'id'))
+        self.assertEqual(results[0], self.tricks)
+        self.assertNotIn('Cooking at Home', [book.title for book in results])
+
+    def test_exact_matches_skip_the_fuzzy_fallback(self):
+        with mock.patch.object(prefix_index, 'fuzzy_matches') as fuzzy_matches:
+            results = set(search_books(Book.objects.all(), 'crash'))
+        fuzzy_matches.assert_not_called()
+        self.assertEqual(results, {self.crash})
+
+    def test_catalog_page_finds_misspelled_author(self):
+        response = self.client.get(reverse('book_list'), {'query': 'matthez'})
+        self.assertContains(response, 'Python Crash Course')
+
+
+@unittest.skipUnless(connection.vendor == 'postgresql', 'pg_trgm is PostgreSQL only')
+class PostgresFuzzySearchTests(TransactionTestCase):
+    """The trigram threshold only applies inside the fuzzy query's transaction"""
+
+    # Keep the categories seeded by migrations for later tests
+    serialized_rollback = True
+
+    def test_threshold_does_not_leak_into_the_session(self):
+        tricks = make_book(1, title='Python Tricks', author='Dan Bader')
+
+        def threshold():
+            with connection.cursor() as cursor:
+                cursor.execute("SHOW pg_trgm.word_similarity_threshold")
+                return cursor.fetchone()[0]
+
+        before = threshold()
+        results = PostgresSearchBackend().fuzzy_search(Book.objects.all(), 'pythn triks')
+        self.assertEqual(threshold(), before)
+        self.assertEqual(list(results), [tricks])
+
+
+class QueryPlanTests(TestCase):
+    """Storefront queries are served by the partial indexes"""
+
+    def setUp(self):
+        category = Category.objects.create(name='Test Fiction', slug='test-fiction')
+        for number in range(20):
+            make_book(number, category=category, is_featured=number % 2 == 0)
+
+    def test_storefront_queries_use_indexes(self):
+        out = StringIO()
+        call_command('check_query_plans', min_books=0, stdout=out)
+        self.assertIn('All storefront queries use indexes.', out.getvalue())
+        self.assertNotIn('SEQ SCAN', out.getvalue())
+
+    def test_sequential_scans_are_reported(self):
+        scanned = CheckQueryPlans().sequential_scans(Book.objects.filter(description__contains='suite'))
+        self.assertIn(Book._meta.db_table, scanned)
+
+
+class FeaturedShelfTests(TestCase):
+    """Admin featured actions refresh the cached shelves"""
+
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+        self.books = [make_book(number) for number in range(3)]
+        admin_user = User.objects.create_superuser('admin', 'admin@example.com', 'password')
+        self.client.force_login(admin_user)
+
+    def run_action(self, action, books):
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(reverse('admin:store_book_changelist'), {
+                'action': action,
+                '_selected_action': [book.pk for book in books],
+            })
+        self.assertEqual(response.status_code, 302)
+
+    def test_actions_invalidate_the_featured_shelf(self):
+        self.assertEqual(get_featured_books(), [])
+
+        self.run_action('mark_as_featured', self.books[:2])
+        self.assertEqual(set(get_featured_books()), set(self.books[:2]))
+
+        self.run_action('mark_as_not_featured', self.books[:1])
+        self.assertEqual(get_featured_books(), [self.books[1]])
+
+    def test_actions_refresh_the_autocomplete_index(self):
+        prefix_index.version = None
+        self.assertEqual(prefix_index.lookup('test')[0]['id'], self.books[0].pk)
+
+        self.run_action('mark_as_featured', self.books[2:])
+        # Featured books rank first among equally long titles
+        self.assertEqual(prefix_index.lookup('test')[0]['id'], self.books[2].pk)
+
+
+class SearchResultCacheTests(TestCase):
+    """Cached search pages only carry a total count in page-number mode"""
+
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+        for number in range(15):
+            make_book(number)
+        self.url = reverse('book_list')
+
+    def test_numbered_page_caches_its_count(self):
+        response = self.client.get(self.url, {'query': 'Test Book'})
+        self.assertContains(response, '15 books found')
+
+        paginator, page, context = get_cached_page(
+            search_cache_key('Test Book', None, None, 'relevance', None, None), 12
+        )
+        self.assertEqual(paginator.count, 15)
+        self.assertEqual(len(page), 12)
+
+    def test_cursor_page_skips_the_count(self):
+        first = self.client.get(self.url, {'query': 'Test Book'})
+        params = {'query': 'Test Book', 'cursor': first.context['next_cursor']}
+
+        with mock.patch.object(pagination, 'count_queryset', wraps=pagination.count_queryset) as count:
+            miss = self.client.get(self.url, params)
+            hit = self.client.get(self.url, params)
+        count.assert_not_called()
+
+        for response in (miss, hit):
+            self.assertEqual(len(response.context['books']), 3)
+            self.assertNotContains(response, 'books found')
+
+    def test_book_writes_invalidate_cached_pages(self):
+        self.client.get(self.url, {'query': 'Test Book'})
+        book = Book.objects.get(isbn='9790000000003')
+        with self.captureOnCommitCallbacks(execute=True):
+            book.title = 'Test Book Renamed'
+            book.save()
+
+        response = self.client.get(self.url, {'query': 'Test Book'})
+        self.assertContains(response, 'Test Book Renamed')
+
+
+class RatingAggregateTests(TestCase):
+    """Review writes keep the book's rating aggregates in step"""
+
+    def setUp(self):
+        self.book = make_book(1)
+        self.other_book = make_book(2)
+        self.users = [User.objects.create_user(f'reader{number}') for number in range(3)]
+
+    def assert_ratings(self, book, rating_sum, rating_count, rating_average):
+        book.refresh_from_db()
+        self.assertEqual((book.rating_sum, book.rating_count), (rating_sum, rating_count))
+        self.assertAlmostEqual(book.rating_average, rating_average)
+
+    def test_create_edit_move_and_delete(self):
+        first = Review.objects.create(user=self.users[0], book=self.book, rating=5)
+        second = Review.objects.create(user=self.users[1], book=self.book, rating=2)
+        self.assert_ratings(self.book, 7, 2, 3.5)
+
+        second.rating = 4
+        second.save()
+        self.assert_ratings(self.book, 9, 2, 4.5)
+
+        second.book = self.other_book
+        second.save()
+        self.assert_ratings(self.book, 5, 1, 5.0)
+        self.assert_ratings(self.other_book, 4, 1, 4.0)
+
+        first.delete()
+        self.assert_ratings(self.book, 0, 0, 0.0)
+        self.assertEqual(repair_rating_aggregates(), 0)
+
+    def test_stale_book_save_keeps_newer_reviews(self):
+        stale = Book.objects.get(pk=self.book.pk)
+        Review.objects.create(user=self.users[0], book=self.book, rating=4)
+
+        stale.price = Decimal('9.99')
+        stale.save()
+
+        self.assert_ratings(self.book, 4, 1, 4.0)
+        self.assertEqual(self.book.price, Decimal('9.99'))
+
+    def test_repair_fixes_drifted_aggregates(self):
+        Review.objects.create(user=self.users[0], book=self.book, rating=5)
+        Book.objects.filter(pk=self.book.pk).update(rating_sum=1, rating_count=3, rating_average=0.3)
+
+        self.assertEqual(repair_rating_aggregates(), 1)
+        self.assert_ratings(self.book, 5, 1, 5.0)
+
+
+class BestsellerTests(TestCase):
+    """Sales counters follow the day buckets as the windows roll"""
+
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+        self.today = timezone.localdate()
+        self.older = make_book(1)
+        self.newer = make_book(2)
+
+    def counters(self, book):
+        sales = BookSales.objects.get(book=book)
+        return sales.quantity_7d, sales.quantity_30d, sales.quantity_total
+
+    def test_windows_roll(self):
+        record_sales(
+            [(self.older.pk, 2), (self.newer.pk, 1), (self.older.pk, 1)],
+            day=self.today - timedelta(days=10)
+        )
+        record_sales([(self.newer.pk, 5)], day=self.today)
+        self.assertEqual(self.counters(self.older), (3, 3, 3))
+
+        roll_windows(self.today)
+        self.assertEqual(self.counters(self.older), (0, 3, 3))
+        self.assertEqual(self.counters(self.newer), (5, 6, 6))
+        self.assertEqual(top_books('7d'), [self.newer])
+        self.assertEqual(top_books('30d'), [self.newer, self.older])
+
+        roll_windows(self.today + timedelta(days=21))
+        self.assertEqual(self.counters(self.older), (0, 0, 3))
+        self.assertEqual(self.counters(self.newer), (0, 5, 6))
+        self.assertEqual(top_books('all'), [self.newer, self.older])
+
+    def test_sold_out_books_leave_the_shelf(self):
+        record_sales([(self.older.pk, 1), (self.newer.pk, 2)])
+        Book.objects.filter(pk=self.newer.pk).update(stock_quantity=0)
+        self.assertEqual(top_books('7d'), [self.older])
+
+    def test_shelf_headings_follow_their_windows(self):
+        record_sales([(self.older.pk, 1)])
+        self.assertContains(self.client.get(reverse('home')), 'Bestsellers This Week')
+        self.assertContains(self.client.get(reverse('book_list')), 'Bestsellers This Month')
+
+        with mock.patch.object(views, 'HOME_BESTSELLER_WINDOW', 'all'):
+            self.assertContains(self.client.get(reverse('home')), 'Bestsellers of All Time')
+
+
+class CoPurchaseTests(TestCase):
+    """Co-purchase pairs come from whole, non-cancelled orders"""
+
+    def setUp(self):
+        self.user = User.objects.create_user('reader')
+        self.a, self.b, self.c = [make_book(number) for number in range(3)]
+        make_order(self.user, [self.a, self.b])
+        make_order(self.user, [self.a, self.b])
+        make_order(self.user, [self.a, self.c])
+        make_order(self.user, [self.a, self.c], status='cancelled')
+
+    def pairs(self):
+        return {
+            (row.book_id, row.related_id): (row.together, row.score)
+            for row in CoPurchase.objects.all()
+        }
+
+    def test_pairs_need_min_support(self):
+        stats = build_co_purchases(min_support=2)
+
+        self.assertEqual(stats['order_items'], 6)
+        pairs = self.pairs()
+        self.assertEqual(set(pairs), {(self.a.pk, self.b.pk), (self.b.pk, self.a.pk)})
+        together, score = pairs[(self.a.pk, self.b.pk)]
+        self.assertEqual(together, 2)
+        # Cosine over orders: 2 shared / sqrt(3 orders of a * 2 orders of b)
+        self.assertAlmostEqual(score, 2 / math.sqrt(6), places=6)
+
+    def test_large_baskets_are_skipped_and_stale_rows_removed(self):
+        build_co_purchases(min_support=2)
+        make_order(self.user, [self.a, self.c, make_book(3)])
+        make_order(self.user, [self.a, self.c, make_book(4)])
+
+        build_co_purchases(min_support=2, max_basket=2)
+        self.assertEqual(set(self.pairs()), {(self.a.pk, self.b.pk), (self.b.pk, self.a.pk)})
+
+        OrderItem.objects.filter(book=self.b).delete()
+        build_co_purchases(min_support=2, max_basket=2)
+        self.assertEqual(self.pairs(), {})
+
+
+class CatalogAPITests(TestCase):
+    """Conditional GETs on the JSON API are answered before any book data is read"""
+
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+        self.books = [make_book(number) for number in range(3)]
+
+    def test_list_pages_follow_next_link(self):
+        response = self.client.get(reverse('api_book_list'), {'page_size': 2, 'sort_by': 'title'})
+        data = response.json()
+        self.assertEqual(len(data['results']), 2)
+        self.assertIsNotNone(data['next'])
+
+        data = self.client.get(data['next']).json()
+        self.assertEqual([row['id'] for row in data['results']], [self.books[2].pk])
+        self.assertIsNone(data['next'])
+
+    def test_list_etag_answers_304_without_queries(self):
+        url = reverse('api_book_list')
+        etag = self.client.get(url, {'sort_by': 'title'})['ETag']
+
+        with self.assertNumQueries(0):
+            response = self.client.get(url, {'sort_by': 'title'}, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+        # Different query parameters get a different validator
+        response = self.client.get(url, {'sort_by': 'price'}, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+
+    def test_list_etag_changes_with_catalog(self):
+        url = reverse('api_book_list')
+        etag = self.client.get(url)['ETag']
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.books[0].price = Decimal('5.00')
+            self.books[0].save()
+
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_detail_last_modified(self):
+        url = reverse('api_book_detail', args=[self.books[0].pk])
+        response = self.client.get(url)
+        self.assertEqual(response.json()['isbn'], self.books[0].isbn)
+
+        response = self.client.get(url, HTTP_IF_MODIFIED_SINCE=response['Last-Modified'])
+        self.assertEqual(response.status_code, 304)
+
+    def test_detail_missing_book(self):
+        response = self.client.get(reverse('api_book_detail', args=[0]))
+        self.assertEqual(response.status_code, 404)
+
+
+class CatalogImportTests(TestCase):
+    """Feed records are validated one by one and never abort an import"""
+
+    def setUp(self):
+        self.categories = CategoryResolver()
+
+    def record(self, **fields):
+        record = {'isbn': '9780000000001', 'title': 'Feed Book', 'author': 'Feed Author', 'price': '12.50'}
+        record.update(fields)
+        return record
+
+    def test_valid_record(self):
+        book = parse_record(self.record(title=1984, stock_quantity='7'), self.categories)
+        self.assertEqual(book.title, '1984')
+        self.assertEqual(book.price, Decimal('12.50'))
+        self.assertEqual(book.stock_quantity, 7)
+
+    def test_invalid_records_are_rejected(self):
+        invalid = [
+            self.record(price='NaN'),
+            self.record(price='Infinity'),
+            self.record(price='-1'),
+            self.record(price='100000000.00'),
+            self.record(price=None),
+            self.record(stock_quantity='lots'),
+            self.record(stock_quantity=float('inf')),
+            self.record(stock_quantity=2 ** 40),
+            self.record(title=''),
+            self.record(isbn='123'),
+        ]
+        for record in invalid:
+            with self.subTest(record=record):
+                with self.assertRaises(RecordError):
+                    parse_record(record, self.categories)
+
+    def test_bad_jsonl_lines_are_rejected_not_fatal(self):
+        lines = [
+            json.dumps(self.record(isbn='9780000000001')),
+            '{"isbn": "9780000000002", "title": ',
+            '[]',
+            '"just a string"',
+            json.dumps(self.record(isbn='9780000000003', price='NaN')),
+            json.dumps(self.record(isbn='9780000000004')),
+        ]
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory, ignore_errors=True)
+        path = os.path.join(directory, 'feed.jsonl')
+        with open(path, 'w', encoding='utf-8') as handle:
+            handle.write('\n'.join(lines) + '\n')
+
+        stderr = StringIO()
+        call_command('import_catalog', path, '--skip-refresh', stdout=StringIO(), stderr=stderr)
+
+        self.assertEqual(
+            sorted(Book.objects.values_list('isbn', flat=True)),
+            ['9780000000001', '9780000000004'],
+        )
+        self.assertEqual(stderr.getvalue().count('Record '), 4)
+
+
+class ExportTests(TestCase):
+    """Exports stream the whole table in primary key order, chunk by chunk"""
+
+    def setUp(self):
+        self.books = [make_book(number) for number in range(3)]
+
+    def test_csv_chunks_concatenate_to_one_file(self):
+        chunks = list(stream_export('books', 'csv', chunk_size=2))
+        self.assertEqual(len(chunks), 2)
+
+        lines = b''.join(chunks).decode().splitlines()
+        self.assertTrue(lines[0].startswith('id,title,author,isbn,'))
+        self.assertEqual(
+            [line.split(',')[0] for line in lines[1:]],
+            [str(book.pk) for book in self.books],
+        )
+
+    def test_jsonl_rows(self):
+        output = b''.join(stream_export('books', 'jsonl', chunk_size=2)).decode()
+        rows = [json.loads(line) for line in output.splitlines()]
+        self.assertEqual([row['isbn'] for row in rows], [book.isbn for book in self.books])
+        self.assertEqual(rows[0]['price'], '19.99')
+        self.assertIn('category_id', rows[0])
+
+    def test_unknown_dataset_or_format(self):
+        with self.assertRaises(ExportError):
+            stream_export('users', 'csv')
+        with self.assertRaises(ExportError):
+            stream_export('books', 'xlsx')
+
+    def test_command_writes_file(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory, ignore_errors=True)
+        path = os.path.join(directory, 'books.jsonl')
+
+        call_command('export_data', 'books', '--format', 'jsonl', '--output', path, stdout=StringIO())
+
+        with open(path, encoding='utf-8') as handle:
+            self.assertEqual(len(handle.readlines()), 3)
+
+    def test_admin_download_requires_staff(self):
+        url = reverse('admin:store_book_export', args=['csv'])
+        staff = User.objects.create_superuser('admin', password='secret')
+
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 302)
+
+        self.client.force_login(staff)
+        response = self.client.get(url)
+        self.assertEqual(response['Content-Type'], 'text/csv')
+        self.assertIn('attachment;', response['Content-Disposition'])
+        self.assertEqual(len(b''.join(response.streaming_content).splitlines()), 4)
+
+        response = self.client.get(reverse('admin:store_book_export', args=['xlsx']))
+        self.assertEqual(response.status_code, 404)
+
+
+class SyntheticDataTests(TestCase):
+    """The load-test generator is deterministic and internally consistent"""
+
+    def generate(self, seed=7):
+        return SyntheticDataGenerator(seed=seed, batch_size=25).generate(
+            books=60, users=10, carts=4, orders=40,
+        )
+
+    def snapshot(self):
+        return (
+            list(Book.objects.order_by('isbn').values_list('isbn', 'title', 'price', 'stock_quantity')),
+            list(Order.objects.order_by('user__username', 'created_at', 'total_amount').values_list(
+                'user__username', 'total_amount', 'status', 'created_at',
+            )),
+            sorted(CartItem.objects.values_list('user__username', 'book__isbn', 'quantity')),
+        )
+
+    def test_same_seed_same_data(self):
+        stats = self.generate()
+        self.assertEqual(stats['books'], 60)
+        self.assertEqual(stats['orders'], 40)
+        first = self.snapshot()
+
+        clear_synthetic_data()
+        self.assertFalse(Book.objects.exists())
+        self.assertFalse(Order.objects.exists())
+
+        self.generate()
+        self.assertEqual(self.snapshot(), first)
+
+    def test_orders_are_consistent(self):
+        stats = self.generate()
+        self.assertEqual(OrderItem.objects.count(), stats['order_items'])
+
+        # Generated dates lie before today; auto_now_add would give "now"
+        today = timezone.make_aware(datetime.combine(timezone.localdate(), dt_time.min))
+        for order in Order.objects.prefetch_related('items'):
+            items = list(order.items.all())
+            self.assertTrue(items)
+            self.assertEqual(order.total_amount, sum(item.price * item.quantity for item in items))
+            self.assertLessEqual(order.created_at, today)
+
+    def test_command_refuses_to_add_to_existing_data(self):
+        options = {'books': 5, 'users': 2, 'carts': 1, 'orders': 3, 'skip_refresh': True, 'stdout': StringIO()}
+        call_command('generate_load_data', **options)
+        with self.assertRaises(CommandError):
+            call_command('generate_load_data', **options)
+
+        call_command('generate_load_data', clear=True, **options)
+        self.assertEqual(Book.objects.count(), 5)
+
+
+class CartCountTests(TestCase):
+    """The cart badge count is cached per user and dropped when items come or go"""
+
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+        self.user = User.objects.create_user('reader')
+        self.books = [make_book(number) for number in range(2)]
+
+    def add(self, book):
+        with self.captureOnCommitCallbacks(execute=True):
+            return CartItem.objects.create(user=self.user, book=book, quantity=1)
+
+    def test_count_is_cached(self):
+        self.add(self.books[0])
+        with self.assertNumQueries(1):
+            self.assertEqual(get_cart_count(self.user.pk), 1)
+        with self.assertNumQueries(0):
+            self.assertEqual(get_cart_count(self.user.pk), 1)
+
+    def test_adding_and_removing_items_drop_the_count(self):
+        item = self.add(self.books[0])
+        self.assertEqual(get_cart_count(self.user.pk), 1)
+
+        self.add(self.books[1])
+        self.assertIsNone(cache.get(cart_count_key(self.user.pk)))
+        self.assertEqual(get_cart_count(self.user.pk), 2)
+
+        # Changing a quantity keeps the entry
+        with self.captureOnCommitCallbacks(execute=True):
+            item.quantity = 3
+            item.save()
+        self.assertEqual(cache.get(cart_count_key(self.user.pk)), 2)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            item.delete()
+        self.assertEqual(get_cart_count(self.user.pk), 1)
+
+    def test_context_processor_is_lazy(self):
+        self.add(self.books[0])
+        request = RequestFactory().get('/')
+        request.user = self.user
+
+        with self.assertNumQueries(0):
+            count = cart_item_count(request)['cart_item_count']
+        with self.assertNumQueries(1):
+            self.assertEqual(count(), 1)
+            self.assertEqual(count(), 1)
+
+
+class AnonymousCartTests(TestCase):
+    """Anonymous carts live in a signed cookie and are merged into the account on login"""
+
+    def setUp(self):
+        self.user = User.objects.create_user('reader', password='secret')
+        self.books = [make_book(number, stock_quantity=3) for number in range(3)]
+
+    def add(self, book, quantity):
+        return self.client.post(reverse('add_to_cart', args=[book.pk]), {'quantity': quantity})
+
+    def cookie_cart(self):
+        request = RequestFactory().get('/')
+        request.COOKIES = {key: morsel.value for key, morsel in self.client.cookies.items()}
+        return AnonymousCart(request)
+
+    def test_anonymous_add_uses_the_cookie(self):
+        self.add(self.books[0], 1)
+        self.add(self.books[0], 1)
+        self.add(self.books[1], 1)
+
+        self.assertEqual(self.cookie_cart().quantities, {self.books[0].pk: 2, self.books[1].pk: 1})
+        self.assertFalse(CartItem.objects.exists())
+
+        # More than the stock is refused
+        self.add(self.books[0], 2)
+        self.assertEqual(self.cookie_cart().quantity(self.books[0].pk), 2)
+
+    def test_tampered_cookie_is_an_empty_cart(self):
+        self.add(self.books[0], 1)
+        value = self.client.cookies[ANONYMOUS_CART_COOKIE].value
+        self.client.cookies[ANONYMOUS_CART_COOKIE] = value.replace('{', '{"%d": 99, ' % self.books[1].pk, 1)
+
+        self.assertEqual(self.cookie_cart().quantities, {})
+
+    def test_login_merges_and_clears_the_cookie(self):
+        CartItem.objects.create(user=self.user, book=self.books[0], quantity=2)
+        self.add(self.books[0], 2)
+        self.add(self.books[1], 1)
+        self.add(self.books[2], 1)
+        Book.objects.filter(pk=self.books[2].pk).update(stock_quantity=0)
+
+        response = self.client.post(reverse('login'), {'username': 'reader', 'password': 'secret'})
+
+        self.assertEqual(
+            dict(CartItem.objects.filter(user=self.user).values_list('book_id', 'quantity')),
+            # Existing 2 plus 2 from the cookie, capped at the stock of 3
+            {self.books[0].pk: 3, self.books[1].pk: 1},
+        )
+        self.assertEqual(response.cookies[ANONYMOUS_CART_COOKIE].value, '')
+
+    def test_merge_empty_cart_is_free(self):
+        cart = AnonymousCart(RequestFactory().get('/'))
+        with self.assertNumQueries(0):
+            merge_anonymous_cart(self.user, cart)
+
+
+class CartBatchTests(TestCase):
+    """Batches of cart changes are applied all at once or not at all"""
+
+    def setUp(self):
+        self.user = User.objects.create_user('reader', password='secret')
+        self.books = [make_book(number, stock_quantity=3) for number in range(12)]
+
+    def post(self, items):
+        return self.client.post(
+            reverse('api_cart'), json.dumps({'items': items}), content_type='application/json'
+        )
+
+    def cart(self):
+        return dict(CartItem.objects.filter(user=self.user).values_list('book_id', 'quantity'))
+
+    def request(self):
+        request = RequestFactory().post('/')
+        request.user = self.user
+        return request
+
+    def test_batch_adds_updates_and_removes(self):
+        first, second, third = self.books[:3]
+        CartItem.objects.create(user=self.user, book=first, quantity=1)
+        CartItem.objects.create(user=self.user, book=second, quantity=1)
+        self.client.force_login(self.user)
+
+        response = self.post([
+            {'book_id': first.pk, 'quantity': 3},
+            {'book_id': second.pk, 'quantity': 0},
+            {'book_id': third.pk, 'quantity': 2},
+        ])
+
+        self.assertEqual(self.cart(), {first.pk: 3, third.pk: 2})
+        data = response.json()
+        self.assertEqual(data['count'], 2)
+        self.assertEqual(data['total'], '99.95')
+
+    def test_invalid_batch_changes_nothing(self):
+        first = self.books[0]
+        CartItem.objects.create(user=self.user, book=first, quantity=1)
+        self.client.force_login(self.user)
+
+        response = self.post([
+            {'book_id': first.pk, 'quantity': 2},
+            {'book_id': self.books[1].pk, 'quantity': 4},
+            {'book_id': self.books[2].pk, 'quantity': -1},
+            {'book_id': 0, 'quantity': 1},
+        ])
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(
+            [error['book_id'] for error in response.json()['errors']],
+            [self.books[1].pk, self.books[2].pk, 0],
+        )
+        self.assertEqual(self.cart(), {first.pk: 1})
+
+    def test_malformed_body(self):
+        self.client.force_login(self.user)
+        for body in ['not json', '{}', '{"items": [{"book_id": "x", "quantity": 1}]}']:
+            with self.subTest(body=body):
+                response = self.client.post(reverse('api_cart'), body, content_type='application/json')
+                self.assertEqual(response.status_code, 400)
+
+    def test_too_many_changes(self):
+        changes = {book_id: 1 for book_id in range(1, MAX_CART_CHANGES + 2)}
+        with self.assertNumQueries(0):
+            errors = apply_cart_changes(self.request(), changes)
+        self.assertEqual(len(errors), 1)
+
+    def test_query_count_does_not_grow_with_the_batch(self):
+        def count_queries(books):
+            with CaptureQueriesContext(connection) as queries:
+                self.assertEqual(apply_cart_changes(self.request(), {book.pk: 1 for book in books}), [])
+            return len(queries)
+
+        self.assertEqual(count_queries(self.books[:2]), count_queries(self.books[2:]))
+
+    def test_anonymous_batch_uses_the_cookie(self):
+        response = self.post([
+            {'book_id': self.books[0].pk, 'quantity': 2},
+            {'book_id': self.books[1].pk, 'quantity': 1},
+        ])
+
+        self.assertEqual(response.json()['count'], 2)
+        self.assertIn(ANONYMOUS_CART_COOKIE, response.cookies)
+        self.assertFalse(CartItem.objects.exists())
+
+
+class AddToCartTests(TestCase):
+    """The single-statement cart upsert and its stock guard"""
+
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+        self.user = User.objects.create_user('reader')
+        self.book = make_book(1, stock_quantity=3)
+
+    def test_add_inserts_then_increments(self):
+        self.assertEqual(add_cart_quantity(self.user.pk, self.book.pk, 1), 1)
+        self.assertEqual(add_cart_quantity(self.user.pk, self.book.pk, 2), 3)
+        self.assertEqual(CartItem.objects.get(user=self.user, book=self.book).quantity, 3)
+        self.assertEqual(StockReservation.objects.get(user=self.user, book=self.book).quantity, 3)
+
+    def test_oversell_is_refused(self):
+        self.assertIsNone(add_cart_quantity(self.user.pk, self.book.pk, 4))
+        self.assertFalse(CartItem.objects.filter(user=self.user).exists())
+
+        add_cart_quantity(self.user.pk, self.book.pk, 2)
+        self.assertIsNone(add_cart_quantity(self.user.pk, self.book.pk, 2))
+        self.assertEqual(CartItem.objects.get(user=self.user, book=self.book).quantity, 2)
+        self.assertEqual(ReservedStock.objects.get(book=self.book).quantity, 2)
+
+    def test_unknown_book(self):
+        self.assertIsNone(add_cart_quantity(self.user.pk, self.book.pk + 1000, 1))
+
+    def test_ajax_add_query_count(self):
+        self.client.force_login(self.user)
+        url = reverse('add_to_cart_ajax', args=[self.book.pk])
+
+        # Session and user, then BEGIN, the upsert, SAVEPOINT, five hold
+        # statements, RELEASE and COMMIT; a new line also recounts the badge
+        with self.assertNumQueries(13):
+            response = self.client.post(url, {'quantity': 1})
+        self.assertEqual(response.json()['cart_item_count'], 1)
+
+        with self.assertNumQueries(12):
+            response = self.client.post(url, {'quantity': 1})
+        self.assertEqual(response.json()['quantity'], 2)
+
+        response = self.client.post(url, {'quantity': 2})
+        self.assertEqual(response.status_code, 409)
+
+
+class StockReservationTests(TestCase):
+    """Holds, the ReservedStock counter, expiry and repair"""
+
+    def setUp(self):
+        self.user = User.objects.create_user('reader')
+        self.other = User.objects.create_user('other')
+        self.book = make_book(1, stock_quantity=3)
+
+    def reserved(self):
+        return ReservedStock.objects.get(book=self.book).quantity
+
+    def test_copies_held_by_another_user_are_unavailable(self):
+        self.assertEqual(set_holds(self.other.pk, {self.book.pk: 2}), [])
+
+        self.assertEqual(available_for_user(self.user.pk, [self.book.pk]), {self.book.pk: 1})
+        self.assertEqual(available_for_user(self.other.pk, [self.book.pk]), {self.book.pk: 3})
+        self.assertEqual(set_holds(self.user.pk, {self.book.pk: 2}), [self.book.pk])
+        self.assertIsNone(add_cart_quantity(self.user.pk, self.book.pk, 2))
+        self.assertFalse(CartItem.objects.filter(user=self.user).exists())
+        self.assertEqual(self.reserved(), 2)
+
+        self.assertEqual(set_holds(self.user.pk, {self.book.pk: 1}), [])
+        self.assertEqual(self.reserved(), 3)
+
+    def test_lowering_and_releasing_holds(self):
+        set_holds(self.user.pk, {self.book.pk: 3})
+        set_holds(self.user.pk, {self.book.pk: 1})
+        self.assertEqual(self.reserved(), 1)
+
+        release_holds(self.user.pk, [self.book.pk])
+        self.assertEqual(self.reserved(), 0)
+        self.assertFalse(StockReservation.objects.exists())
+
+    def test_expired_holds_are_released(self):
+        set_holds(self.user.pk, {self.book.pk: 2})
+        set_holds(self.other.pk, {self.book.pk: 1})
+        StockReservation.objects.filter(user=self.user).update(
+            expires_at=timezone.now() - timedelta(seconds=1)
+        )
+
+        self.assertEqual(expire_holds(batch_size=1), 1)
+
+        self.assertEqual(self.reserved(), 1)
+        self.assertEqual(
+            list(StockReservation.objects.values_list('user_id', flat=True)), [self.other.pk]
+        )
+        self.assertEqual(available_for_user(self.user.pk, [self.book.pk]), {self.book.pk: 2})
+
+    def test_repair_recomputes_counters(self):
+        set_holds(self.user.pk, {self.book.pk: 2})
+        ReservedStock.objects.filter(book=self.book).update(quantity=0)
+
+        self.assertEqual(repair_reserved_stock(), 1)
+        self.assertEqual(self.reserved(), 2)
+
+
+class BookDetailAvailabilityTests(TestCase):
+    """The book page offers only copies that no cart holds"""
+
+    def setUp(self):
+        self.book = make_book(1, stock_quantity=2)
+        self.url = reverse('book_detail', args=[self.book.pk])
+
+    def test_partly_held_book(self):
+        add_cart_quantity(User.objects.create_user('other').pk, self.book.pk, 1)
+        response = self.client.get(self.url)
+        self.assertContains(response, 'In Stock (1 available)')
+        self.assertContains(response, reverse('add_to_cart', args=[self.book.pk]))
+
+    def test_fully_held_book_is_out_of_stock(self):
+        add_cart_quantity(User.objects.create_user('other').pk, self.book.pk, 2)
+        response = self.client.get(self.url)
+        self.assertNotContains(response, 'In Stock')
+        self.assertNotContains(response, reverse('add_to_cart', args=[self.book.pk]))
+
+
+class AnonymousAvailabilityTests(TestCase):
+    """Cookie carts can only take copies that no other cart holds"""
+
+    def setUp(self):
+        self.book = make_book(1, stock_quantity=3)
+        add_cart_quantity(User.objects.create_user('other').pk, self.book.pk, 2)
+
+    def test_add_to_cart(self):
+        url = reverse('add_to_cart', args=[self.book.pk])
+        response = self.client.post(url, {'quantity': 2}, follow=True)
+        self.assertContains(response, 'Only 1 available.')
+        self.assertNotIn(ANONYMOUS_CART_COOKIE, self.client.cookies)
+
+        self.client.post(url, {'quantity': 1})
+        self.assertIn(ANONYMOUS_CART_COOKIE, self.client.cookies)
+
+    def test_add_to_cart_ajax(self):
+        url = reverse('add_to_cart_ajax', args=[self.book.pk])
+        response = self.client.post(url, {'quantity': 2})
+        self.assertEqual(response.status_code, 409)
+        self.assertIn('Only 1 available.', response.json()['message'])
+
+        response = self.client.post(url, {'quantity': 1})
+        self.assertEqual(response.json()['quantity'], 1)
+
+
+class CheckoutTests(PDFCacheDirMixin, TestCase):
+    """Set-based checkout through place_order()"""
+
+    def setUp(self):
+        super().setUp()
+        self.user = User.objects.create_user('reader')
+        self.books = [make_book(number, stock_quantity=3) for number in range(1, 4)]
+
+    def new_order(self):
+        return Order(
+            user=self.user,
+            total_amount=Decimal('0'),
+            shipping_address='1 Main Street',
+            shipping_city='Springfield',
+            shipping_state='IL',
+            shipping_zip_code='62701',
+            shipping_country='USA',
+        )
+
+    def cart(self):
+        return CartItem.objects.filter(user=self.user).select_related('book')
+
+    def stock(self):
+        return [Book.objects.get(pk=book.pk).stock_quantity for book in self.books]
+
+    def test_multi_line_order(self):
+        for book in self.books:
+            add_cart_quantity(self.user.pk, book.pk, 2)
+
+        order = place_order(self.new_order(), self.cart())
+
+        self.assertEqual(self.stock(), [1, 1, 1])
+        self.assertEqual(order.items.count(), 3)
+        self.assertEqual(order.total_amount, Decimal('119.94'))
+        self.assertFalse(CartItem.objects.filter(user=self.user).exists())
+        self.assertFalse(StockReservation.objects.filter(user=self.user).exists())
+        self.assertEqual(BookSales.objects.get(book=self.books[0]).quantity_total, 2)
+        self.assertTrue(OutboxEmail.objects.filter(order=order).exists())
+
+    def test_short_line_rolls_back_whole_order(self):
+        for book in self.books:
+            add_cart_quantity(self.user.pk, book.pk, 2)
+        # Another order took stock of the last book after it went in the cart
+        Book.objects.filter(pk=self.books[2].pk).update(stock_quantity=1)
+
+        with self.assertRaises(OutOfStock) as raised:
+            place_order(self.new_order(), self.cart())
+
+        self.assertEqual(raised.exception.book_ids, [self.books[2].pk])
+        self.assertEqual(self.stock(), [3, 3, 1])
+        self.assertFalse(Order.objects.exists())
+        self.assertFalse(OrderItem.objects.exists())
+        self.assertFalse(BookSales.objects.exists())
+        self.assertEqual(self.cart().count(), 3)
+        self.assertEqual(StockReservation.objects.filter(user=self.user).count(), 3)
+
+    def test_copies_held_by_another_cart_cannot_be_sold(self):
+        add_cart_quantity(self.user.pk, self.books[0].pk, 2)
+        StockReservation.objects.filter(user=self.user).delete()
+        ReservedStock.objects.filter(book=self.books[0]).update(quantity=0)
+        set_holds(User.objects.create_user('other').pk, {self.books[0].pk: 2})
+
+        with self.assertRaises(OutOfStock):
+            place_order(self.new_order(), self.cart())
+        self.assertEqual(self.stock()[0], 3)
+
+    def test_checkout_view_reports_short_lines(self):
+        add_cart_quantity(self.user.pk, self.books[0].pk, 2)
+        Book.objects.filter(pk=self.books[0].pk).update(stock_quantity=1)
+        self.client.force_login(self.user)
+
+        response = self.client.post(reverse('checkout'), {
+            'shipping_address': '1 Main Street',
+            'shipping_city': 'Springfield',
+            'shipping_state': 'IL',
+            'shipping_zip_code': '62701',
+            'shipping_country': 'USA',
+        })
+
+        self.assertRedirects(response, reverse('cart'), fetch_redirect_response=False)
+        self.assertFalse(Order.objects.exists())
+
+    def test_order_only_bumps_catalog_version_on_sell_out(self):
+        add_cart_quantity(self.user.pk, self.books[0].pk, 1)
+        version = get_catalog_version()
+        with self.captureOnCommitCallbacks(execute=True):
+            place_order(self.new_order(), self.cart())
+        self.assertEqual(get_catalog_version(), version)
+
+        add_cart_quantity(self.user.pk, self.books[0].pk, 2)
+        with self.captureOnCommitCallbacks(execute=True):
+            place_order(self.new_order(), self.cart())
+        self.assertNotEqual(get_catalog_version(), version)
+        self.assertEqual(self.stock()[0], 0)
+
+
+class EmailOutboxTests(PDFCacheDirMixin, TestCase):
+    """The deliver_emails worker's batch delivery"""
+
+    def setUp(self):
+        super().setUp()
+        self.user = User.objects.create_user('reader', email='reader@example.com')
+        self.book = make_book(1)
+        self.order = Order.objects.create(
+            user=self.user,
+            total_amount=Decimal('39.98'),
+            shipping_address='1 Main Street',
+            shipping_city='Springfield',
+            shipping_state='IL',
+            shipping_zip_code='62701',
+            shipping_country='USA',
+        )
+        OrderItem.objects.create(order=self.order, book=self.book, quantity=2, price=self.book.price)
+
+    def test_pending_email_is_sent(self):
+        outbox_email = queue_order_confirmation(self.order)
+
+        self.assertEqual(deliver_pending(), (1, 0))
+
+        outbox_email.refresh_from_db()
+        self.assertEqual(outbox_email.status, 'sent')
+        self.assertEqual(outbox_email.attempts, 1)
+        self.assertIsNotNone(outbox_email.sent_at)
+        self.order.refresh_from_db()
+        self.assertTrue(self.order.email_sent)
+
+        self.assertEqual(len(mail.outbox), 1)
+        message = mail.outbox[0]
+        self.assertEqual(message.to, ['reader@example.com'])
+        self.assertIn(self.order.order_number, message.body)
+        self.assertIn('Test Book 1', message.body)
+        self.assertEqual(message.attachments[0][0], 'Test_Book_1_ebook.pdf')
+
+    def test_failed_send_is_retried_later(self):
+        def broken_builder(order):
+            raise RuntimeError('template exploded')
+
+        outbox_email = queue_order_confirmation(self.order)
+        original = BUILDERS['order_confirmation']
+        BUILDERS['order_confirmation'] = broken_builder
+        self.addCleanup(BUILDERS.__setitem__, 'order_confirmation', original)
+
+        self.assertEqual(deliver_pending(), (0, 1))
+
+        outbox_email.refresh_from_db()
+        self.assertEqual(outbox_email.status, 'pending')
+        self.assertEqual(outbox_email.attempts, 1)
+        self.assertIn('template exploded', outbox_email.last_error)
+        self.assertGreater(outbox_email.next_attempt_at, outbox_email.created_at)
+        # Not due yet, so a second run leaves it alone
+        self.assertEqual(deliver_pending(), (0, 0))
+
+
+class PDFCacheTests(PDFCacheDirMixin, TestCase):
+    """Placeholder PDFs are rendered once per book version and evicted LRU-first"""
+
+    def setUp(self):
+        super().setUp()
+        self.book = make_book(1)
+
+    def test_second_request_is_a_hit(self):
+        data = placeholder_pdf_bytes(self.book, 1)
+        self.assertTrue(data.startswith(b'%PDF'))
+        self.assertTrue(os.path.exists(cache_path(cache_key(self.book, 1))))
+
+        with mock.patch('store.pdf_cache.render_placeholder_pdf') as render:
+            self.assertEqual(placeholder_pdf_bytes(self.book, 1), data)
+        render.assert_not_called()
+
+    def test_editing_the_book_changes_the_key(self):
+        key = cache_key(self.book, 1)
+        self.assertNotEqual(cache_key(self.book, 2), key)
+
+        self.book.title = 'Renamed'
+        self.book.save()
+        self.assertNotEqual(cache_key(self.book, 1), key)
+
+    def test_evict_removes_least_recently_used(self):
+        books = [self.book, make_book(2), make_book(3)]
+        warm(books)
+        paths = [cache_path(cache_key(book, 1)) for book in books]
+        for age, path in enumerate(reversed(paths)):
+            os.utime(path, (1000 + age, 1000 + age))
+        # The first book was read most recently
+        placeholder_pdf_bytes(books[0], 1)
+
+        size = os.path.getsize(paths[0])
+        self.assertEqual(evict(max_bytes=size * 2), 2)
+        self.assertEqual([os.path.exists(path) for path in paths], [True, False, False])
+
+    def test_warm_skips_cached_books(self):
+        self.assertEqual(warm([self.book], quantities=(1, 2)), (2, 0))
+        self.assertEqual(warm([self.book, make_book(2)], quantities=(1,)), (1, 1))
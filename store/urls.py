@@ -7,7 +7,7 @@ mapping URLs to their corresponding view functions.
 
 from django.urls import path
 from django.contrib.auth import views as auth_views
-from . import views
+from . import api, views
 
 # Define URL patterns for the store app
 urlpatterns = [
@@ -17,8 +17,14 @@ urlpatterns = [
     # Book-related URLs
     path('books/', views.BookListView.as_view(), name='book_list'),
     path('books/<int:pk>/', views.BookDetailView.as_view(), name='book_detail'),
+    path('books/<int:book_id>/review/', views.add_review, name='add_review'),
     path('search/', views.search_books_ajax, name='search_books_ajax'),
 
+    # JSON API: read-only catalog and cart updates
+    path('api/books/', api.BookListAPIView.as_view(), name='api_book_list'),
+    path('api/books/<int:pk>/', api.BookDetailAPIView.as_view(), name='api_book_detail'),
+    path('api/cart/', api.CartAPIView.as_view(), name='api_cart'),
+
     # Authentication URLs
     path('register/', views.register_view, name='register'),
     path('login/', auth_views.LoginView.as_view(
@@ -52,6 +58,7 @@ urlpatterns = [
     # Shopping cart URLs
     path('cart/', views.cart_view, name='cart'),
     path('add-to-cart/<int:book_id>/', views.add_to_cart, name='add_to_cart'),
+    path('add-to-cart/<int:book_id>/ajax/', views.add_to_cart_ajax, name='add_to_cart_ajax'),
     path('remove-from-cart/<int:item_id>/', views.remove_from_cart, name='remove_from_cart'),
 
     # Checkout and order URLs
@@ -10,30 +10,92 @@ from django.contrib.auth import login
 from django.contrib.auth.decorators import login_required
 from django.contrib.auth.mixins import LoginRequiredMixin
 from django.contrib import messages
-from django.db.models import Q, Sum
-from django.core.paginator import Paginator
-from django.core.mail import EmailMessage
-from django.conf import settings
+from django.db.models import Sum
 from django.views.generic import ListView, DetailView
 from django.views.decorators.http import require_POST
 from django.http import JsonResponse
-from django.template.loader import render_to_string
 from django.utils.decorators import method_decorator
 from django.db import transaction
 from decimal import Decimal
 import os
-from io import BytesIO
-from reportlab.pdfgen import canvas
-from reportlab.lib.pagesizes import letter
 
-from .models import Book, CartItem, Order, OrderItem, UserProfile
+from .models import (
+    Book, CartItem, CoPurchase, Order, RelatedBook, Review, UserProfile
+)
+from .search import search_books
+from .search_cache import get_cached_page, search_cache_key, store_page
+from .autocomplete import prefix_index
+from .pagination import base_querystring, paginate
+from .facets import get_categories, get_facets, price_band_filter
+from .shelves import get_bestsellers, get_featured_books, get_recent_books
+from .bestsellers import WINDOW_LABELS
+from .checkout import OutOfStock, place_order
+from .cart import (
+    add_cart_quantity, apply_cart_changes, get_anonymous_cart, get_cart_count, get_cart_lines
+)
+from .reservations import available_for_user, release_holds, with_available_stock
 from .forms import (
     CustomUserCreationForm, AddToCartForm, UpdateCartForm,
-    CheckoutForm, BookSearchForm, UserProfileForm
+    CheckoutForm, BookSearchForm, ReviewForm, UserProfileForm
 )
 
 
-class BookListView(ListView):
+# Sales window of each page's bestseller shelf; the shelf heading comes
+# from WINDOW_LABELS so it always matches
+HOME_BESTSELLER_WINDOW = '7d'
+CATALOG_BESTSELLER_WINDOW = '30d'
+
+
+class CatalogQueryMixin:
+    """
+    Catalog filtering and sorting shared by the HTML and JSON listings.
+
+    Reads ``query``, ``category``, ``price`` and ``sort_by`` from the
+    request's GET parameters.
+    """
+
+    def get_catalog_queryset(self):
+        """In-stock books filtered and sorted by the request parameters"""
+        queryset = Book.objects.filter(stock_quantity__gt=0)
+
+        # Get search parameters
+        query = self.request.GET.get('query')
+        category = self.request.GET.get('category')
+
+        # Apply full-text search filter
+        if query:
+            queryset = search_books(queryset, query)
+
+        # Apply category and price band filters
+        if category and category != 'all':
+            queryset = queryset.filter(category__slug=category)
+
+        band_filter = price_band_filter(self.request.GET.get('price'))
+        if band_filter is not None:
+            queryset = queryset.filter(band_filter)
+
+        # Apply sorting (always ends on id so keyset cursors are unique)
+        return queryset.order_by(*self.get_ordering())
+
+    def get_sort_by(self):
+        """Return the active sort, defaulting to relevance for searches"""
+        query = self.request.GET.get('query')
+        sort_by = self.request.GET.get('sort_by')
+        sort_choices = dict(BookSearchForm.base_fields['sort_by'].choices)
+
+        if sort_by not in sort_choices or (sort_by == 'relevance' and not query):
+            return 'relevance' if query else '-created_at'
+        return sort_by
+
+    def get_ordering(self):
+        """Return the ORDER BY columns for the active sort"""
+        sort_by = self.get_sort_by()
+        if sort_by == 'relevance':
+            return ('-search_rank', 'id')
+        return (sort_by, '-id' if sort_by.startswith('-') else 'id')
+
+
+class BookListView(CatalogQueryMixin, ListView):
     """
     Display list of books with search and filtering functionality.
 
@@ -47,31 +109,60 @@ class BookListView(ListView):
 
     def get_queryset(self):
         """Filter and sort books based on search parameters"""
-        queryset = Book.objects.filter(stock_quantity__gt=0)
+        # Search results pages already in the result cache skip the
+        # search entirely (they are restored in paginate_queryset)
+        self.cached_page = None
+        if self.request.GET.get('query'):
+            self.cached_page = get_cached_page(self.get_search_cache_key(), self.paginate_by)
+            if self.cached_page is not None:
+                return Book.objects.none()
+
+        return self.get_catalog_queryset()
+
+    def get_facets(self):
+        """Facet counts for the active category/price band filters"""
+        category_slug = self.request.GET.get('category')
+        category_id = next(
+            (c['id'] for c in get_categories() if c['slug'] == category_slug),
+            None
+        )
+        price_band = self.request.GET.get('price')
+        if price_band_filter(price_band) is None:
+            price_band = None
+        return get_facets(category_id, price_band)
 
-        # Get search parameters
-        query = self.request.GET.get('query')
+    def get_search_cache_key(self):
+        """Result cache key for the current search request"""
         category = self.request.GET.get('category')
-        sort_by = self.request.GET.get('sort_by', '-created_at')
-
-        # Apply search filter
-        if query:
-            queryset = queryset.filter(
-                Q(title__icontains=query) |
-                Q(author__icontains=query) |
-                Q(description__icontains=query)
-            )
-
-        # Apply category filter (placeholder for future implementation)
-        if category and category != 'all':
-            # TODO: Add category field to Book model
-            pass
-
-        # Apply sorting
-        if sort_by:
-            queryset = queryset.order_by(sort_by)
+        price_band = self.request.GET.get('price')
+        return search_cache_key(
+            self.request.GET.get('query'),
+            category if category != 'all' else None,
+            price_band if price_band_filter(price_band) is not None else None,
+            self.get_sort_by(),
+            self.request.GET.get('page'),
+            self.request.GET.get('cursor'),
+        )
 
-        return queryset
+    def paginate_queryset(self, queryset, page_size):
+        """
+        Paginate by cursor or page number (see store.pagination).
+
+        Search results pages are restored from, or stored in, the result
+        id cache (see store.search_cache).
+        """
+        if self.cached_page is not None:
+            paginator, page, self.pagination_context = self.cached_page
+            self.pagination_context['base_querystring'] = base_querystring(self.request)
+            return paginator, page, page.object_list, page.has_other_pages()
+
+        paginator, page, self.pagination_context = paginate(
+            self.request, queryset, page_size, self.get_ordering(),
+            cache_count=True
+        )
+        if self.request.GET.get('query'):
+            store_page(self.get_search_cache_key(), paginator, page, self.pagination_context)
+        return paginator, page, page.object_list, page.has_other_pages()
 
     def get_context_data(self, **kwargs):
         """Add search form and current parameters to context"""
@@ -79,11 +170,13 @@ class BookListView(ListView):
         context['search_form'] = BookSearchForm(self.request.GET)
         context['current_query'] = self.request.GET.get('query', '')
         context['current_category'] = self.request.GET.get('category', 'all')
-        context['current_sort'] = self.request.GET.get('sort_by', '-created_at')
-        context['featured_books'] = Book.objects.filter(
-            is_featured=True,
-            stock_quantity__gt=0
-        )[:3]
+        context['current_price'] = self.request.GET.get('price', 'all')
+        context['facets'] = self.get_facets()
+        context['current_sort'] = self.get_sort_by()
+        context.update(self.pagination_context)
+        context['featured_books'] = get_featured_books(3)
+        context['bestsellers'] = get_bestsellers(CATALOG_BESTSELLER_WINDOW, 4)
+        context['bestsellers_label'] = WINDOW_LABELS[CATALOG_BESTSELLER_WINDOW]
         return context
 
 
@@ -98,21 +191,60 @@ class BookDetailView(DetailView):
     template_name = 'store/book_detail.html'
     context_object_name = 'book'
 
+    def get_queryset(self):
+        """Books with the stock not held by carts as ``available_quantity``"""
+        return with_available_stock(Book.objects.all())
+
     def get_context_data(self, **kwargs):
         """Add add to cart form to context"""
         context = super().get_context_data(**kwargs)
         context['add_to_cart_form'] = AddToCartForm()
 
-        # Get related books (same author or similar title)
-        book = self.get_object()
-        related_books = Book.objects.filter(
-            Q(author=book.author) | Q(title__icontains=book.title.split()[0])
-        ).exclude(id=book.id).filter(stock_quantity__gt=0)[:4]
-
-        context['related_books'] = related_books
+        # Get precomputed related books (see build_related_books command)
+        related_entries = RelatedBook.objects.filter(
+            book=self.object,
+            related__stock_quantity__gt=0
+        ).select_related('related').order_by('rank')[:4]
+
+        context['related_books'] = [entry.related for entry in related_entries]
+        context['also_bought'] = customers_also_bought([self.object.pk], 4)
+
+        # Reviews (the rating summary comes from the book's aggregates)
+        context['reviews'] = self.object.reviews.select_related('user')[:10]
+        user_review = None
+        if self.request.user.is_authenticated:
+            user_review = self.object.reviews.filter(user=self.request.user).first()
+        context['review_form'] = ReviewForm(instance=user_review)
+        context['user_review'] = user_review
         return context
 
 
+def customers_also_bought(book_ids, limit):
+    """
+    Return in-stock books often bought together with ``book_ids``.
+
+    Reads the precomputed CoPurchase rows (see build_co_purchases
+    command) in a single indexed query; books already in ``book_ids``
+    are skipped and each book appears once, at its best score.
+    """
+    if not book_ids:
+        return []
+
+    entries = CoPurchase.objects.filter(
+        book_id__in=book_ids,
+        related__stock_quantity__gt=0
+    ).exclude(
+        related_id__in=book_ids
+    ).select_related('related').order_by('-score', 'related_id')[:limit * len(book_ids)]
+
+    books = {}
+    for entry in entries:
+        books.setdefault(entry.related_id, entry.related)
+        if len(books) == limit:
+            break
+    return list(books.values())
+
+
 def register_view(request):
     """
     Handle user registration.
@@ -134,12 +266,13 @@ def register_view(request):
     return render(request, 'store/register.html', {'form': form})
 
 
-@login_required
 def add_to_cart(request, book_id):
     """
-    Add a book to the user's shopping cart.
+    Add a book to the shopping cart.
 
     Handles both new additions and quantity updates for existing items.
+    Anonymous visitors' carts are kept in a cookie (see store.cart) and
+    merged into their account when they log in.
     """
     book = get_object_or_404(Book, id=book_id)
 
@@ -156,28 +289,24 @@ def add_to_cart(request, book_id):
                 )
                 return redirect('book_detail', pk=book_id)
 
-            # Get or create cart item
-            cart_item, created = CartItem.objects.get_or_create(
-                user=request.user,
-                book=book,
-                defaults={'quantity': quantity}
-            )
+            if not request.user.is_authenticated:
+                return add_to_anonymous_cart(request, book, quantity)
 
-            if not created:
-                # Update existing cart item
-                new_quantity = cart_item.quantity + quantity
-                if new_quantity > book.stock_quantity:
-                    messages.error(
-                        request,
-                        f'Cannot add {quantity} more copies. Only {book.stock_quantity} available.'
-                    )
-                    return redirect('book_detail', pk=book_id)
+            # Insert or increment the line in one statement (see store.cart)
+            new_quantity = add_cart_quantity(request.user.pk, book.pk, quantity)
 
-                cart_item.quantity = new_quantity
-                cart_item.save()
+            if new_quantity is None:
+                available = available_for_user(request.user.pk, [book.pk]).get(book.pk, 0)
+                messages.error(
+                    request,
+                    f'Cannot add {quantity} more copies. Only {available} available.'
+                )
+                return redirect('book_detail', pk=book_id)
+
+            if new_quantity > quantity:
                 messages.success(
                     request,
-                    f'Updated "{book.title}" quantity to {cart_item.quantity} in your cart.'
+                    f'Updated "{book.title}" quantity to {new_quantity} in your cart.'
                 )
             else:
                 messages.success(
@@ -190,28 +319,134 @@ def add_to_cart(request, book_id):
     return redirect('book_detail', pk=book_id)
 
 
+@require_POST
+def add_to_cart_ajax(request, book_id):
+    """
+    AJAX variant of add_to_cart.
+
+    Returns the line's new quantity and the cart badge count as JSON
+    instead of redirecting. For logged-in users the happy path is one
+    transaction with the cart upsert and the stock hold (five statements
+    for the hold, see store.reservations.set_holds), then a badge count
+    that is only recounted when the add created a new line.
+    """
+    form = AddToCartForm(request.POST)
+    if not form.is_valid():
+        return JsonResponse({'success': False, 'message': 'Invalid quantity.'}, status=400)
+    quantity = form.cleaned_data['quantity']
+
+    if request.user.is_authenticated:
+        new_quantity = add_cart_quantity(request.user.pk, book_id, quantity)
+        if new_quantity is None:
+            book = get_object_or_404(Book, id=book_id)
+            available = available_for_user(request.user.pk, [book.pk]).get(book.pk, 0)
+            return JsonResponse({
+                'success': False,
+                'message': f'Cannot add {quantity} more copies. Only {available} available.',
+            }, status=409)
+        return JsonResponse({
+            'success': True,
+            'quantity': new_quantity,
+            'cart_item_count': get_cart_count(request.user.pk),
+        })
+
+    book = get_object_or_404(Book, id=book_id)
+    cart = get_anonymous_cart(request)
+    new_quantity = cart.quantity(book.pk) + quantity
+    available = available_for_user(None, [book.pk]).get(book.pk, 0)
+    if new_quantity > available:
+        return JsonResponse({
+            'success': False,
+            'message': f'Cannot add {quantity} more copies. Only {available} available.',
+        }, status=409)
+    if not cart.set(book.pk, new_quantity):
+        return JsonResponse({'success': False, 'message': 'Your cart is full.'}, status=409)
+
+    return JsonResponse({
+        'success': True,
+        'quantity': new_quantity,
+        'cart_item_count': len(cart),
+    })
+
+
+def add_to_anonymous_cart(request, book, quantity):
+    """Add a book to an anonymous visitor's cookie cart"""
+    cart = get_anonymous_cart(request)
+    current = cart.quantity(book.pk)
+    new_quantity = current + quantity
+
+    # Cookie carts hold nothing, so only the unheld copies count
+    available = available_for_user(None, [book.pk]).get(book.pk, 0)
+    if new_quantity > available:
+        messages.error(
+            request,
+            f'Cannot add {quantity} more copies. Only {available} available.'
+        )
+        return redirect('book_detail', pk=book.pk)
+
+    if not cart.set(book.pk, new_quantity):
+        messages.error(request, 'Your cart is full. Please log in to add more books.')
+        return redirect('cart')
+
+    if current:
+        messages.success(
+            request,
+            f'Updated "{book.title}" quantity to {new_quantity} in your cart.'
+        )
+    else:
+        messages.success(request, f'Added "{book.title}" to your cart.')
+    return redirect('cart')
+
+
 @login_required
+@require_POST
+def add_review(request, book_id):
+    """
+    Create or update the user's review of a book.
+
+    The review and the book's rating aggregates are written in one
+    transaction (see store.reviews).
+    """
+    book = get_object_or_404(Book, id=book_id)
+    review = Review.objects.filter(user=request.user, book=book).first()
+    form = ReviewForm(request.POST, instance=review)
+
+    if form.is_valid():
+        with transaction.atomic():
+            review = form.save(commit=False)
+            review.user = request.user
+            review.book = book
+            review.save()
+        messages.success(request, 'Thank you for your review!')
+    else:
+        messages.error(request, 'Please choose a rating between 1 and 5 stars.')
+
+    return redirect('book_detail', pk=book_id)
+
+
 def cart_view(request):
     """
     Display the user's shopping cart.
 
     Shows all items in cart with quantity update and removal options.
+    Anonymous visitors see their cookie cart.
     """
-    cart_items = CartItem.objects.filter(user=request.user).select_related('book')
+    cart_items = get_cart_lines(request)
 
     # Calculate total
     total_amount = sum(item.total_price for item in cart_items)
 
-    # Handle quantity updates
+    # Handle quantity updates: changed lines are written as one batch
     if request.method == 'POST' and 'update_cart' in request.POST:
+        changes = {}
         for item in cart_items:
             quantity_key = f'quantity_{item.id}'
             if quantity_key in request.POST:
                 try:
                     new_quantity = int(request.POST[quantity_key])
                     if new_quantity > 0 and new_quantity <= item.book.stock_quantity:
-                        item.quantity = new_quantity
-                        item.save()
+                        if new_quantity != item.quantity:
+                            changes[item.book_id] = new_quantity
                     elif new_quantity > item.book.stock_quantity:
                         messages.error(
                             request,
@@ -220,27 +455,39 @@ def cart_view(request):
                 except (ValueError, TypeError):
                     pass
 
+        for error in apply_cart_changes(request, changes):
+            messages.error(request, error['error'])
+
         return redirect('cart')
 
     context = {
         'cart_items': cart_items,
         'total_amount': total_amount,
+        'also_bought': customers_also_bought([item.book_id for item in cart_items], 4),
     }
 
     return render(request, 'store/cart.html', context)
 
 
-@login_required
 @require_POST
 def remove_from_cart(request, item_id):
     """
     Remove an item from the shopping cart.
 
-    Deletes the cart item and redirects back to cart page.
+    Deletes the cart item and redirects back to cart page. For anonymous
+    visitors ``item_id`` is the book id in their cookie cart.
     """
+    if not request.user.is_authenticated:
+        book = get_object_or_404(Book, id=item_id)
+        get_anonymous_cart(request).remove(book.pk)
+        messages.success(request, f'Removed "{book.title}" from your cart.')
+        return redirect('cart')
+
     cart_item = get_object_or_404(CartItem, id=item_id, user=request.user)
     book_title = cart_item.book.title
-    cart_item.delete()
+    with transaction.atomic():
+        cart_item.delete()
+        release_holds(request.user.pk, [cart_item.book_id])
 
     messages.success(request, f'Removed "{book_title}" from your cart.')
     return redirect('cart')
@@ -265,38 +512,28 @@ def checkout_view(request):
     if request.method == 'POST':
         form = CheckoutForm(request.POST, user=request.user)
         if form.is_valid():
-            # Create order with transaction to ensure data consistency
-            with transaction.atomic():
-                order = form.save(commit=False)
-                order.user = request.user
-                order.total_amount = total_amount
-                order.save()
-
-                # Create order items
-                for cart_item in cart_items:
-                    OrderItem.objects.create(
-                        order=order,
-                        book=cart_item.book,
-                        quantity=cart_item.quantity,
-                        price=cart_item.book.price
+            order = form.save(commit=False)
+            order.user = request.user
+
+            # Stock, order items, cart and the queued confirmation email
+            # in a few set-based queries (see store.checkout); nothing
+            # is written if a line is short
+            try:
+                place_order(order, cart_items)
+            except OutOfStock as e:
+                titles = {item.book_id: item.book.title for item in cart_items}
+                for book_id in e.book_ids or titles:
+                    messages.error(
+                        request,
+                        f'Not enough copies of "{titles[book_id]}" are available.'
                     )
+                return redirect('cart')
 
-                    # Update book stock
-                    book = cart_item.book
-                    book.stock_quantity -= cart_item.quantity
-                    book.save()
-
-                # Clear cart
-                cart_items.delete()
-
-                # Send confirmation email
-                send_order_confirmation_email(order)
-
-                messages.success(
-                    request,
-                    f'Order #{order.order_number} placed successfully!'
-                )
-                return redirect('order_confirmation', order_id=order.id)
+            messages.success(
+                request,
+                f'Order #{order.order_number} placed successfully!'
+            )
+            return redirect('order_confirmation', order_id=order.id)
     else:
         form = CheckoutForm(user=request.user)
 
@@ -332,15 +569,16 @@ def order_history_view(request):
 
     Shows all orders placed by the current user.
     """
-    orders = Order.objects.filter(user=request.user).order_by('-created_at')
+    orders = Order.objects.filter(user=request.user)
 
-    # Pagination
-    paginator = Paginator(orders, 10)
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
+    # Pagination (cursor or page number, see store.pagination)
+    paginator, page_obj, pagination_context = paginate(
+        request, orders, 10, ('-created_at', '-id')
+    )
 
     context = {
         'orders': page_obj,
+        **pagination_context,
     }
 
     return render(request, 'store/order_history.html', context)
@@ -375,134 +613,18 @@ def profile_view(request):
     return render(request, 'store/profile.html', context)
 
 
-def send_order_confirmation_email(order):
-    """
-    Send order confirmation email with eBook attachments.
-
-    Creates and sends email with PDF files for purchased books.
-    """
-    try:
-        # Create email subject and body
-        subject = f'Order Confirmation - {order.order_number}'
-
-        # Render email template
-        html_message = render_to_string('store/email/order_confirmation.html', {
-            'order': order,
-            'user': order.user,
-        })
-
-        # Create email message
-        email = EmailMessage(
-            subject=subject,
-            body=html_message,
-            from_email=settings.EMAIL_HOST_USER,
-            to=[order.user.email],
-        )
-        email.content_subtype = 'html'
-
-        # Attach PDF files for each book
-        for order_item in order.items.all():
-            book = order_item.book
-
-            # If book has a placeholder PDF, attach it
-            if book.placeholder_pdf:
-                try:
-                    email.attach_file(book.placeholder_pdf.path)
-                except:
-                    # If PDF file doesn't exist, create a placeholder
-                    create_placeholder_pdf(email, book, order_item.quantity)
-            else:
-                # Create a placeholder PDF
-                create_placeholder_pdf(email, book, order_item.quantity)
-
-        # Send email
-        email.send()
-
-        # Mark email as sent
-        order.email_sent = True
-        order.save()
-
-    except Exception as e:
-        # Log error (in production, use proper logging)
-        print(f"Error sending email: {str(e)}")
-
-
-def create_placeholder_pdf(email, book, quantity):
-    """
-    Create a placeholder PDF file for eBook delivery.
-
-    Generates a simple PDF with book information.
-    """
-    # Create PDF in memory
-    buffer = BytesIO()
-    pdf = canvas.Canvas(buffer, pagesize=letter)
-
-    # Add content to PDF
-    pdf.setFont("Helvetica-Bold", 16)
-    pdf.drawString(100, 750, f"eBook: {book.title}")
-
-    pdf.setFont("Helvetica", 12)
-    pdf.drawString(100, 720, f"Author: {book.author}")
-    pdf.drawString(100, 700, f"ISBN: {book.isbn}")
-    pdf.drawString(100, 680, f"Quantity: {quantity}")
-
-    pdf.drawString(100, 640, "Thank you for your purchase!")
-    pdf.drawString(100, 620, "This is a placeholder PDF file.")
-    pdf.drawString(100, 600, "In a real bookstore, this would be the actual eBook.")
-
-    pdf.drawString(100, 560, "Book Description:")
-
-    # Add description with line wrapping
-    description = book.description
-    lines = []
-    words = description.split()
-    current_line = ""
-
-    for word in words:
-        if len(current_line + word) < 70:
-            current_line += word + " "
-        else:
-            lines.append(current_line.strip())
-            current_line = word + " "
-
-    if current_line:
-        lines.append(current_line.strip())
-
-    y_position = 540
-    for line in lines[:10]:  # Limit to 10 lines
-        pdf.drawString(100, y_position, line)
-        y_position -= 20
-
-    pdf.save()
-
-    # Attach to email
-    buffer.seek(0)
-    email.attach(
-        f"{book.title.replace(' ', '_')}_ebook.pdf",
-        buffer.read(),
-        'application/pdf'
-    )
-    buffer.close()
-
-
 def home_view(request):
     """
     Display the home page.
 
-    Shows featured books and recent additions.
+    Shows featured books, bestsellers and recent additions, served
+    from the catalog cache.
     """
-    featured_books = Book.objects.filter(
-        is_featured=True,
-        stock_quantity__gt=0
-    )[:6]
-
-    recent_books = Book.objects.filter(
-        stock_quantity__gt=0
-    ).order_by('-created_at')[:8]
-
     context = {
-        'featured_books': featured_books,
-        'recent_books': recent_books,
+        'featured_books': get_featured_books(),
+        'bestsellers': get_bestsellers(HOME_BESTSELLER_WINDOW, 4),
+        'bestsellers_label': WINDOW_LABELS[HOME_BESTSELLER_WINDOW],
+        'recent_books': get_recent_books(),
     }
 
     return render(request, 'store/home.html', context)
@@ -512,24 +634,13 @@ def search_books_ajax(request):
     """
     AJAX endpoint for book search autocomplete.
 
-    Returns JSON response with matching book titles.
+    Returns JSON response with matching book titles, served from the
+    in-memory prefix index without a database round trip.
     """
     if request.headers.get('X-Requested-With') == 'XMLHttpRequest':
         query = request.GET.get('q', '')
         if query:
-            books = Book.objects.filter(
-                Q(title__icontains=query) | Q(author__icontains=query)
-            )[:10]
-
-            results = []
-            for book in books:
-                results.append({
-                    'id': book.id,
-                    'title': book.title,
-                    'author': book.author,
-                    'price': str(book.price),
-                })
-
+            results = prefix_index.lookup(query) or prefix_index.fuzzy_lookup(query)
             return JsonResponse({'results': results})
 
     return JsonResponse({'results': []})
\ No newline at end of file